@@ -0,0 +1,3 @@
+"""benchmarks - Timing and memory benchmarks of config expansion against synthetic trees
+of config files. Run `python -m benchmarks --help` from the project root, or use the
+benchmark classes in `bench_expand` with asv (see asv.conf.json)."""
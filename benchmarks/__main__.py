@@ -0,0 +1,182 @@
+"""__main__.py - Run the benchmarks and report files/sec and peak memory for each target,
+format, and tree shape, optionally comparing against saved results.
+
+    python -m benchmarks [--formats toml json] [--depth 3 --fanout 5] [--save out.json]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from benchmarks.bench_expand import SHAPES, Target, get_targets
+from benchmarks.generate import FORMATS, TreeShape, generate_tree
+
+
+class BenchmarkResult(NamedTuple):
+    target: str
+    fmt: str
+    shape: str
+    n_files: int
+    seconds: float
+    """Best time of all the repeats"""
+    peak_bytes: Optional[int]
+    """Peak memory allocated by Python during one run, if measured"""
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.n_files / self.seconds
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.target, self.fmt, self.shape)
+
+
+def run_target(
+    target: Target, root_path: Path, repeat: int, measure_memory: bool
+) -> Tuple[float, Optional[int]]:
+    """Run a target once to warm up, then `repeat` times for the best time, then once
+    more under tracemalloc for the peak memory"""
+    target(root_path)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        target(root_path)
+        best = min(best, time.perf_counter() - start)
+    peak_bytes = None
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            target(root_path)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak_bytes
+
+
+def run_benchmarks(
+    shapes: Sequence[TreeShape],
+    formats: Sequence[str],
+    target_names: Optional[Sequence[str]],
+    repeat: int,
+    measure_memory: bool,
+) -> List[BenchmarkResult]:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="nested_config_bench_") as tmp_dir:
+        for fmt in formats:
+            for shape in shapes:
+                root_path = generate_tree(Path(tmp_dir) / fmt / str(shape), shape, fmt)
+                # New targets for each tree so caches start empty
+                targets = get_targets()
+                for name in target_names or targets:
+                    if name not in targets:
+                        print(f"Skipping unavailable target {name!r}", file=sys.stderr)
+                        continue
+                    seconds, peak_bytes = run_target(
+                        targets[name], root_path, repeat, measure_memory
+                    )
+                    result = BenchmarkResult(
+                        name, fmt, str(shape), shape.n_files, seconds, peak_bytes
+                    )
+                    results.append(result)
+                    print(_format_row(result), flush=True)
+    return results
+
+
+def compare(
+    results: List[BenchmarkResult], baseline: List[BenchmarkResult], threshold: float
+) -> bool:
+    """Print the change in files/sec from the baseline for each result and return True if
+    any got slower by more than `threshold` (a fraction)"""
+    baseline_by_key = {result.key: result for result in baseline}
+    regressed = False
+    print(
+        f"\nChange in files/sec from baseline (! = slower by more than {threshold:.0%}):"
+    )
+    for result in results:
+        old = baseline_by_key.get(result.key)
+        if old is None:
+            continue
+        change = result.files_per_sec / old.files_per_sec - 1
+        flag = "!" if change < -threshold else " "
+        regressed = regressed or flag == "!"
+        print(f"{flag} {_format_key(result)} {change:+8.1%}")
+    return regressed
+
+
+def _format_key(result: BenchmarkResult) -> str:
+    return f"{result.target:32} {result.fmt:5} {result.shape:18}"
+
+
+def _format_row(result: BenchmarkResult) -> str:
+    peak = "" if result.peak_bytes is None else f"{result.peak_bytes / 2**20:10.2f}"
+    return (
+        f"{_format_key(result)} {result.n_files:6d} {result.seconds * 1000:10.2f}"
+        f" {result.files_per_sec:12.0f} {peak}"
+    )
+
+
+def _save(results: List[BenchmarkResult], path: Path) -> None:
+    path.write_text(json.dumps([result._asdict() for result in results], indent=2))
+
+
+def _load(path: Path) -> List[BenchmarkResult]:
+    return [BenchmarkResult(**result) for result in json.loads(path.read_text())]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=(
+            "Benchmark config expansion against generated trees of config files. By"
+            f" default these tree shapes are used: {', '.join(SHAPES)}"
+            " (d = depth, f = fan-out, p = leaf payload bytes)."
+        ),
+    )
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--targets", nargs="+", help="Names of the targets to run")
+    parser.add_argument("--depth", type=int, help="Use a single tree of this depth")
+    parser.add_argument("--fanout", type=int, default=4, help="With --depth")
+    parser.add_argument("--payload-bytes", type=int, default=1024, help="With --depth")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per target")
+    parser.add_argument(
+        "--no-memory", action="store_true", help="Don't measure peak memory"
+    )
+    parser.add_argument("--save", type=Path, help="Save the results to a JSON file")
+    parser.add_argument(
+        "--compare", type=Path, help="Compare with results saved with --save"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Fractional slowdown from --compare results that counts as a regression",
+    )
+    parser.add_argument("--list-targets", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.list_targets:
+        print("\n".join(get_targets()))
+        return 0
+    shapes = list(SHAPES.values())
+    if args.depth is not None:
+        shapes = [TreeShape(args.depth, args.fanout, args.payload_bytes)]
+    header = f"{'target':32} {'fmt':5} {'shape':18} {'files':>6} {'best ms':>10}"
+    header += f" {'files/sec':>12}" + ("" if args.no_memory else f" {'peak MiB':>10}")
+    print(header)
+    results = run_benchmarks(
+        shapes, args.formats, args.targets, args.repeat, not args.no_memory
+    )
+    if args.save:
+        _save(results, args.save)
+    if args.compare and compare(results, _load(args.compare), args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""bench_expand.py - The functions being benchmarked, and asv benchmark suites that time
+them against generated trees of config files. asv also benchmarks older commits, so
+functions that not every version of nested_config has are only benchmarked where they
+exist."""
+
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from benchmarks.generate import FORMATS, Node, TreeShape, generate_tree
+from nested_config import expand_config
+from nested_config.expand import ConfigExpander
+
+SHAPES = {
+    str(shape): shape
+    for shape in (
+        TreeShape(depth=2, fanout=4, payload_bytes=1024),  # small
+        TreeShape(depth=8, fanout=2, payload_bytes=256),  # deep
+        TreeShape(depth=1, fanout=200, payload_bytes=4096),  # wide, with big leaves
+    )
+}
+
+Target = Callable[[Path], Any]
+"""A function that expands (and maybe validates) the root config file of a tree"""
+
+
+def get_targets() -> Dict[str, Target]:
+    """The functions to benchmark, by name. The cached one is only included if the
+    installed nested_config has ConfigCache, and the pydantic ones if pydantic is
+    installed."""
+    expander = ConfigExpander()
+    targets: Dict[str, Target] = {
+        "expand_config": lambda path: expand_config(path, Node),
+        "ConfigExpander.expand": lambda path: expander.expand(path, Node),
+    }
+    try:
+        from nested_config import ConfigCache
+    except ImportError:
+        pass
+    else:
+        cached_expander = ConfigExpander(cache=ConfigCache(max_entries=None))
+        targets["ConfigExpander.expand (cached)"] = lambda path: cached_expander.expand(
+            path, Node
+        )
+    try:
+        from benchmarks.pydantic_models import NcNode, PydNode
+        from nested_config import validate_config
+    except ImportError:
+        return targets
+
+    def _validate_config(path: Path) -> Any:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            return validate_config(path, PydNode)
+
+    def _from_config(path: Path) -> Any:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            return NcNode.from_config(path)
+
+    targets["validate_config"] = _validate_config
+    targets["BaseModel.from_config"] = _from_config
+    return targets
+
+
+class _TreeSuite:
+    """Base class of the asv suites, which benchmark targets against each format and
+    shape of tree"""
+
+    params = (list(FORMATS), list(SHAPES))
+    param_names = ["format", "shape"]
+    timeout = 300
+    required_targets: Tuple[str, ...] = ()
+    """Targets without which the suite is skipped"""
+
+    def setup(self, fmt: str, shape_name: str):
+        self.targets = get_targets()
+        for target_name in self.required_targets:
+            if target_name not in self.targets:
+                # asv skips benchmarks whose setup raises NotImplementedError
+                raise NotImplementedError(f"{target_name} is not available")
+        if fmt == "yaml":
+            try:
+                import yaml  # noqa: F401
+            except ImportError:
+                raise NotImplementedError("PyYAML is not installed") from None
+        self.tmp_dir = Path(tempfile.mkdtemp(prefix="nested_config_bench_"))
+        self.root_path = generate_tree(self.tmp_dir, SHAPES[shape_name], fmt)
+
+    def teardown(self, fmt: str, shape_name: str):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, target_name: str):
+        self.targets[target_name](self.root_path)
+
+
+class ExpandSuite(_TreeSuite):
+    """asv benchmarks of the targets that every version has"""
+
+    def time_expand_config(self, fmt: str, shape_name: str):
+        self._run("expand_config")
+
+    def time_config_expander(self, fmt: str, shape_name: str):
+        self._run("ConfigExpander.expand")
+
+    def peakmem_expand_config(self, fmt: str, shape_name: str):
+        self._run("expand_config")
+
+
+class CachedExpandSuite(_TreeSuite):
+    """asv benchmarks of ConfigExpander.expand with a ConfigCache"""
+
+    required_targets = ("ConfigExpander.expand (cached)",)
+
+    def time_config_expander_cached(self, fmt: str, shape_name: str):
+        self._run("ConfigExpander.expand (cached)")
+
+
+class PydanticSuite(_TreeSuite):
+    """asv benchmarks of the Pydantic functions"""
+
+    required_targets = ("validate_config", "BaseModel.from_config")
+
+    def time_validate_config(self, fmt: str, shape_name: str):
+        self._run("validate_config")
+
+    def time_from_config(self, fmt: str, shape_name: str):
+        self._run("BaseModel.from_config")
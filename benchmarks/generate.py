@@ -0,0 +1,90 @@
+"""generate.py - Generate synthetic trees of config files of configurable depth, fan-out,
+format, and leaf payload size"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+FORMATS = ("toml", "json", "yaml")
+
+
+class Node:
+    """The model of every config file in a generated tree"""
+
+    name: str
+    level: int
+    payload: Dict[str, str]
+    children: List["Node"]
+
+
+class TreeShape(NamedTuple):
+    """The shape of a generated tree of config files"""
+
+    depth: int
+    """Number of levels of config files below the root config file"""
+    fanout: int
+    """Number of child config files of each non-leaf config file"""
+    payload_bytes: int
+    """Approximate size of the payload of each leaf config file"""
+
+    @property
+    def n_files(self) -> int:
+        return sum(self.fanout**level for level in range(self.depth + 1))
+
+    def __str__(self) -> str:
+        return f"d{self.depth}-f{self.fanout}-p{self.payload_bytes}"
+
+
+def generate_tree(root_dir: Path, shape: TreeShape, fmt: str) -> Path:
+    """Write a tree of config files of the given shape and format (one of FORMATS) in
+    root_dir and return the path to the root config file. Each config file refers to its
+    children by paths relative to itself, in a subdirectory named after itself."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}. Use one of {FORMATS}.")
+    root_dir.mkdir(parents=True, exist_ok=True)
+    root_path = root_dir / f"root.{fmt}"
+    _write_node(root_path, 0, shape, fmt)
+    return root_path
+
+
+def _write_node(path: Path, level: int, shape: TreeShape, fmt: str) -> None:
+    children = []
+    if level < shape.depth:
+        child_dir = path.parent / path.stem
+        child_dir.mkdir(exist_ok=True)
+        for i in range(shape.fanout):
+            child_path = child_dir / f"{i}.{fmt}"
+            _write_node(child_path, level + 1, shape, fmt)
+            children.append(f"{path.stem}/{child_path.name}")
+    payload = _make_payload(shape.payload_bytes) if not children else {}
+    node = {"name": str(path), "level": level, "payload": payload, "children": children}
+    path.write_text(_dumps(node, fmt))
+
+
+def _make_payload(n_bytes: int) -> Dict[str, str]:
+    """About n_bytes of string values, in 64-character chunks"""
+    n_values = max(1, n_bytes // 64)
+    return {f"key{i}": f"{i:064d}" for i in range(n_values)}
+
+
+def _dumps(node: Dict[str, Any], fmt: str) -> str:
+    if fmt == "json":
+        return json.dumps(node, indent=2)
+    if fmt == "yaml":
+        import yaml
+
+        return yaml.safe_dump(node, sort_keys=False)
+    return _toml_dumps(node)
+
+
+def _toml_dumps(node: Dict[str, Any]) -> str:
+    """Just enough TOML for a generated node (tables must follow all the other values)"""
+    lines = []
+    tables = []
+    for key, value in node.items():
+        if isinstance(value, dict):
+            tables.append(f"\n[{key}]")
+            tables.extend(f"{k} = {json.dumps(v)}" for k, v in value.items())
+        else:
+            lines.append(f"{key} = {json.dumps(value)}")
+    return "\n".join(lines + tables) + "\n"
@@ -0,0 +1,32 @@
+"""pydantic_models.py - Pydantic versions of the generated tree's model. Importing this
+raises ImportError if pydantic isn't installed."""
+
+import warnings
+from typing import Dict, List
+
+import pydantic
+
+from nested_config._pydantic import PYDANTIC_1, BaseModel
+
+
+class PydNode(pydantic.BaseModel):
+    name: str
+    level: int
+    payload: Dict[str, str]
+    children: List["PydNode"]
+
+
+with warnings.catch_warnings():
+    # nested_config.BaseModel is deprecated, but still worth benchmarking
+    warnings.simplefilter("ignore", DeprecationWarning)
+
+    class NcNode(BaseModel):
+        name: str
+        level: int
+        payload: Dict[str, str]
+        children: List["NcNode"]
+
+
+if PYDANTIC_1:
+    PydNode.update_forward_refs()
+    NcNode.update_forward_refs()
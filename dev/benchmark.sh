@@ -0,0 +1,7 @@
+#!/bin/bash
+# Run the benchmarks. All arguments are passed on; see `dev/benchmark.sh --help`.
+SCRIPTDIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )"
+PROJECT_ROOT="$(realpath -s "$SCRIPTDIR/..")"
+cd "$PROJECT_ROOT" || { echo "Couldn't cd to project root" >&2 ; exit 1 ; }
+
+python -m benchmarks "$@"
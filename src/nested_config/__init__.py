@@ -3,19 +3,81 @@ configuration files into single configuration objects. See README and help for
 nested_config.expand_config().
 """
 
-try:
-    # Don't require pydantic
-    from nested_config._pydantic import (
-        BaseModel,
-        validate_config,
-    )
-except ImportError:
-    pass
-
-from nested_config.expand import ConfigExpansionError, expand_config
+import importlib
+import sys
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from nested_config.expand import (
+    ConfigExpansionError,
+    expand_config,
+    expand_config_data,
+    iter_expand,
+)
 from nested_config.loaders import (
+    ConfigCache,
     ConfigLoaderError,
     NoLoaderError,
+    async_config_dict_loaders,
     config_dict_loaders,
 )
-from nested_config.version import __version__
+from nested_config.session import ConfigReloader, ExpansionSession
+from nested_config.sources import (
+    ConfigSource,
+    FileSystemSource,
+    MappingSource,
+    ResourceSource,
+)
+from nested_config.trace import ExpansionEvent, TraceCollector
+
+if TYPE_CHECKING:
+    from nested_config._pydantic import BaseModel, validate_config
+    from nested_config.batch import BatchResult, expand_many, iter_expand_many
+    from nested_config.construct import load
+    from nested_config.disk_cache import DiskCache
+    from nested_config.expand_async import expand_config_async
+    from nested_config.single_flight import SingleFlightConfigExpander
+    from nested_config.snapshot import Snapshot, write_snapshot
+    from nested_config.version import __version__
+
+_lazy_attributes: Dict[str, str] = {
+    "BaseModel": "nested_config._pydantic",
+    "validate_config": "nested_config._pydantic",
+    "BatchResult": "nested_config.batch",
+    "expand_many": "nested_config.batch",
+    "iter_expand_many": "nested_config.batch",
+    "load": "nested_config.construct",
+    "DiskCache": "nested_config.disk_cache",
+    "expand_config_async": "nested_config.expand_async",
+    "SingleFlightConfigExpander": "nested_config.single_flight",
+    "Snapshot": "nested_config.snapshot",
+    "write_snapshot": "nested_config.snapshot",
+    "__version__": "nested_config.version",
+}
+"""Attributes whose modules (and their dependencies, e.g. pydantic and asyncio) are only
+imported when the attribute is first used"""
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as ex:
+        # Don't require pydantic
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r} ({ex})"
+        ) from ex
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted([*globals(), *_lazy_attributes])
+
+
+if "pydantic" in sys.modules:
+    # Patch Pydantic 1 with PurePath validators and JSON encoders on import, as before
+    # Pydantic was imported lazily, when that doesn't cost an import of Pydantic
+    import nested_config._pydantic  # noqa: F401
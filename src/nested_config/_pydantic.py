@@ -1,24 +1,32 @@
 """_pyd_compat.py - Functions and types to assist with Pydantic 1/2 compatibility"""
 
+import functools
+import typing
 import warnings
 from pathlib import Path, PurePath, PurePosixPath, PureWindowsPath
-from typing import Any, Optional, Type, TypeVar
+from typing import Any, Dict, Hashable, Optional, Tuple, Type, TypeVar
 
 import pydantic
 import pydantic.errors
 import pydantic.fields
 import pydantic.json
 import pydantic.validators
-from setuptools._vendor.packaging.version import Version  # type: ignore
 from typing_extensions import Unpack
 
-from nested_config._types import PathLike
-from nested_config.expand import expand_config
+from nested_config import loaders
+from nested_config._types import ConfigDict, PathLike
+from nested_config.expand import (
+    ConfigExpander,
+    PlanKind,
+    _FileNode,
+    get_expansion_plan,
+)
 from nested_config.loaders import load_config
+from nested_config.sources import FileSystemSource
 
 PathT = TypeVar("PathT", bound=PurePath)
 PydModelT = TypeVar("PydModelT", bound=pydantic.BaseModel)
-PYDANTIC_1 = Version(pydantic.VERSION) < Version("2.0")
+PYDANTIC_1 = int(str(pydantic.VERSION).split(".")[0]) < 2
 
 
 def api_deprecation(api_name):
@@ -35,6 +43,7 @@ def validate_config(
     model: Type[PydModelT],
     *,
     default_suffix: Optional[str] = None,
+    reuse_submodels: bool = False,
 ) -> PydModelT:
     """Load a config file into a Pydantic model. The config file may contain string paths
     where nested models would be expected. These are preparsed into their respective
@@ -43,6 +52,11 @@ def validate_config(
     If paths to nested models are relative, they are assumed to be relative to the path of
     their parent config file.
 
+    With Pydantic 2, JSON config files whose models can't contain nested models, forbid
+    extra fields (`extra="forbid"`), and have no aliases are validated straight from the
+    contents of the file with Pydantic's JSON parser, which is faster. Other config files
+    are loaded into config dicts and validated as usual.
+
     Input
     -----
     config_path
@@ -53,6 +67,13 @@ def validate_config(
         If there is no loader for the config file suffix (or the config file has no
         suffix) try to load the config with the loader specified by this extension, e.g.
         '.toml' or '.yml'
+    reuse_submodels
+        If True, each distinct sub-config file is validated into a Pydantic model only
+        once (per model) and that instance is used everywhere the file is referenced.
+        The instances are shared, so they should be frozen or treated as read-only.
+        Pydantic 1 copies model instances when it validates their parents, so with
+        Pydantic 1 each file is still validated only once, but the instances aren't
+        shared.
     Returns
     -------
     A Pydantic object of the type specified by the model input.
@@ -68,11 +89,104 @@ def validate_config(
 
     """
     api_deprecation("nested_config.validate_config")
-    config_dict = expand_config(config_path, model, default_suffix=default_suffix)
+    if reuse_submodels:
+        expander: ConfigExpander = _SubmodelReusingExpander(default_suffix=default_suffix)
+    else:
+        expander = _JsonValidatingExpander(default_suffix=default_suffix)
+    config_dict = expander.expand(config_path, model)
     # Create and validate the config object
     return model_validate(model, config_dict)
 
 
+class _JsonValidatingExpander(ConfigExpander):
+    """ConfigExpander that (with Pydantic 2) validates each JSON config file whose model
+    is a Pydantic model that can't contain nested models and forbids extra fields
+    straight from the file's bytes with `model_validate_json`, rather than parsing it into
+    a config dict, and puts the model instance in the expanded config dict"""
+
+    def _lookup_expanded(
+        self, path: PurePath, model: type, parent: Optional[_FileNode]
+    ) -> Optional[pydantic.BaseModel]:
+        if (
+            PYDANTIC_1
+            or path.suffix != ".json"
+            # Only if the file would be loaded with the built-in JSON loader
+            or loaders.config_dict_loaders.get(".json") is not loaders.json_load
+            or not isinstance(self.source, FileSystemSource)
+            or not _can_validate_json(model)
+        ):
+            return None
+        try:
+            with open(path, "rb") as fobj:
+                data = fobj.read()
+            return typing.cast(Type[pydantic.BaseModel], model).model_validate_json(data)
+        except (OSError, pydantic.ValidationError):
+            # Load and validate it the usual way so that errors are the same
+            return None
+
+
+class _SubmodelReusingExpander(_JsonValidatingExpander):
+    """ConfigExpander that validates each sub-config file referenced by path as its
+    Pydantic model once, and puts that model instance in the expanded config dict
+    wherever the file is referenced"""
+
+    def __init__(self, *, default_suffix: Optional[str] = None):
+        super().__init__(default_suffix=default_suffix)
+        # Identifies config files like the expansion does, so that paths to the same
+        # file through symlinks are only the same file if their relative paths are too
+        self._resolver = self.source.resolver()
+        self._validated: Dict[Tuple[Hashable, type], pydantic.BaseModel] = {}
+
+    def _lookup_expanded(
+        self, path: PurePath, model: type, parent: Optional[_FileNode]
+    ) -> Optional[pydantic.BaseModel]:
+        key = (self._resolver.file_id(path), model)
+        instance = self._validated.get(key)
+        if instance is None:
+            instance = super()._lookup_expanded(path, model, parent)
+            if instance is not None:
+                self._validated[key] = instance
+        return instance
+
+    def _store_expanded(
+        self,
+        path: PurePath,
+        model: type,
+        parent: Optional[_FileNode],
+        expanded: ConfigDict,
+    ) -> Any:
+        # The root config dict is validated by validate_config
+        if parent is None or not _is_pydantic_model(model):
+            return expanded
+        instance = model_validate(typing.cast(Type[pydantic.BaseModel], model), expanded)
+        self._validated[(self._resolver.file_id(path), model)] = instance
+        return instance
+
+
+def _is_pydantic_model(model: type) -> bool:
+    return isinstance(model, type) and issubclass(model, pydantic.BaseModel)
+
+
+@functools.lru_cache
+def _can_validate_json(model: type) -> bool:
+    """Whether config files of a model can be validated straight from JSON: it's a
+    Pydantic (2) model none of whose fields can contain a model, i.e. whose config files
+    never refer to other config files, and Pydantic rejects every key that expansion
+    would reject, i.e. the model forbids extra fields and has no aliases"""
+    if PYDANTIC_1 or not _is_pydantic_model(model):
+        return False
+    pydantic_model = typing.cast(Type[pydantic.BaseModel], model)
+    if pydantic_model.model_config.get("extra") != "forbid" or any(
+        field.alias is not None or field.validation_alias is not None
+        for field in pydantic_model.model_fields.values()
+    ):
+        return False
+    return all(
+        value_plan.kind is PlanKind.SCALAR
+        for value_plan in get_expansion_plan(model).values()
+    )
+
+
 def model_validate(model: Type[PydModelT], obj: Any) -> PydModelT:
     """Pydantic 1/2 compatibility wrapper for model.model_validate"""
     if PYDANTIC_1:
@@ -156,7 +270,10 @@ class BaseModel(pydantic.BaseModel):
 
     @classmethod
     def from_config(
-        cls: Type[PydModelT], config_path: PathLike, convert_strpaths=True
+        cls: Type[PydModelT],
+        config_path: PathLike,
+        convert_strpaths=True,
+        reuse_submodels=False,
     ) -> PydModelT:
         """Create Pydantic model from a config file
 
@@ -170,6 +287,8 @@ class BaseModel(pydantic.BaseModel):
             interpreted as a path to another config file and an attempt will be made to
             parse that config file [a] and make it into an object of that [b] model type,
             and so on, recursively.
+        reuse_submodels
+            See `nested_config.validate_config`
 
         Returns
         -------
@@ -186,7 +305,7 @@ class BaseModel(pydantic.BaseModel):
         """
         config_path = Path(config_path)
         if convert_strpaths:
-            return validate_config(config_path, cls)
+            return validate_config(config_path, cls, reuse_submodels=reuse_submodels)
         # otherwise just load the config as-is
         config_dict = load_config(config_path)
         return model_validate(cls, config_dict)
@@ -1,14 +1,16 @@
 """_types.py - Type aliases and type-checking functions"""
 
 import sys
-from pathlib import Path
-from typing import Any, Callable, Dict, Union
+from pathlib import Path, PurePath
+from typing import Any, Awaitable, Callable, Dict, Union
 
 from typing_extensions import TypeAlias
 
 ConfigDict: TypeAlias = Dict[str, Any]
-PathLike: TypeAlias = Union[Path, str]
+PathLike: TypeAlias = Union[PurePath, str]
 ConfigDictLoader: TypeAlias = Callable[[Path], ConfigDict]
+AsyncConfigDictLoader: TypeAlias = Callable[[Path], Awaitable[ConfigDict]]
+ConfigDictParser: TypeAlias = Callable[[bytes], ConfigDict]
 
 
 if sys.version_info >= (3, 10):
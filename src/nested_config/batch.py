@@ -0,0 +1,166 @@
+"""batch.py - Expand many root config files in one call, sharing parsed sub-config files
+between them"""
+
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.expand import ConfigExpander
+from nested_config.loaders import ConfigCache
+
+DEFAULT_CACHE_ENTRIES = 1024
+"""max_entries of the ConfigCache made for a batch if none is given"""
+
+
+class BatchResult(NamedTuple):
+    """The result of expanding one root config file in a batch"""
+
+    path: Path
+    """The root config file"""
+    config: Optional[ConfigDict]
+    """The expanded config dict, or None if there was an error"""
+    error: Optional[Exception]
+    """The exception raised while expanding the root config file, if any"""
+
+
+def expand_many(
+    config_paths: Iterable[PathLike],
+    model: type,
+    *,
+    workers: Optional[int] = None,
+    processes: bool = False,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+) -> List[BatchResult]:
+    """Expand many root config files according to the same model. A failure to expand
+    one root config file doesn't stop the batch; the exception is returned in its
+    BatchResult instead.
+
+    Inputs
+    ------
+    config_paths
+        The root config files to expand
+    model
+        The class whose attribute annotations will be used to expand each root config file
+    workers
+        Number of worker threads (or processes) to use. If None, the root config files are
+        expanded one at a time in the calling thread.
+    processes
+        If True, use a pool of `workers` processes rather than threads. The model must
+        then be importable by the worker processes, and each worker process has its own
+        cache.
+    default_suffix
+        See `nested_config.expand_config`
+    cache
+        The ConfigCache in which to share parsed config files between root config files.
+        If None, a ConfigCache of DEFAULT_CACHE_ENTRIES config files is used for the
+        batch, so memory use stays bounded however many root config files there are; the
+        least recently used files (e.g. roots that were already expanded) are dropped
+        first. In process mode each worker process uses a new ConfigCache with the same
+        limits.
+
+    Returns
+    -------
+    A list of BatchResult, in the same order as `config_paths`
+    """
+    return list(
+        iter_expand_many(
+            config_paths,
+            model,
+            workers=workers,
+            processes=processes,
+            default_suffix=default_suffix,
+            cache=cache,
+        )
+    )
+
+
+def iter_expand_many(
+    config_paths: Iterable[PathLike],
+    model: type,
+    *,
+    workers: Optional[int] = None,
+    processes: bool = False,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    ordered: bool = True,
+) -> Iterator[BatchResult]:
+    """Like `expand_many`, but yield each BatchResult as soon as it is available. If
+    `ordered` is False, results are yielded in the order they finish rather than the order
+    of `config_paths`.
+
+    Apart from the results not yet consumed, memory use is bounded by the cache: by
+    default at most DEFAULT_CACHE_ENTRIES parsed config files are kept, so a long batch
+    doesn't hold on to every root config file it has expanded.
+    """
+    paths = [Path(config_path) for config_path in config_paths]
+    if cache is None:
+        cache = ConfigCache(max_entries=DEFAULT_CACHE_ENTRIES)
+    if workers is None:
+        expander = ConfigExpander(default_suffix=default_suffix, cache=cache)
+        for path in paths:
+            yield _expand_root(expander, path, model)
+        return
+    executor: Executor
+    if processes:
+        executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker_process,
+            initargs=(default_suffix, cache.max_entries, cache.max_bytes),
+        )
+        with executor:
+            futures = [
+                executor.submit(_expand_root_in_worker_process, path, model)
+                for path in paths
+            ]
+            yield from _iter_results(futures, ordered)
+    else:
+        expander = ConfigExpander(default_suffix=default_suffix, cache=cache)
+        executor = ThreadPoolExecutor(workers, thread_name_prefix="nested_config")
+        with executor:
+            futures = [
+                executor.submit(_expand_root, expander, path, model) for path in paths
+            ]
+            yield from _iter_results(futures, ordered)
+
+
+def _iter_results(futures, ordered: bool) -> Iterator[BatchResult]:
+    try:
+        for future in futures if ordered else as_completed(futures):
+            yield future.result()
+    finally:
+        # If the caller stops iterating early, don't expand the rest
+        for future in futures:
+            future.cancel()
+
+
+def _expand_root(expander: ConfigExpander, path: Path, model: type) -> BatchResult:
+    try:
+        return BatchResult(path, expander.expand(path, model), None)
+    except Exception as ex:
+        return BatchResult(path, None, ex)
+
+
+_worker_expander: Optional[ConfigExpander] = None
+"""The ConfigExpander of a worker process, with its own cache"""
+
+
+def _init_worker_process(
+    default_suffix: Optional[str], max_entries: Optional[int], max_bytes: Optional[int]
+):
+    global _worker_expander
+    _worker_expander = ConfigExpander(
+        default_suffix=default_suffix,
+        cache=ConfigCache(max_entries=max_entries, max_bytes=max_bytes),
+    )
+
+
+def _expand_root_in_worker_process(path: Path, model: type) -> BatchResult:
+    assert _worker_expander is not None
+    return _expand_root(_worker_expander, path, model)
@@ -0,0 +1,154 @@
+"""bundle.py - Expand a tree of config files once (e.g. at build time) into a single
+bundle file that loads in one read, with a manifest of the config files it came from"""
+
+import datetime
+import importlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.disk_cache import FileFingerprint, _RecordingExpander
+from nested_config.expand import ConfigExpander
+from nested_config.sources import FileSystemSource
+
+_FORMAT_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+"""Suffix appended to the bundle file name to get the name of its manifest"""
+
+
+class BundleResult(NamedTuple):
+    """The files written by `write_bundle`"""
+
+    bundle_path: Path
+    manifest_path: Path
+    snapshot_path: Optional[Path]
+    sources: List[FileFingerprint]
+    """Every config file that was read to expand the bundle"""
+
+
+def write_bundle(
+    config_path: PathLike,
+    model: type,
+    output: PathLike,
+    *,
+    snapshot: Optional[PathLike] = None,
+    expander: Optional[ConfigExpander] = None,
+) -> BundleResult:
+    """Expand a config file and write the fully-expanded config dict to a single JSON
+    bundle file. Since the bundle contains no paths to sub-config files, `expand_config`
+    (and `validate_config`) load it with one read and no path resolution. TOML and YAML
+    dates and times are stored in the bundle as ISO 8601 strings, so they load back as
+    strings; only the snapshot keeps their types.
+
+    Inputs
+    ------
+    config_path
+        The root config file to expand
+    model
+        The model with which to expand the config file
+    output
+        Where to write the bundle. A manifest of the config files that were read (with
+        their sizes, modification times, and SHA-256 hashes) is written next to it, at
+        `output` + '.manifest.json'.
+    snapshot
+        If provided, also write a binary snapshot of the expanded config dict here (see
+        `nested_config.snapshot`). Give it the suffix '.ncsnap' to load it with
+        `expand_config`, or open it with `nested_config.Snapshot.open`.
+    expander
+        The ConfigExpander to expand the config file with (e.g. to set `default_suffix`).
+        Only config files on the filesystem can be bundled.
+
+    Raises
+    ------
+    ValueError
+        `expander` doesn't load config files from the filesystem
+    TypeError
+        The expanded config dict contains a value that can't be stored in the bundle
+    See `expand_config` for errors while expanding the config file.
+    """
+    bundle_path = Path(output)
+    expander = expander or ConfigExpander()
+    if not isinstance(expander.source, FileSystemSource):
+        raise ValueError("Only config files on the filesystem can be bundled")
+    recorder = _RecordingExpander(expander, hash_contents=True)
+    config_dict = recorder.expand(config_path, model)
+    _write_atomic(bundle_path, _dump_json(config_dict))
+    snapshot_path = None
+    if snapshot is not None:
+        from nested_config.snapshot import write_snapshot
+
+        snapshot_path = Path(snapshot)
+        write_snapshot(config_dict, snapshot_path)
+    manifest_path = bundle_path.with_name(bundle_path.name + MANIFEST_SUFFIX)
+    manifest = {
+        "format": _FORMAT_VERSION,
+        "root": str(Path(config_path).resolve()),
+        "model": f"{model.__module__}:{model.__qualname__}",
+        "bundle": bundle_path.name,
+        "snapshot": None if snapshot_path is None else str(snapshot_path),
+        "sources": [fingerprint._asdict() for fingerprint in recorder.fingerprints],
+    }
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    return BundleResult(bundle_path, manifest_path, snapshot_path, recorder.fingerprints)
+
+
+def import_model(spec: str) -> type:
+    """Import a model from a 'module:QualifiedName' string, e.g. 'myapp.config:AppConfig'
+
+    Raises
+    ------
+    ValueError
+        The string isn't of the form 'module:QualifiedName'
+    ImportError
+        The module can't be imported
+    AttributeError
+        The module has no such attribute
+    """
+    module_name, sep, qualname = spec.partition(":")
+    if not (module_name and sep and qualname):
+        raise ValueError(f"Model {spec!r} is not of the form 'module:QualifiedName'")
+    value: Any = importlib.import_module(module_name)
+    for name in qualname.split("."):
+        value = getattr(value, name)
+    return value
+
+
+def read_manifest(bundle_path: PathLike) -> Dict[str, Any]:
+    """Read the manifest written next to a bundle by `write_bundle`"""
+    manifest_path = Path(bundle_path)
+    manifest_path = manifest_path.with_name(manifest_path.name + MANIFEST_SUFFIX)
+    with open(manifest_path, "rb") as fobj:
+        return json.load(fobj)
+
+
+def _dump_json(config_dict: ConfigDict) -> bytes:
+    # Not orjson, which can't write integers wider than 64 bits and writes NaN as null
+    return json.dumps(
+        config_dict, separators=(",", ":"), ensure_ascii=False, default=_json_default
+    ).encode()
+
+
+def _json_default(value: Any) -> Any:
+    # TOML and YAML config files can contain dates and times
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    # Values from expand_config(shared=True)
+    if isinstance(value, tuple):
+        return list(value)
+    if hasattr(value, "keys"):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} can't be stored in a bundle")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fobj:
+            fobj.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
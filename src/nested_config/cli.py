@@ -0,0 +1,80 @@
+"""cli.py - The nested-config command"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from nested_config.expand import ConfigExpander
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the nested-config command with the given arguments (default: sys.argv)"""
+    parser = argparse.ArgumentParser(
+        prog="nested-config", description="Tools for nested config files"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    bundle_parser = commands.add_parser(
+        "bundle",
+        help="Expand a config file into a single bundle file",
+        description=(
+            "Expand a config file and all of the config files it refers to into a single"
+            " JSON bundle file (plus a manifest of the config files that were read) that"
+            " expand_config loads with one read. Dates and times are stored in the JSON"
+            " bundle as ISO 8601 strings; a snapshot keeps them."
+        ),
+    )
+    bundle_parser.add_argument("root", help="The root config file")
+    bundle_parser.add_argument(
+        "-m",
+        "--model",
+        required=True,
+        help="The model to expand the config file with, as 'module:QualifiedName'",
+    )
+    bundle_parser.add_argument(
+        "-o", "--output", required=True, help="Where to write the JSON bundle"
+    )
+    bundle_parser.add_argument(
+        "--snapshot", help="Also write a binary snapshot here (e.g. 'config.ncsnap')"
+    )
+    bundle_parser.add_argument(
+        "--default-suffix",
+        help="Suffix whose loader to use for config files with an unknown suffix",
+    )
+    args = parser.parse_args(argv)
+    return _bundle(parser, args)
+
+
+def _bundle(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    from nested_config.bundle import import_model, write_bundle
+
+    # Import the model from the current directory like `python -m` would, since the
+    # console script's sys.path starts with the script's own directory instead
+    cwd = os.getcwd()
+    if cwd not in sys.path and "" not in sys.path:
+        sys.path.insert(0, cwd)
+    try:
+        model = import_model(args.model)
+    except (ValueError, ImportError, AttributeError) as ex:
+        parser.error(f"can't import model {args.model!r}: {ex}")
+    try:
+        result = write_bundle(
+            args.root,
+            model,
+            args.output,
+            snapshot=args.snapshot,
+            expander=ConfigExpander(default_suffix=args.default_suffix),
+        )
+    except Exception as ex:
+        cause = f" ({ex.__cause__})" if ex.__cause__ is not None else ""
+        print(f"nested-config: error: {ex}{cause}", file=sys.stderr)
+        return 1
+    print(
+        f"Wrote {result.bundle_path} from {len(result.sources)} config files"
+        f" (manifest: {result.manifest_path})"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""construct.py - Load config files directly into instances of their models (dataclasses,
+attrs classes, NamedTuples, or plain annotated classes) while they're expanded"""
+
+import functools
+import typing
+from concurrent.futures import Executor
+from pathlib import PurePath
+from typing import Any, Callable, Optional, Type, TypeVar
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.expand import ConfigExpander, ConfigExpansionError
+from nested_config.loaders import ConfigCache
+from nested_config.sources import ConfigSource
+from nested_config.trace import ExpansionObserver
+
+ModelT = TypeVar("ModelT")
+
+
+def load(
+    config_path: PathLike,
+    model: Type[ModelT],
+    *,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+) -> ModelT:
+    """Expand a config file into an instance of `model`, making each nested model instance
+    as soon as its config dict is expanded rather than returning nested config dicts. See
+    `expand_config` for the inputs.
+
+    Models are instantiated with their constructor (dataclasses, attrs classes, Pydantic
+    models, NamedTuples, and classes with their own `__init__`), with the config dict as
+    keyword arguments. Plain annotated classes without an `__init__` get the config dict
+    as their attributes. Values are passed as they are in the config files; they are not
+    validated or converted to their annotated types, and lists stay lists.
+
+    Raises
+    ------
+    nested_config.ConfigExpansionError
+        A model couldn't be instantiated from its config dict (e.g. a required field is
+        missing). See `expand_config` for other errors.
+    """
+    with _ModelBuildingExpander(
+        default_suffix=default_suffix,
+        cache=cache,
+        executor=executor,
+        source=source,
+        observer=observer,
+    ) as expander:
+        return typing.cast(ModelT, expander.expand(config_path, model))
+
+
+@functools.lru_cache(maxsize=None)
+def get_constructor(model: type) -> Callable[[ConfigDict], Any]:
+    """Get a function that makes an instance of a model from its expanded config dict"""
+    attrs_attributes = getattr(model, "__attrs_attrs__", None)
+    if attrs_attributes is not None:
+        # attrs strips leading underscores from the __init__ arguments of private fields
+        aliases = {
+            attribute.name: getattr(attribute, "alias", None)
+            or attribute.name.lstrip("_")
+            for attribute in attrs_attributes
+        }
+        if any(name != alias for name, alias in aliases.items()):
+            return lambda config_dict: model(
+                **{aliases.get(key, key): value for key, value in config_dict.items()}
+            )
+    elif model.__init__ is object.__init__ and model.__new__ is object.__new__:  # type: ignore[misc]
+        return functools.partial(_make_plain, model)
+    return lambda config_dict: model(**config_dict)
+
+
+def _make_plain(model: type, config_dict: ConfigDict) -> Any:
+    instance: Any = object.__new__(model)
+    for key, value in config_dict.items():
+        setattr(instance, key, value)
+    return instance
+
+
+class _ModelBuildingExpander(ConfigExpander):
+    """ConfigExpander that replaces the config dict of each model with an instance of the
+    model as soon as it's expanded"""
+
+    _builds_models = True
+
+    def _build_model(
+        self, model: type, config_dict: ConfigDict, config_path: PurePath
+    ) -> Any:
+        try:
+            return get_constructor(model)(config_dict)
+        except Exception as ex:
+            raise ConfigExpansionError(
+                f"Couldn't make an instance of {model} from config file '{config_path}':"
+                f" {ex}"
+            ) from ex
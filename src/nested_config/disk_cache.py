@@ -0,0 +1,191 @@
+"""disk_cache.py - Persistent on-disk cache of expanded config dicts, validated by the
+modification times and sizes (or content hashes) of every config file that was read"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import typing
+from pathlib import Path, PurePath
+from typing import List, NamedTuple, Optional, Set, Tuple
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.expand import (
+    ConfigExpander,
+    PlanKind,
+    get_expansion_plan,
+    get_model_annotations,
+)
+from nested_config.sources import FileSystemSource
+
+_FORMAT_VERSION = 1
+
+
+class FileFingerprint(NamedTuple):
+    """The state of a config file when it was read"""
+
+    path: str
+    mtime_ns: int
+    size: int
+    sha256: Optional[str]
+    """Hash of the file contents, if the DiskCache uses content hashes"""
+
+
+class DiskCache:
+    """A persistent cache of expanded config dicts in a directory.
+
+    Each entry holds an expanded config dict and a manifest of every config file that was
+    read to create it. An entry is only used if every file in its manifest still has the
+    same modification time and size. If `hash_contents` is True, a file whose modification
+    time or size has changed is also accepted if its contents have the same SHA-256 hash
+    (e.g. after a fresh checkout).
+
+    Entries are stored with pickle, so only use a cache directory that is writeable by
+    trusted users.
+    """
+
+    def __init__(self, cache_dir: PathLike, *, hash_contents: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.hash_contents = hash_contents
+        self.hits = 0
+        self.misses = 0
+
+    def expand(
+        self,
+        config_path: PathLike,
+        model: type,
+        *,
+        expander: Optional[ConfigExpander] = None,
+    ) -> ConfigDict:
+        """Get the expanded config dict for a config file from the cache if none of the
+        config files it was made from have changed. Otherwise expand it (with `expander`,
+        if provided) and store it in the cache. Only config files on the filesystem can
+        be cached."""
+        config_path = Path(config_path)
+        expander = expander or ConfigExpander()
+        if not isinstance(expander.source, FileSystemSource):
+            raise ValueError("DiskCache can only be used with a FileSystemSource")
+        entry_path = self._entry_path(config_path, model, expander.default_suffix)
+        config_dict = self._read_entry(entry_path)
+        if config_dict is not None:
+            self.hits += 1
+            return config_dict
+        self.misses += 1
+        recorder = _RecordingExpander(expander, self.hash_contents)
+        config_dict = recorder.expand(config_path, model)
+        self._write_entry(entry_path, recorder.fingerprints, config_dict)
+        return config_dict
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        for entry_path in self.cache_dir.glob("*.ncache"):
+            entry_path.unlink()
+
+    def _entry_path(
+        self, config_path: Path, model: type, default_suffix: Optional[str]
+    ) -> Path:
+        key = repr(
+            (
+                _FORMAT_VERSION,
+                str(config_path.resolve()),
+                default_suffix,
+                _model_fingerprint(model),
+            )
+        )
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.ncache"
+
+    def _read_entry(self, entry_path: Path) -> Optional[ConfigDict]:
+        try:
+            with open(entry_path, "rb") as fobj:
+                fingerprints = pickle.load(fobj)
+                if not all(self._is_unchanged(fp) for fp in fingerprints):
+                    return None
+                return pickle.load(fobj)
+        except Exception:
+            # A missing, corrupt, or incompatible entry is just a miss
+            return None
+
+    def _write_entry(
+        self,
+        entry_path: Path,
+        fingerprints: List[FileFingerprint],
+        config_dict: ConfigDict,
+    ) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fobj:
+                # The manifest is first so it can be checked without loading the config
+                pickle.dump(fingerprints, fobj, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(config_dict, fobj, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _is_unchanged(self, fingerprint: FileFingerprint) -> bool:
+        try:
+            stat = os.stat(fingerprint.path)
+        except OSError:
+            return False
+        if (stat.st_mtime_ns, stat.st_size) == (fingerprint.mtime_ns, fingerprint.size):
+            return True
+        return fingerprint.sha256 is not None and fingerprint.sha256 == _hash_file(
+            fingerprint.path
+        )
+
+
+class _RecordingExpander(ConfigExpander):
+    """ConfigExpander that records the fingerprint of every config file it loads"""
+
+    def __init__(self, expander: ConfigExpander, hash_contents: bool):
+        super().__init__(
+            default_suffix=expander.default_suffix,
+            cache=expander.cache,
+            executor=expander.executor,
+            source=expander.source,
+            observer=expander.observer,
+        )
+        self.hash_contents = hash_contents
+        self.fingerprints: List[FileFingerprint] = []
+
+    def _load(self, config_path: PurePath) -> ConfigDict:
+        path = str(Path(config_path).resolve())
+        # Stat before loading so a change made while loading invalidates the entry
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Let the loader raise the appropriate error
+            return super()._load(config_path)
+        sha256 = _hash_file(path) if self.hash_contents else None
+        self.fingerprints.append(
+            FileFingerprint(path, stat.st_mtime_ns, stat.st_size, sha256)
+        )
+        return super()._load(config_path)
+
+
+def _hash_file(path: str) -> str:
+    with open(path, "rb") as fobj:
+        return hashlib.sha256(fobj.read()).hexdigest()
+
+
+def _model_fingerprint(model: type) -> Tuple[str, ...]:
+    """Names and annotations of the model and every model nested within it, so entries
+    are not used if the models change"""
+    fingerprint = []
+    seen: Set[type] = set()
+    to_visit = [model]
+    while to_visit:
+        model = to_visit.pop()
+        if model in seen:
+            continue
+        seen.add(model)
+        fingerprint.append(
+            f"{model.__module__}.{model.__qualname__}{get_model_annotations(model)!r}"
+        )
+        for value_plan in get_expansion_plan(model).values():
+            while value_plan.item is not None:
+                value_plan = value_plan.item
+            if value_plan.kind is PlanKind.MODEL:
+                to_visit.append(typing.cast(type, value_plan.model))
+    return tuple(fingerprint)
@@ -1,25 +1,119 @@
 """expand.py - The core functionality of nested-config - expand configuration files
 with paths to other config files into a single config dict."""
 
+import copy
+import enum
 import functools
+import time
 import typing
-from pathlib import Path
-from typing import Any, Dict, Optional
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from pathlib import PurePath
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from nested_config._types import (
     UNION_TYPES,
     ConfigDict,
     PathLike,
 )
-from nested_config.loaders import load_config
+from nested_config.loaders import ConfigCache, parse_config
+from nested_config.sources import ConfigSource, FileSystemSource, PathResolver
+from nested_config.trace import EventKind, ExpansionObserver, _emit
+
+if TYPE_CHECKING:
+    from nested_config.disk_cache import DiskCache
+    from nested_config.lazy import LazyConfigDict
+    from nested_config.records import Record
 
 
+@typing.overload
 def expand_config(
     config_path: PathLike,
     model: type,
     *,
     default_suffix: Optional[str] = None,
-) -> ConfigDict:
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    lazy: Literal[False] = False,
+    disk_cache: Optional["DiskCache"] = None,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    drop_unselected: bool = False,
+    shared: bool = False,
+    records: Literal[False] = False,
+) -> ConfigDict: ...
+
+
+@typing.overload
+def expand_config(
+    config_path: PathLike,
+    model: type,
+    *,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    lazy: Literal[False] = False,
+    disk_cache: None = None,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    drop_unselected: bool = False,
+    records: Literal[True],
+) -> "Record": ...
+
+
+@typing.overload
+def expand_config(
+    config_path: PathLike,
+    model: type,
+    *,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    lazy: Literal[True],
+    disk_cache: None = None,
+) -> "LazyConfigDict": ...
+
+
+def expand_config(
+    config_path: PathLike,
+    model: type,
+    *,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    lazy: bool = False,
+    disk_cache: Optional["DiskCache"] = None,
+    include: Optional[Sequence[str]] = None,
+    exclude: Optional[Sequence[str]] = None,
+    drop_unselected: bool = False,
+    shared: bool = False,
+    records: bool = False,
+) -> Union[ConfigDict, "LazyConfigDict", "Record"]:
     """Expand a configuration file into a single configuration dict by loading the
     configuration file with a loader (according to its file extension) and using the
     attribute annotations of a class to determine if any string values in the
@@ -37,6 +131,53 @@ def expand_config(
     default_suffix
         The file extension or suffix to assume if a config file's suffix is not in
         `nested_config.config_dict_loaders`.
+    cache
+        A `nested_config.ConfigCache` from which to serve config files that haven't
+        changed since they were last loaded.
+    executor
+        A `concurrent.futures.Executor` with which to load sibling sub-config files (paths
+        in a list or dict of models) concurrently.
+    source
+        A `nested_config.sources.ConfigSource` from which to load `config_path` and the
+        config files it refers to, e.g. a `MappingSource` of in-memory config files. The
+        default is the filesystem.
+    observer
+        A function to call with a `nested_config.trace.ExpansionEvent` for each step of
+        expansion (resolving, reading, parsing, and expanding each config file), e.g. a
+        `nested_config.trace.TraceCollector`
+    lazy
+        If True, return a `nested_config.lazy.LazyConfigDict` in which sub-config files
+        are only loaded when the values that refer to them are first accessed. Call its
+        `resolve_all()` method to get the fully-expanded config dict. Errors in
+        sub-config files are raised when they are loaded.
+    disk_cache
+        A `nested_config.disk_cache.DiskCache` from which to get the expanded config dict
+        if none of the config files it was expanded from have changed since it was stored.
+        Can't be used with `lazy`.
+    include
+        Field-path patterns of the values to expand, e.g. `["houses.*.dimensions",
+        "garage"]`. Field names are separated by '.', and '*' matches any field, list
+        index, or dict key. Everything inside a matching value is expanded. Values that
+        don't match (and aren't on the way to a match) are left as they are in the config
+        file, so paths to sub-config files stay strings. The default is to expand
+        everything.
+    exclude
+        Field-path patterns of values not to expand, even if they are in an `include`
+        pattern
+    drop_unselected
+        If True, leave out values that are not selected by `include` and `exclude` rather
+        than leaving them unexpanded
+    shared
+        If True, expand each config file once per model and share that one expanded
+        config dict everywhere the file is referred to. To make sharing safe, the result
+        is read-only: every dict is a `types.MappingProxyType` and every list a tuple.
+        Can't be used with `lazy` or `disk_cache`.
+    records
+        If True, return records rather than dicts for the config dict of every model (see
+        `nested_config.records`). A record has a slot for each field of its model, so it
+        takes much less memory than a dict, and its values are attributes. Its
+        `to_dict()` method returns the config dict that would have been returned
+        otherwise. Can't be used with `lazy`, `disk_cache`, or `shared`.
 
     Raises
     ------
@@ -50,10 +191,135 @@ def expand_config(
         There was a problem loading the file with the loader (this wraps whatever
         exception is thrown from the loader)
     nested_config.ConfigExpansionError
-        A config file contains a field that is not in the model
+        A config file contains a field that is not in the model, or an `include` or
+        `exclude` pattern doesn't match any field of the model
+    """
+    expander = ConfigExpander(
+        default_suffix=default_suffix,
+        cache=cache,
+        executor=executor,
+        source=source,
+        observer=observer,
+        shared=shared,
+        records=records,
+    )
+    if (lazy or disk_cache is not None) and (include or exclude or shared or records):
+        raise ValueError(
+            "include, exclude, shared, and records cannot be used with lazy or disk_cache"
+        )
+    if lazy:
+        if disk_cache is not None:
+            raise ValueError("lazy and disk_cache cannot be used together")
+        return expander.expand_lazy(config_path, model)
+    if disk_cache is not None:
+        return disk_cache.expand(config_path, model, expander=expander)
+    return expander.expand(
+        config_path,
+        model,
+        include=include,
+        exclude=exclude,
+        drop_unselected=drop_unselected,
+    )
+
+
+def expand_config_data(
+    data: Union[bytes, str, ConfigDict],
+    model: type,
+    *,
+    suffix: Optional[str] = None,
+    config_path: PathLike = "<config data>",
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    shared: bool = False,
+    records: bool = False,
+) -> ConfigDict:
+    """Expand config data that is already in memory rather than in a config file. See
+    `expand_config` for the inputs not listed here.
+
+    Inputs
+    ------
+    data
+        An unexpanded config dict, or the contents of a config file
+    suffix
+        The suffix (extension) to use to get the parser for `data` if it's bytes or str,
+        e.g. '.toml'
+    config_path
+        Where the config data would be if it were a config file. Relative paths to
+        sub-config files are relative to its parent directory. The default is an imaginary
+        file in the current directory (or the root of `source`).
     """
-    expander = ConfigExpander(default_suffix=default_suffix)
-    return expander.expand(config_path, model)
+    expander = ConfigExpander(
+        default_suffix=default_suffix,
+        cache=cache,
+        executor=executor,
+        source=source,
+        observer=observer,
+        shared=shared,
+        records=records,
+    )
+    if not isinstance(data, dict):
+        data = parse_config(data, suffix or "", default_suffix, observer=observer)
+    return expander.expand_data(data, model, config_path)
+
+
+def iter_expand(
+    config_path: PathLike,
+    model: type,
+    field: str,
+    *,
+    chunk_size: Optional[int] = None,
+    read_ahead: int = 0,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    executor: Optional[Executor] = None,
+    source: Optional[ConfigSource] = None,
+    observer: Optional[ExpansionObserver] = None,
+    shared: bool = False,
+    records: bool = False,
+) -> Iterator[Any]:
+    """Expand the items of a list field of a config file one at a time, so that each can
+    be processed and discarded without holding the whole expanded list in memory. See
+    `expand_config` for the inputs not listed here.
+
+    Inputs
+    ------
+    field
+        The name of a list field of `model`, e.g. a `List[SubModel]` whose items are paths
+        to sub-config files
+    chunk_size
+        If provided, yield lists of up to this many expanded items rather than single
+        items
+    read_ahead
+        How many of the following items' sub-config files to load in advance, in worker
+        threads (or with `executor`, if provided), while the current item is processed
+
+    Yields
+    ------
+    Any
+        The expanded items (or lists of them), in order
+
+    Raises
+    ------
+    nested_config.ConfigExpansionError
+        `field` isn't a field of `model` or its value isn't a list. See `expand_config`
+        for other errors, which are raised when the item they're in is reached.
+    """
+    with ConfigExpander(
+        default_suffix=default_suffix,
+        cache=cache,
+        executor=executor,
+        max_workers=read_ahead if executor is None and read_ahead > 0 else None,
+        source=source,
+        observer=observer,
+        shared=shared,
+        records=records,
+    ) as expander:
+        yield from expander.iter_expand(
+            config_path, model, field, chunk_size=chunk_size, read_ahead=read_ahead
+        )
 
 
 class ConfigExpansionError(RuntimeError):
@@ -99,97 +365,904 @@ def is_model(val: Any) -> bool:
     return hasattr(val, "__dict__") and "__annotations__" in val.__dict__
 
 
+class PlanKind(enum.Enum):
+    """How a config value is expanded, according to its model field annotation"""
+
+    SCALAR = enum.auto()
+    """Use the config value as-is"""
+    MODEL = enum.auto()
+    """A nested model - a config dict to expand or a path to a config file to load"""
+    LIST = enum.auto()
+    """A list whose items may contain nested models"""
+    DICT = enum.auto()
+    """A dict whose values may contain nested models"""
+
+
+class ValuePlan(NamedTuple):
+    """The compiled form of a field annotation, used by ConfigExpander to expand a config
+    value without inspecting the annotation again"""
+
+    kind: PlanKind
+    model: Optional[type] = None
+    """The nested model, for MODEL plans"""
+    item: Optional["ValuePlan"] = None
+    """The plan for each item, for LIST and DICT plans"""
+
+
+ExpansionPlan = Dict[str, ValuePlan]
+"""Mapping of model field name to the ValuePlan for that field"""
+
+_SCALAR_PLAN = ValuePlan(PlanKind.SCALAR)
+
+
+def compile_value_plan(annotation: Any) -> ValuePlan:
+    """Compile a field annotation into a ValuePlan. Lists and dicts that cannot contain
+    nested models are compiled to SCALAR plans since they never need expanding."""
+    # If the annotation is optional, get the enclosed annotation
+    annotation = _get_optional_ann(annotation)
+    if is_model(annotation):
+        return ValuePlan(PlanKind.MODEL, model=annotation)
+    if listval_annotation := _get_list_value_ann(annotation):
+        item_plan = compile_value_plan(listval_annotation)
+        if item_plan.kind is not PlanKind.SCALAR:
+            return ValuePlan(PlanKind.LIST, item=item_plan)
+    elif dictval_annotation := _get_dict_value_ann(annotation):
+        item_plan = compile_value_plan(dictval_annotation)
+        if item_plan.kind is not PlanKind.SCALAR:
+            return ValuePlan(PlanKind.DICT, item=item_plan)
+    return _SCALAR_PLAN
+
+
+@functools.lru_cache
+def get_expansion_plan(model: type) -> ExpansionPlan:
+    """Get the compiled expansion plan for a model: a ValuePlan for each of the model's
+    fields. Nested models are referenced by MODEL plans and compiled on first use, so
+    self-referencing models are fine."""
+    return {
+        field_name: compile_value_plan(annotation)
+        for field_name, annotation in get_model_annotations(model).items()
+    }
+
+
+def _get_field_plan(plan: ExpansionPlan, model: type, field_name: str) -> ValuePlan:
+    """Get a field's ValuePlan, raising ConfigExpansionError if the model has no such
+    field"""
+    try:
+        return plan[field_name]
+    except KeyError:
+        raise ConfigExpansionError(
+            f"Model type {model} does not have a field named {field_name}"
+        ) from None
+
+
+_FileNode = Tuple[PurePath, type]
+"""A config file and the model it is expanded according to"""
+
+_FileKey = Tuple[Hashable, type]
+"""The id of a config file (from PathResolver.file_id) and its model"""
+
+
 class ConfigExpander:
     """ConfigExpander does all the work of this package. The only state it holds is
-    default_suffix.
+    default_suffix, the ConfigSource to load config files from, an optional ConfigCache,
+    an optional Executor, an optional observer of expansion events, whether to share
+    expanded config files, and whether to make records rather than dicts.
+
+    If the ConfigExpander has an executor, sibling sub-config files (paths in a list or
+    dict of models) are read and parsed concurrently with that executor. The output and
+    any errors raised are the same as when loading them one at a time. A ConfigExpander
+    created with `max_workers` owns its executor and should be closed with `close()` or
+    used as a context manager.
+
+    The state of each expansion is local to it, so a ConfigExpander can be shared between
+    threads. See `nested_config.SingleFlightConfigExpander` to also load a config file
+    once when several threads need it at the same time.
     """
 
-    def __init__(self, *, default_suffix: Optional[str] = None):
+    _dedupe_files = True
+    """Expand each config file once per model in an expansion (as identified by
+    PathResolver.file_id), and copy it for every other path that refers to it"""
+
+    _builds_models = False
+    """Replace the config dict of each model with the result of `_build_model` once it's
+    expanded"""
+
+    def __init__(
+        self,
+        *,
+        default_suffix: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        source: Optional[ConfigSource] = None,
+        observer: Optional[ExpansionObserver] = None,
+        shared: bool = False,
+        records: bool = False,
+    ):
         """Create the ConfigExpander, optionally with a default suffix to use to get a
         loader if a config file has no suffix or its suffix isn't in
-        config_dict_loaders"""
+        config_dict_loaders, optionally with a ConfigCache to serve unchanged config
+        files from memory, optionally with an executor (or a number of worker threads
+        for a new ThreadPoolExecutor) to load sibling config files concurrently,
+        optionally with a ConfigSource other than the filesystem, optionally with an
+        observer to call with an ExpansionEvent for each step of expansion,
+        optionally sharing one read-only expanded config dict for each config file, and
+        optionally making records rather than dicts for models (see `expand_config`)"""
+        if shared and records:
+            raise ValueError("shared and records cannot be used together")
         self.default_suffix = default_suffix
+        self.shared = shared
+        self.records = records
+        self._new_record: Optional[Callable[[type, ConfigDict], Any]] = None
+        if records:
+            from nested_config.records import new_record
+
+            self._new_record = new_record
+        self.source = source or FileSystemSource()
+        self.observer = observer
+        self.cache = cache
+        self._owns_executor = executor is None and max_workers is not None
+        if self._owns_executor:
+            executor = ThreadPoolExecutor(max_workers, thread_name_prefix="nested_config")
+        self.executor = executor
+
+    def close(self) -> None:
+        """Shut down the executor if it was created by this ConfigExpander"""
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
 
-    def expand(self, config_path: PathLike, model: type) -> ConfigDict:
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def expand(
+        self,
+        config_path: PathLike,
+        model: type,
+        *,
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        drop_unselected: bool = False,
+    ) -> ConfigDict:
         """Load a config file into a config dict and expand any paths to config files into
-        dictionaries to include in the output config dict"""
-        config_path = Path(config_path)
-        config_dict = load_config(config_path, self.default_suffix)
-        return self._preparse_config_dict(config_dict, model, config_path)
+        dictionaries to include in the output config dict. If `include` or `exclude`
+        field-path patterns are given, only the selected values are expanded (see
+        `expand_config`)."""
+        selection = _get_selection(model, include, exclude, drop_unselected)
+        path = self.source.make_path(config_path)
+        expanded = self._lookup_expanded(path, model, None)
+        if expanded is not None:
+            return expanded
+        start = time.perf_counter()
+        result: List[ConfigDict] = [{}]
+        expansion = _Expansion(self.source.resolver())
+        root = self._file_frame(
+            self._load(path),
+            path,
+            model,
+            None,
+            (result, 0),
+            start,
+            expansion,
+            (expansion.resolver.file_id(path), model),
+            selection,
+        )
+        if root is not None:
+            self._run(root, expansion)
+        return result[0]
 
-    def _preparse_config_dict(
-        self, config_dict: ConfigDict, model: type, config_path: Path
-    ):
-        return {
-            key: self._preparse_config_value(
-                value, get_modelfield_annotation(model, key), config_path
-            )
-            for key, value in config_dict.items()
-        }
+    def expand_data(
+        self, config_dict: ConfigDict, model: type, config_path: PathLike
+    ) -> ConfigDict:
+        """Expand an unexpanded config dict that is already in memory as if it had been
+        loaded from `config_path`"""
+        out: Any = {} if self._new_record is None else self._new_record(model, {})
+        result = [out]
+        path = self.source.make_path(config_path)
+        root = _Frame(
+            config_dict.items(),
+            out,
+            path,
+            None,
+            model=model,
+            slot=(result, 0) if self._builds_models else None,
+        )
+        self._run(root, _Expansion(self.source.resolver()))
+        return _freeze(result[0]) if self.shared else result[0]
 
-    def _preparse_config_value(
-        self, field_value: str, field_annotation: Any, config_path: Path
-    ):
-        """Check if a model field contains a path to another model and parse it
-        accordingly"""
-        # If the annotation is optional, get the enclosed annotation
-        field_annotation = _get_optional_ann(field_annotation)
-        # ###
-        # N cases:
-        # 1. Config value is not a string, list, or dict
-        # 2. Config value is a dict, model expects a model
-        # 3. Config value is a string, model expects a model
-        # 4. Config value is a list, model expects a list of some type
-        # 5. Config value is a dict, model expects a dict with values of some type
-        # 6. A string, list, or dict that doesn't match cases 2-5
-        # ###
-
-        # 1.
-        if not isinstance(field_value, (str, list, dict)):
-            return field_value
-        # 2.
-        if isinstance(field_value, dict) and is_model(field_annotation):
-            return self._preparse_config_dict(field_value, field_annotation, config_path)
-        # 3.
-        if isinstance(field_value, str) and is_model(field_annotation):
-            return self._expand_path_str_into_model(
-                field_value, field_annotation, config_path
+    def iter_expand(
+        self,
+        config_path: PathLike,
+        model: type,
+        field: str,
+        *,
+        chunk_size: Optional[int] = None,
+        read_ahead: int = 0,
+    ) -> Iterator[Any]:
+        """Expand the items of the list in `field` of a config file one at a time (or in
+        lists of `chunk_size`), loading the sub-config files of up to `read_ahead` of the
+        following items in advance if the ConfigExpander has an executor. See
+        `iter_expand`."""
+        path = self.source.make_path(config_path)
+        config_dict = self._load(path)
+        value_plan = _get_field_plan(get_expansion_plan(model), model, field)
+        items = config_dict.get(field)
+        if items is None:
+            return
+        if not isinstance(items, list):
+            raise ConfigExpansionError(
+                f"Field {field} of config file '{path}' is not a list"
             )
-        # 4.
-        if isinstance(field_value, list) and (
-            listval_annotation := _get_list_value_ann(field_annotation)
-        ):
-            return [
-                self._preparse_config_value(li, listval_annotation, config_path)
-                for li in field_value
-            ]
-        # 5.
-        if isinstance(field_value, dict) and (
-            dictval_annotation := _get_dict_value_ann(field_annotation)
-        ):
-            return {
-                key: self._preparse_config_value(value, dictval_annotation, config_path)
-                for key, value in field_value.items()
+        item_plan = value_plan.item if value_plan.kind is PlanKind.LIST else None
+        item_plan = item_plan or _SCALAR_PLAN
+        expansion = _Expansion(self.source.resolver())
+        file_key = (expansion.resolver.file_id(path), model)
+        # The frame of the config file, which each item's frame refers to as its parent
+        parent = _Frame(
+            (),
+            config_dict,
+            path,
+            None,
+            model=model,
+            node=(path, model),
+            file_key=file_key,
+        )
+        expansion.active.add(file_key)
+        prefetch = self.executor is not None and item_plan.kind is PlanKind.MODEL
+        futures: Dict[int, Future] = {}
+        next_index = 0
+        chunk: List[Any] = []
+        try:
+            for index, item in enumerate(items):
+                while (
+                    prefetch
+                    and next_index < len(items)
+                    and next_index <= index + read_ahead
+                ):
+                    if isinstance(items[next_index], str):
+                        futures[next_index] = typing.cast(Executor, self.executor).submit(
+                            self._load_path_str,
+                            items[next_index],
+                            path,
+                            expansion.resolver,
+                        )
+                    next_index += 1
+                out: List[Any] = [None]
+                frame = _Frame(((0, item),), out, path, parent, item_plan=item_plan)
+                if index in futures:
+                    frame.futures = {0: futures.pop(index)}
+                self._run(frame, expansion)
+                # Only remember config files for reuse within one item
+                expansion.expanded.clear()
+                expanded = _freeze(out[0]) if self.shared else out[0]
+                if chunk_size is None:
+                    yield expanded
+                    continue
+                chunk.append(expanded)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+    def expand_lazy(self, config_path: PathLike, model: type) -> "LazyConfigDict":
+        """Load a config file into a LazyConfigDict, in which paths to config files are
+        only loaded and expanded when they are first accessed"""
+        from nested_config.lazy import expand_lazy
+
+        return expand_lazy(self, self.source.make_path(config_path), model)
+
+    def _load(self, config_path: PurePath) -> ConfigDict:
+        """Load a single config file into a config dict"""
+        return self.source.load(
+            config_path, self.default_suffix, self.cache, self.observer
+        )
+
+    def _run(self, root: "_Frame", expansion: "_Expansion") -> None:
+        """The expansion engine. Rather than recursing into each nested config dict,
+        list, and sub-config file, this works through a stack of _Frames, each of which
+        is a container whose values are being expanded. When a value needs expanding, a
+        frame for it is pushed and the parent frame resumes when that frame is done, so
+        the output (and the first error raised) is the same as a depth-first recursive
+        expansion. Config dicts with nothing to expand are copied without a frame."""
+        new_record = self._new_record
+        builds = self._builds_models
+        stack = [root]
+        try:
+            while stack:
+                frame = stack[-1]
+                out = frame.out
+                plan = frame.plan
+                item_plan = frame.item_plan
+                selection = frame.selection
+                key: Any
+                sub_out: Any
+                for key, value in frame.items:
+                    child_selection = None
+                    if selection is not None:
+                        child_selection = selection.child(key)
+                        if child_selection is _UNSELECTED:
+                            if not selection.drop:
+                                out[key] = value
+                            elif isinstance(out, list):
+                                out[key] = _DROPPED
+                            continue
+                    if item_plan is not None:
+                        value_plan = item_plan
+                    else:
+                        value_plan = plan.get(key) or _get_field_plan(
+                            plan, typing.cast(type, frame.model), key
+                        )
+                    # ###
+                    # N cases:
+                    # 1. Value plan is SCALAR (the annotation can't contain a model)
+                    # 2. Config value is a dict, model expects a model
+                    # 3. Config value is a string, model expects a model
+                    # 4. Config value is a list, model expects a list of some type
+                    # 5. Config value is a dict, model expects a dict of some type
+                    # 6. A value that doesn't match cases 2-5
+                    # ###
+                    kind = value_plan.kind
+                    # 1.
+                    if kind is PlanKind.SCALAR:
+                        out[key] = value
+                        continue
+                    if kind is PlanKind.MODEL:
+                        model = typing.cast(type, value_plan.model)
+                        # 2.
+                        if isinstance(value, dict):
+                            if child_selection is None and (
+                                value.keys() <= _get_scalar_fields(model)
+                            ):
+                                if builds:
+                                    out[key] = self._build_model(
+                                        model, value, frame.config_path
+                                    )
+                                elif new_record is None:
+                                    out[key] = dict(value)
+                                else:
+                                    out[key] = new_record(model, value)
+                                continue
+                            out[key] = sub_out = (
+                                {} if new_record is None else new_record(model, {})
+                            )
+                            stack.append(
+                                _Frame(
+                                    value.items(),
+                                    sub_out,
+                                    frame.config_path,
+                                    frame,
+                                    model=model,
+                                    slot=(out, key) if builds else None,
+                                    selection=child_selection,
+                                )
+                            )
+                            break
+                        # 3.
+                        if isinstance(value, str):
+                            child = self._enter_file(
+                                frame, key, value, model, expansion, child_selection
+                            )
+                            if child is None:
+                                continue
+                            stack.append(child)
+                            break
+                    # 4.
+                    if kind is PlanKind.LIST and isinstance(value, list):
+                        if not value:
+                            out[key] = []
+                            continue
+                        out[key] = sub_out = [None] * len(value)
+                        stack.append(
+                            self._container_frame(
+                                enumerate(value),
+                                sub_out,
+                                frame,
+                                value,
+                                value_plan,
+                                expansion,
+                                child_selection,
+                            )
+                        )
+                        break
+                    # 5.
+                    if kind is PlanKind.DICT and isinstance(value, dict):
+                        if not value:
+                            out[key] = {}
+                            continue
+                        out[key] = sub_out = {}
+                        stack.append(
+                            self._container_frame(
+                                value.items(),
+                                sub_out,
+                                frame,
+                                value,
+                                value_plan,
+                                expansion,
+                                child_selection,
+                            )
+                        )
+                        break
+                    # 6.
+                    out[key] = value
+                else:
+                    stack.pop()
+                    if selection is not None and isinstance(out, list):
+                        out[:] = [value for value in out if value is not _DROPPED]
+                    if frame.file_key is not None:
+                        self._exit_file(frame, expansion)
+                    elif frame.slot is not None:
+                        # A config dict of a model within a config file
+                        model_out, key = frame.slot
+                        model_out[key] = self._build_model(
+                            typing.cast(type, frame.model), out, frame.config_path
+                        )
+        finally:
+            for frame in stack:
+                for future in (frame.futures or {}).values():
+                    future.cancel()
+
+    def _container_frame(
+        self,
+        items: Iterable[Tuple[Any, Any]],
+        out: Any,
+        parent: "_Frame",
+        values: Union[List[Any], Dict[str, Any]],
+        value_plan: ValuePlan,
+        expansion: "_Expansion",
+        selection: Optional["_Selection"],
+    ) -> "_Frame":
+        """Make the frame for a list or dict of values. If they should be models and the
+        ConfigExpander has an executor, start loading all the sub-config files they refer
+        to now; they are still expanded in order when the frame reaches them."""
+        item_plan = typing.cast(ValuePlan, value_plan.item)
+        frame = _Frame(
+            items,
+            out,
+            parent.config_path,
+            parent,
+            item_plan=item_plan,
+            selection=selection,
+        )
+        if self.executor is not None and item_plan.kind is PlanKind.MODEL:
+            pairs = enumerate(values) if isinstance(values, list) else values.items()
+            frame.futures = {
+                key: self.executor.submit(
+                    self._load_path_str, value, parent.config_path, expansion.resolver
+                )
+                for key, value in pairs
+                if isinstance(value, str)
+                and (selection is None or selection.child(key) is not _UNSELECTED)
             }
-        # 6.
-        return field_value
+        return frame
 
-    def _expand_path_str_into_model(
-        self, path_str: str, model: type, parent_path: Path
-    ) -> ConfigDict:
-        """Convert a path string to a path (possibly relative to a parent config path) and
-        use expand() to load that config file, possibly expanding further sub-config
-        files based on the model type."""
-        path = Path(path_str)
-        if not path.is_absolute():
-            # Assume it's relative to the parent config path
-            path = parent_path.parent / path
-        if not path.is_file():
-            raise FileNotFoundError(
-                f"Config file '{parent_path}' contains a path to another config file"
-                f" '{path_str}' that could not be found."
+    def _enter_file(
+        self,
+        frame: "_Frame",
+        key: Any,
+        path_str: str,
+        model: type,
+        expansion: "_Expansion",
+        selection: Optional["_Selection"],
+    ) -> Optional["_Frame"]:
+        """Resolve and load the sub-config file at `path_str`, which should be expanded
+        into `model` and stored at `frame.out[key]`, and return its frame. If the file
+        doesn't need a frame (it's already expanded, in this expansion or by a subclass,
+        or has nothing to expand), it's stored and None is returned instead.
+
+        Raises
+        ------
+        ConfigExpansionError
+            The sub-config file (with this model) is already being expanded, i.e. it
+            refers to itself through a cycle of config files
+        """
+        start = time.perf_counter()
+        future = frame.futures.pop(key, None) if frame.futures else None
+        config_dict = None
+        if future is not None:
+            path, config_dict = future.result()
+        else:
+            path = self._resolve(path_str, frame.config_path, expansion.resolver)
+        expanded = self._lookup_expanded(path, model, frame.node)
+        if expanded is not None:
+            frame.out[key] = expanded
+            return None
+        file_key = (expansion.resolver.file_id(path), model)
+        if file_key in expansion.active:
+            raise ConfigExpansionError(
+                f"Config file '{path}' refers to itself through a cycle of config files:"
+                f" {' -> '.join(_cycle(frame, path, file_key))}"
             )
-        return self.expand(path, model)
+        if self._dedupe_files:
+            expanded = expansion.expanded.get((file_key, selection))
+            if expanded is not None:
+                frame.out[key] = self._store_expanded(
+                    path,
+                    model,
+                    frame.node,
+                    expanded if self.shared else copy.deepcopy(expanded),
+                )
+                return None
+        if config_dict is None:
+            config_dict = self._load(path)
+        return self._file_frame(
+            config_dict,
+            path,
+            model,
+            frame,
+            (frame.out, key),
+            start,
+            expansion,
+            file_key,
+            selection,
+        )
+
+    def _file_frame(
+        self,
+        config_dict: ConfigDict,
+        path: PurePath,
+        model: type,
+        parent: Optional["_Frame"],
+        slot: Tuple[Any, Any],
+        start: float,
+        expansion: "_Expansion",
+        file_key: _FileKey,
+        selection: Optional["_Selection"],
+    ) -> Optional["_Frame"]:
+        """Make the frame for a loaded config file, or if there's nothing in it to expand,
+        store it in `slot` now and return None"""
+        # Nothing to expand, so the config dict is the output as it is
+        is_leaf = selection is None and config_dict.keys() <= _get_scalar_fields(model)
+        if self._new_record is not None:
+            out = self._new_record(model, config_dict if is_leaf else {})
+        else:
+            out = dict(config_dict) if is_leaf else {}
+        frame = _Frame(
+            config_dict.items(),
+            out,
+            path,
+            parent,
+            model=model,
+            node=(path, model),
+            slot=slot,
+            start=start,
+            file_key=file_key,
+            selection=selection,
+        )
+        if is_leaf:
+            self._exit_file(frame, expansion)
+            return None
+        expansion.active.add(file_key)
+        return frame
+
+    def _exit_file(self, frame: "_Frame", expansion: "_Expansion") -> None:
+        """Store the expanded config dict of a config file in its slot"""
+        path, model = typing.cast(_FileNode, frame.node)
+        file_key = typing.cast(_FileKey, frame.file_key)
+        expansion.active.discard(file_key)
+        expanded = _freeze(frame.out) if self.shared else frame.out
+        if self._builds_models:
+            expanded = self._build_model(model, expanded, path)
+        if self._dedupe_files:
+            expansion.expanded[file_key, frame.selection] = expanded
+        parent_node = frame.parent.node if frame.parent is not None else None
+        out, key = typing.cast(Tuple[Any, Any], frame.slot)
+        out[key] = self._store_expanded(path, model, parent_node, expanded)
+        if self.observer is not None:
+            _emit(self.observer, EventKind.EXPAND, path, frame.start, model=model)
+
+    def _lookup_expanded(
+        self, path: PurePath, model: type, parent: Optional[_FileNode]
+    ) -> Any:
+        """Hook for subclasses: return an already-expanded version of the config file at
+        `path` expanded according to `model` (referred to from the `parent` config file,
+        or None for the root config file), or None to expand it"""
+        return None
+
+    def _store_expanded(
+        self,
+        path: PurePath,
+        model: type,
+        parent: Optional[_FileNode],
+        expanded: ConfigDict,
+    ) -> Any:
+        """Hook for subclasses: called with each config file once it's expanded. Returns
+        what to put in the parent config dict (or return from expand())."""
+        return expanded
+
+    def _build_model(self, model: type, config_dict: ConfigDict, config_path: PurePath):
+        """Hook for subclasses that set `_builds_models`: called with the expanded config
+        dict of each model (from the config file at `config_path`) to get what to put in
+        its place"""
+        return config_dict
+
+    def _load_path_str(
+        self,
+        path_str: str,
+        parent_path: PurePath,
+        resolver: Optional[PathResolver] = None,
+    ) -> Tuple[PurePath, ConfigDict]:
+        """Resolve a path string and load (but don't expand) that config file"""
+        path = self._resolve(path_str, parent_path, resolver)
+        return path, self._load(path)
+
+    def _resolve(
+        self,
+        path_str: str,
+        parent_path: PurePath,
+        resolver: Optional[PathResolver] = None,
+    ) -> PurePath:
+        """Resolve a path string found in the config file at parent_path with the
+        expansion's resolver, if provided, or else the source"""
+        start = time.perf_counter()
+        if resolver is not None:
+            path = resolver.resolve(path_str, parent_path)
+        else:
+            path = self.source.resolve(path_str, parent_path)
+        if self.observer is not None:
+            _emit(self.observer, EventKind.RESOLVE, path, start)
+        return path
+
+
+class _Expansion:
+    """The state of one expansion: the PathResolver, the expanded config dict of each
+    config file and model, and the config files being expanded"""
+
+    __slots__ = ("resolver", "expanded", "active")
+
+    def __init__(self, resolver: PathResolver):
+        self.resolver = resolver
+        self.expanded: Dict[Tuple[_FileKey, Optional[_Selection]], ConfigDict] = {}
+        self.active: Set[_FileKey] = set()
+
+
+class _Frame:
+    """A config dict, list, or dict of values being expanded by ConfigExpander._run"""
+
+    __slots__ = (
+        "items",
+        "out",
+        "config_path",
+        "parent",
+        "model",
+        "plan",
+        "item_plan",
+        "node",
+        "slot",
+        "file_key",
+        "selection",
+        "start",
+        "futures",
+    )
+
+    def __init__(
+        self,
+        items: Iterable[Tuple[Any, Any]],
+        out: Any,
+        config_path: PurePath,
+        parent: Optional["_Frame"],
+        *,
+        model: Optional[type] = None,
+        item_plan: Optional[ValuePlan] = None,
+        node: Optional[_FileNode] = None,
+        slot: Optional[Tuple[Any, Any]] = None,
+        file_key: Optional[_FileKey] = None,
+        selection: Optional["_Selection"] = None,
+        start: float = 0.0,
+    ):
+        self.items = iter(items)
+        """(key, value) of each value still to be expanded"""
+        self.out = out
+        """The expanded container, filled in as items are expanded"""
+        self.config_path = config_path
+        """The config file this container is from"""
+        self.parent = parent
+        """The frame of the container this container is in"""
+        self.model = model
+        """For a config dict, the model it is expanded according to"""
+        self.plan = get_expansion_plan(model) if model is not None else {}
+        self.item_plan = item_plan
+        """For a list or dict of values, the ValuePlan for every value"""
+        self.node: Optional[_FileNode] = (
+            node if node is not None or parent is None else parent.node
+        )
+        """The config file and model this container is part of (None for config data)"""
+        self.slot = slot
+        """For the top frame of a config file (or, if the ConfigExpander builds models,
+        any config dict of a model), the (container, key) to put its expanded config dict
+        in once it's done"""
+        self.file_key = file_key
+        """For the top frame of a config file, its _FileKey"""
+        self.selection = selection
+        """Which of the values to expand, if not all of them"""
+        self.start = start
+        self.futures: Optional[Dict[Any, Future]] = None
+        """Loads of sub-config files in progress, by key"""
+
+
+@functools.lru_cache
+def _get_scalar_fields(model: type) -> FrozenSet[str]:
+    """The fields of a model that never need expanding. A config dict with only these
+    keys can be copied as is."""
+    plan = get_expansion_plan(model)
+    return frozenset(key for key, plan in plan.items() if plan.kind is PlanKind.SCALAR)
+
+
+class _Selection:
+    """Which values in a config dict, list, or dict of values to expand, compiled from
+    include and exclude field-path patterns. `child(key)` gives the selection for a
+    value: None to expand all of it, _UNSELECTED to leave it as-is (or drop it), or
+    another _Selection for a value with only some values selected. Selections are
+    interned, and `child` remembers its results, so each is computed once."""
+
+    __slots__ = ("included", "patterns", "drop", "_interned", "_names", "_children")
+
+    def __init__(
+        self,
+        included: bool,
+        patterns: Tuple[Tuple[Tuple[str, ...], bool], ...],
+        drop: bool,
+        interned: Dict[Any, "_Selection"],
+    ):
+        self.included = included
+        """Whether this value is selected (it matches or is inside an include pattern)"""
+        self.patterns = patterns
+        """The rest of each pattern that may select or exclude values inside this one, as
+        (field names, is_include)"""
+        self.drop = drop
+        self._interned = interned
+        self._names = frozenset(names[0] for names, _ in patterns if names[0] != "*")
+        """The field names in the patterns. All other keys have the same child."""
+        self._children: Dict[Optional[str], Any] = {}
+        """The child of each of `_names`, and of all other keys (None), so that this
+        doesn't grow with every key and list index of the config dicts expanded"""
+
+    def child(self, key: Any) -> Any:
+        field_name = str(key)
+        memo_key = field_name if field_name in self._names else None
+        try:
+            return self._children[memo_key]
+        except KeyError:
+            pass
+        included = self.included
+        patterns = []
+        for names, is_include in self.patterns:
+            if names[0] != "*" and names[0] != field_name:
+                continue
+            if len(names) > 1:
+                patterns.append((names[1:], is_include))
+            elif is_include:
+                included = True
+            else:
+                self._children[memo_key] = _UNSELECTED
+                return _UNSELECTED
+        child = _make_selection(included, tuple(patterns), self.drop, self._interned)
+        # setdefault so that threads sharing the selection all get the same child
+        return self._children.setdefault(memo_key, child)
+
+
+_UNSELECTED = object()
+"""The _Selection of a value that isn't expanded"""
+
+_DROPPED = object()
+"""Placeholder for a dropped list item"""
+
+
+def _make_selection(
+    included: bool,
+    patterns: Tuple[Tuple[Tuple[str, ...], bool], ...],
+    drop: bool,
+    interned: Dict[Any, _Selection],
+) -> Any:
+    if included and not patterns:
+        return None
+    if not included and not any(is_include for _, is_include in patterns):
+        return _UNSELECTED
+    try:
+        return interned[included, patterns]
+    except KeyError:
+        selection = _Selection(included, patterns, drop, interned)
+        return interned.setdefault((included, patterns), selection)
+
+
+def _get_selection(
+    model: type,
+    include: Optional[Sequence[str]],
+    exclude: Optional[Sequence[str]],
+    drop: bool,
+) -> Optional[_Selection]:
+    """The selection of a root config dict for `model` from include and exclude
+    patterns, or None if there are no patterns"""
+    if not include and not exclude:
+        return None
+    return _compile_selection(model, tuple(include or ()), tuple(exclude or ()), drop)
+
+
+@functools.lru_cache
+def _compile_selection(
+    model: type, include: Tuple[str, ...], exclude: Tuple[str, ...], drop: bool
+) -> _Selection:
+    patterns = tuple(
+        (_check_pattern(model, pattern), is_include)
+        for patterns, is_include in ((include, True), (exclude, False))
+        for pattern in patterns
+    )
+    return _Selection(not include, patterns, drop, {})
+
+
+def _check_pattern(model: type, pattern: str) -> Tuple[str, ...]:
+    """Split a field-path pattern into field names, checking that it matches some value
+    of the model
+
+    Raises
+    ------
+    ConfigExpansionError
+        The pattern doesn't match any field of the model (or its nested models, lists, and
+        dicts), e.g. it has a field name where a list index or `*` should be
+    """
+    names = tuple(pattern.split("."))
+    value_plans = [ValuePlan(PlanKind.MODEL, model=model)]
+    for name in names:
+        matches: List[ValuePlan] = []
+        for value_plan in value_plans:
+            if value_plan.kind is PlanKind.MODEL:
+                plan = get_expansion_plan(typing.cast(type, value_plan.model))
+                if name == "*":
+                    matches.extend(plan.values())
+                elif name in plan:
+                    matches.append(plan[name])
+            elif value_plan.kind is PlanKind.DICT or (
+                # List items are only matched by index
+                value_plan.kind is PlanKind.LIST and (name == "*" or name.isdigit())
+            ):
+                matches.append(typing.cast(ValuePlan, value_plan.item))
+        if not matches:
+            raise ConfigExpansionError(
+                f"Field path pattern '{pattern}' doesn't match any field of model {model}"
+            )
+        value_plans = matches
+    return names
+
+
+def _freeze(value: Any) -> Any:
+    """Make an expanded value read-only, converting dicts to MappingProxyTypes and lists
+    to tuples. Values that are already read-only (e.g. shared config files) are left as
+    they are."""
+    result = [value]
+    to_visit: List[Tuple[Any, Any]] = [(result, 0)]
+    containers = []
+    while to_visit:
+        parent, key = to_visit.pop()
+        item = parent[key]
+        if isinstance(item, dict):
+            containers.append((parent, key))
+            to_visit.extend((item, item_key) for item_key in item)
+        elif isinstance(item, list):
+            containers.append((parent, key))
+            to_visit.extend((item, index) for index in range(len(item)))
+    # Innermost first, so each container holds read-only values when it's converted
+    for parent, key in reversed(containers):
+        item = parent[key]
+        parent[key] = MappingProxyType(item) if isinstance(item, dict) else tuple(item)
+    return result[0]
+
+
+def _cycle(frame: _Frame, path: PurePath, file_key: _FileKey) -> List[str]:
+    """The chain of config files from `path` back to itself, for error messages"""
+    chain = [str(path)]
+    ancestor: Optional[_Frame] = frame
+    while ancestor is not None:
+        if ancestor.file_key is not None:
+            chain.append(str(typing.cast(_FileNode, ancestor.node)[0]))
+            if ancestor.file_key == file_key:
+                break
+        ancestor = ancestor.parent
+    return chain[::-1]
 
 
 def _get_optional_ann(annotation):
@@ -0,0 +1,275 @@
+"""expand_async.py - asyncio version of expand.py. Sub-config files that don't depend on
+each other are loaded concurrently with asyncio.gather."""
+
+import asyncio
+import functools
+import typing
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from nested_config._types import AsyncConfigDictLoader, ConfigDict, PathLike
+from nested_config.expand import (
+    ConfigExpander,
+    ConfigExpansionError,
+    PlanKind,
+    ValuePlan,
+    _get_field_plan,
+    get_expansion_plan,
+)
+from nested_config.loaders import (
+    ConfigCache,
+    ConfigLoaderError,
+    async_config_dict_loaders,
+    config_dict_loaders,
+)
+from nested_config.sources import PathResolver
+
+T = TypeVar("T")
+_Ancestors = Tuple[Tuple[Tuple[Hashable, type], Path], ...]
+"""The file key (file id and model) and path of each config file being expanded, from
+the root config file down"""
+
+
+async def expand_config_async(
+    config_path: PathLike,
+    model: type,
+    *,
+    default_suffix: Optional[str] = None,
+    cache: Optional[ConfigCache] = None,
+    async_loaders: Optional[Dict[str, AsyncConfigDictLoader]] = None,
+    max_concurrency: int = 16,
+) -> ConfigDict:
+    """Asynchronously expand a configuration file into a single configuration dict. See
+    `nested_config.expand_config`.
+
+    Config files whose suffix is in `async_loaders` (by default
+    `nested_config.loaders.async_config_dict_loaders`) are loaded with that async loader.
+    Other config files are loaded with their loader from
+    `nested_config.config_dict_loaders` in the event loop's default executor, so they
+    don't block the event loop.
+
+    Additional Inputs
+    -----------------
+    async_loaders
+        Mapping of config file suffix to async loader to use instead of
+        `nested_config.loaders.async_config_dict_loaders`
+    max_concurrency
+        Maximum number of config files to be loading at one time
+    """
+    expander = AsyncConfigExpander(
+        default_suffix=default_suffix,
+        cache=cache,
+        async_loaders=async_loaders,
+        max_concurrency=max_concurrency,
+    )
+    return await expander.expand(config_path, model)
+
+
+class AsyncConfigExpander:
+    """The asyncio version of ConfigExpander. All the values of a config dict (and items
+    of lists and dicts of models) are expanded concurrently, but at most
+    `max_concurrency` config files are loaded at a time by each call to expand()."""
+
+    def __init__(
+        self,
+        *,
+        default_suffix: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        async_loaders: Optional[Dict[str, AsyncConfigDictLoader]] = None,
+        max_concurrency: int = 16,
+    ):
+        """Create the AsyncConfigExpander. See `expand_config_async` for the meanings of
+        the inputs."""
+        self.default_suffix = default_suffix
+        self.async_loaders = (
+            async_config_dict_loaders if async_loaders is None else async_loaders
+        )
+        self.max_concurrency = max_concurrency
+        self._sync_expander = ConfigExpander(default_suffix=default_suffix, cache=cache)
+
+    async def expand(self, config_path: PathLike, model: type) -> ConfigDict:
+        """Load a config file into a config dict and expand any paths to config files into
+        dictionaries to include in the output config dict"""
+        config_path = Path(config_path)
+        expansion = _AsyncExpansion(
+            asyncio.Semaphore(self.max_concurrency), self._sync_expander.source.resolver()
+        )
+        async with expansion.semaphore:
+            config_dict = await self._load(config_path)
+        file_id = await _run_in_executor(expansion.resolver.file_id, config_path)
+        return await self._preparse_config_dict(
+            config_dict, model, config_path, expansion, (((file_id, model), config_path),)
+        )
+
+    def _get_async_loader(self, config_path: Path) -> Optional[AsyncConfigDictLoader]:
+        """Get the async loader to use for a config file, or None if the synchronous
+        loader should be used (or there is no loader at all)"""
+        for suffix in (config_path.suffix, self.default_suffix):
+            if suffix in self.async_loaders:
+                return self.async_loaders[typing.cast(str, suffix)]
+            if suffix in config_dict_loaders:
+                return None
+        return None
+
+    async def _load(self, config_path: Path) -> ConfigDict:
+        """Load a single config file into a config dict"""
+        async_loader = self._get_async_loader(config_path)
+        if async_loader is None:
+            return await _run_in_executor(self._sync_expander._load, config_path)
+        try:
+            return await async_loader(config_path)
+        except Exception as ex:
+            raise ConfigLoaderError(config_path) from ex
+
+    async def _load_path_str(
+        self, path_str: str, parent_path: Path, expansion: "_AsyncExpansion"
+    ) -> Tuple[Path, Hashable, ConfigDict]:
+        """Resolve a path string and load (but don't expand) that config file. Returns
+        its path, file id, and config dict."""
+        async with expansion.semaphore:
+            if self._get_async_loader(Path(path_str)) is None:
+                # Resolve and load in one trip to the executor
+                return await _run_in_executor(
+                    self._resolve_and_load, path_str, parent_path, expansion.resolver
+                )
+            path, file_id = await _run_in_executor(
+                _resolve_file, path_str, parent_path, expansion.resolver
+            )
+            return path, file_id, await self._load(path)
+
+    def _resolve_and_load(
+        self, path_str: str, parent_path: Path, resolver: PathResolver
+    ) -> Tuple[Path, Hashable, ConfigDict]:
+        path, file_id = _resolve_file(path_str, parent_path, resolver)
+        return path, file_id, self._sync_expander._load(path)
+
+    async def _preparse_config_dict(
+        self,
+        config_dict: ConfigDict,
+        model: type,
+        config_path: Path,
+        expansion: "_AsyncExpansion",
+        ancestors: _Ancestors,
+    ) -> ConfigDict:
+        plan = get_expansion_plan(model)
+        expanded = {}
+        pending_keys = []
+        pending_values = []
+        for key, value in config_dict.items():
+            value_plan = _get_field_plan(plan, model, key)
+            expanded[key] = value
+            if value_plan.kind is not PlanKind.SCALAR:
+                pending_keys.append(key)
+                pending_values.append(
+                    self._preparse_config_value(
+                        value, value_plan, config_path, expansion, ancestors
+                    )
+                )
+        expanded.update(zip(pending_keys, await _gather(pending_values)))
+        return expanded
+
+    async def _preparse_config_value(
+        self,
+        field_value: Any,
+        value_plan: ValuePlan,
+        config_path: Path,
+        expansion: "_AsyncExpansion",
+        ancestors: _Ancestors,
+    ):
+        """Check if a model field contains a path to another model and parse it
+        accordingly. See ConfigExpander._run.
+
+        Raises
+        ------
+        ConfigExpansionError
+            A sub-config file (with its model) is already being expanded, i.e. it refers
+            to itself through a cycle of config files
+        """
+        kind = value_plan.kind
+        if kind is PlanKind.SCALAR:
+            return field_value
+        if kind is PlanKind.MODEL:
+            model = typing.cast(type, value_plan.model)
+            if isinstance(field_value, dict):
+                return await self._preparse_config_dict(
+                    field_value, model, config_path, expansion, ancestors
+                )
+            if isinstance(field_value, str):
+                path, file_id, config_dict = await self._load_path_str(
+                    field_value, config_path, expansion
+                )
+                file_key = (file_id, model)
+                for i, (ancestor_key, _) in enumerate(ancestors):
+                    if ancestor_key == file_key:
+                        cycle = [str(ancestor_path) for _, ancestor_path in ancestors[i:]]
+                        raise ConfigExpansionError(
+                            f"Config file '{path}' refers to itself through a cycle of"
+                            f" config files: {' -> '.join(cycle + [str(path)])}"
+                        )
+                return await self._preparse_config_dict(
+                    config_dict, model, path, expansion, ancestors + ((file_key, path),)
+                )
+        item_plan = typing.cast(ValuePlan, value_plan.item)
+        if kind is PlanKind.LIST and isinstance(field_value, list):
+            return await _gather(
+                self._preparse_config_value(
+                    li, item_plan, config_path, expansion, ancestors
+                )
+                for li in field_value
+            )
+        if kind is PlanKind.DICT and isinstance(field_value, dict):
+            values = await _gather(
+                self._preparse_config_value(
+                    value, item_plan, config_path, expansion, ancestors
+                )
+                for value in field_value.values()
+            )
+            return dict(zip(field_value.keys(), values))
+        return field_value
+
+
+class _AsyncExpansion:
+    """The state of one call to AsyncConfigExpander.expand: the semaphore bounding how
+    many config files are loaded at a time, and the PathResolver"""
+
+    __slots__ = ("semaphore", "resolver")
+
+    def __init__(self, semaphore: asyncio.Semaphore, resolver: PathResolver):
+        self.semaphore = semaphore
+        self.resolver = resolver
+
+
+def _resolve_file(
+    path_str: str, parent_path: Path, resolver: PathResolver
+) -> Tuple[Path, Hashable]:
+    """Resolve a path string to a config file's path and file id"""
+    path = Path(resolver.resolve(path_str, parent_path))
+    return path, resolver.file_id(path)
+
+
+async def _run_in_executor(func: Callable[..., T], *args) -> T:
+    """Run a blocking function in the event loop's default executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def _gather(aws: Iterable[Awaitable[T]]) -> List[T]:
+    """asyncio.gather, but cancel the remaining tasks if one fails"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -0,0 +1,169 @@
+"""lazy.py - Lazily-expanded config dicts, which only load a sub-config file when the
+value that refers to it is first accessed"""
+
+import typing
+from collections.abc import Mapping, Sequence
+from pathlib import PurePath
+from typing import Any, Dict, Iterator, List
+
+from nested_config._types import ConfigDict
+from nested_config.expand import (
+    ConfigExpander,
+    PlanKind,
+    ValuePlan,
+    _get_field_plan,
+    get_expansion_plan,
+)
+
+
+class LazyConfigDict(Mapping):
+    """A read-only mapping version of an expanded config dict in which values that may
+    contain nested models are only expanded when they are first accessed. Paths to
+    sub-config files are loaded at that time and the result replaces the path.
+
+    LazyConfigDict is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        config_dict: ConfigDict,
+        value_plans: Dict[str, ValuePlan],
+        config_path: PurePath,
+        expander: ConfigExpander,
+    ):
+        self._data = dict(config_dict)
+        self._unexpanded = {
+            key: value_plan
+            for key, value_plan in value_plans.items()
+            if value_plan.kind is not PlanKind.SCALAR
+        }
+        self._config_path = config_path
+        self._expander = expander
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._data[key]
+        if key in self._unexpanded:
+            value = _lazy_value(
+                value, self._unexpanded[key], self._config_path, self._expander
+            )
+            self._data[key] = value
+            del self._unexpanded[key]
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    @property
+    def unexpanded_keys(self) -> List[str]:
+        """The keys whose values haven't been expanded yet"""
+        return list(self._unexpanded)
+
+    def resolve_all(self) -> ConfigDict:
+        """Expand everything and return a regular config dict, as from expand_config"""
+        return {key: _resolve_all(value) for key, value in self.items()}
+
+
+class LazyConfigList(Sequence):
+    """A read-only sequence version of a list of nested models (or lists or dicts of them)
+    in which each item is only expanded when it is first accessed.
+
+    LazyConfigList is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        values: List[Any],
+        item_plan: ValuePlan,
+        config_path: PurePath,
+        expander: ConfigExpander,
+    ):
+        self._data = list(values)
+        self._unexpanded = set(range(len(values)))
+        self._item_plan = item_plan
+        self._config_path = config_path
+        self._expander = expander
+
+    @typing.overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> List[Any]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        value = self._data[index]
+        if index < 0:
+            index += len(self._data)
+        if index in self._unexpanded:
+            value = _lazy_value(value, self._item_plan, self._config_path, self._expander)
+            self._data[index] = value
+            self._unexpanded.discard(index)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (list, LazyConfigList)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def resolve_all(self) -> List[Any]:
+        """Expand everything and return a regular list, as from expand_config"""
+        return [_resolve_all(value) for value in self]
+
+
+def expand_lazy(
+    expander: ConfigExpander, config_path: PurePath, model: type
+) -> LazyConfigDict:
+    """Load a config file into a LazyConfigDict with the ConfigExpander's loading options.
+    Nothing but the config file itself is loaded until values are accessed."""
+    return _lazy_model_dict(expander._load(config_path), model, config_path, expander)
+
+
+def _lazy_model_dict(
+    config_dict: ConfigDict, model: type, config_path: PurePath, expander: ConfigExpander
+) -> LazyConfigDict:
+    plan = get_expansion_plan(model)
+    value_plans = {key: _get_field_plan(plan, model, key) for key in config_dict}
+    return LazyConfigDict(config_dict, value_plans, config_path, expander)
+
+
+def _lazy_value(
+    field_value: Any,
+    value_plan: ValuePlan,
+    config_path: PurePath,
+    expander: ConfigExpander,
+) -> Any:
+    """The lazy version of expanding one value in ConfigExpander._run"""
+    kind = value_plan.kind
+    if kind is PlanKind.MODEL:
+        model = typing.cast(type, value_plan.model)
+        if isinstance(field_value, dict):
+            return _lazy_model_dict(field_value, model, config_path, expander)
+        if isinstance(field_value, str):
+            path = expander._resolve(field_value, config_path)
+            return _lazy_model_dict(expander._load(path), model, path, expander)
+    item_plan = typing.cast(ValuePlan, value_plan.item)
+    if kind is PlanKind.LIST and isinstance(field_value, list):
+        return LazyConfigList(field_value, item_plan, config_path, expander)
+    if kind is PlanKind.DICT and isinstance(field_value, dict):
+        value_plans = dict.fromkeys(field_value, item_plan)
+        return LazyConfigDict(field_value, value_plans, config_path, expander)
+    return field_value
+
+
+def _resolve_all(value: Any) -> Any:
+    if isinstance(value, (LazyConfigDict, LazyConfigList)):
+        return value.resolve_all()
+    return value
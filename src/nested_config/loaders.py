@@ -1,77 +1,503 @@
 """loaders.py - Manage config file loaders"""
 
-import contextlib
+import copy
+import importlib.util
 import json
+import os
 import sys
-from pathlib import Path
-from typing import Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path, PurePath
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar, Union
 
 if sys.version_info < (3, 11):
-    from tomli import load as toml_load_fobj
+    from tomli import loads as toml_loads_str
 else:
-    from tomllib import load as toml_load_fobj
+    from tomllib import loads as toml_loads_str
 
-from nested_config._types import ConfigDict, ConfigDictLoader, PathLike
+from nested_config._types import (
+    AsyncConfigDictLoader,
+    ConfigDict,
+    ConfigDictLoader,
+    ConfigDictParser,
+    PathLike,
+)
+from nested_config.trace import EventKind, ExpansionObserver, _emit
+
+T = TypeVar("T")
 
 
 class NoLoaderError(Exception):
     def __init__(self, suffix: str, default_suffix: Optional[str]):
+        self.suffix = suffix
+        self.default_suffix = default_suffix
         msg_tail = ""
         if default_suffix:
             msg_tail = f" nor a loader for default suffix {default_suffix}"
         super().__init__(f"There is no loader for file extension {suffix}{msg_tail}.")
 
+    def __reduce__(self):
+        # So the exception can be sent back from worker processes
+        return type(self), (self.suffix, self.default_suffix)
+
 
 class ConfigLoaderError(Exception):
-    def __init__(self, config_path: Path) -> None:
+    def __init__(self, config_path: PurePath) -> None:
+        self.config_path = config_path
         super().__init__(f"There was a problem loading config file {config_path}")
 
+    def __reduce__(self):
+        # So the exception can be sent back from worker processes
+        return type(self), (self.config_path,)
+
+
+class ParserBackend(NamedTuple):
+    """A library that can parse the contents of a config file of a particular format"""
+
+    name: str
+    is_available: Callable[[], bool]
+    """Check (without importing it if possible) whether the library is installed"""
+    loads: Callable[[bytes], ConfigDict]
+    """Parse the contents of a config file"""
+
+
+def _module_available(module_name: str) -> Callable[[], bool]:
+    return lambda: importlib.util.find_spec(module_name) is not None
+
+
+def _libyaml_available() -> bool:
+    if importlib.util.find_spec("yaml") is None:
+        return False
+    import yaml
+
+    return yaml.__with_libyaml__
+
+
+def _json_loads(data: bytes) -> ConfigDict:
+    return json.loads(data)
+
+
+def _orjson_loads(data: bytes) -> ConfigDict:
+    import orjson
+
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # orjson rejects some JSON that the json module accepts (NaN, Infinity, and
+        # integers wider than 64 bits), so let the json module have the final say
+        return json.loads(data)
+
+
+def _tomllib_loads(data: bytes) -> ConfigDict:
+    return toml_loads_str(data.decode())
+
+
+def _rtoml_loads(data: bytes) -> ConfigDict:
+    import rtoml  # type: ignore
+
+    return rtoml.loads(data.decode())
+
+
+def _libyaml_loads(data: bytes) -> ConfigDict:
+    import yaml
+
+    return yaml.load(data, Loader=yaml.CSafeLoader)
+
+
+def _pyyaml_loads(data: bytes) -> ConfigDict:
+    import yaml
+
+    return yaml.load(data, Loader=yaml.SafeLoader)
+
+
+parser_backends: Dict[str, List[ParserBackend]] = {
+    "json": [
+        ParserBackend("orjson", _module_available("orjson"), _orjson_loads),
+        ParserBackend("json", lambda: True, _json_loads),
+    ],
+    "toml": [
+        ParserBackend("rtoml", _module_available("rtoml"), _rtoml_loads),
+        ParserBackend("tomllib", lambda: True, _tomllib_loads),
+    ],
+    "yaml": [
+        ParserBackend("libyaml", _libyaml_available, _libyaml_loads),
+        ParserBackend("pyyaml", _module_available("yaml"), _pyyaml_loads),
+    ],
+}
+"""Mapping of config file format to the parser backends for that format, in order of
+preference. The first available backend is used unless one is pinned with set_backend."""
+
+_pinned_backends: Dict[str, str] = {}
+_selected_backends: Dict[str, ParserBackend] = {}
+
+
+def get_backend(config_format: str) -> ParserBackend:
+    """Get the parser backend in use for a config file format ("json", "toml", or
+    "yaml"). This is the pinned backend if there is one, or else the first available
+    backend in `parser_backends`."""
+    try:
+        return _selected_backends[config_format]
+    except KeyError:
+        pass
+    pinned = _pinned_backends.get(config_format)
+    for backend in _get_format_backends(config_format):
+        if (pinned is None or backend.name == pinned) and backend.is_available():
+            _selected_backends[config_format] = backend
+            return backend
+    raise ImportError(f"No parser backend for {config_format} is installed")
+
+
+def set_backend(config_format: str, name: Optional[str]) -> None:
+    """Pin the parser backend used for a config file format, or with name=None, go back
+    to using the first available backend
+
+    Raises
+    ------
+    ValueError
+        There is no such format or backend
+    ImportError
+        The backend isn't installed
+    """
+    backends = _get_format_backends(config_format)
+    if name is None:
+        _pinned_backends.pop(config_format, None)
+    else:
+        backend = next((b for b in backends if b.name == name), None)
+        if backend is None:
+            raise ValueError(f"There is no {config_format} parser backend named {name}")
+        if not backend.is_available():
+            raise ImportError(
+                f"The {config_format} parser backend {name} is not installed"
+            )
+        _pinned_backends[config_format] = name
+    _selected_backends.pop(config_format, None)
+
+
+def available_backends(config_format: str) -> List[str]:
+    """Get the names of the installed parser backends for a config file format, in order
+    of preference"""
+    return [b.name for b in _get_format_backends(config_format) if b.is_available()]
+
+
+def _get_format_backends(config_format: str) -> List[ParserBackend]:
+    try:
+        return parser_backends[config_format]
+    except KeyError:
+        raise ValueError(f"Unknown config format {config_format}") from None
+
+
+def _read_bytes(path: PathLike) -> bytes:
+    with open(path, "rb") as fobj:
+        return fobj.read()
+
+
+def toml_loads(data: bytes) -> ConfigDict:
+    """Parse the contents of a TOML config file"""
+    return get_backend("toml").loads(data)
+
+
+def json_loads(data: bytes) -> ConfigDict:
+    """Parse the contents of a JSON config file"""
+    return get_backend("json").loads(data)
+
+
+def yaml_loads(data: bytes) -> ConfigDict:
+    """Parse the contents of a YAML config file (safely)"""
+    return get_backend("yaml").loads(data)
+
 
 def toml_load(path: PathLike) -> ConfigDict:
     """Load a TOML config file"""
-    with open(path, "rb") as fobj:
-        return toml_load_fobj(fobj)
+    return toml_loads(_read_bytes(path))
 
 
 def json_load(path: PathLike) -> ConfigDict:
     """Load a JSON config file"""
-    with open(path, "rb") as fobj:
-        return json.load(fobj)
+    return json_loads(_read_bytes(path))
+
+
+def yaml_load(path: PathLike) -> ConfigDict:
+    """Load a YAML config file (safely)"""
+    return yaml_loads(_read_bytes(path))
+
+
+def snapshot_loads(data: bytes) -> ConfigDict:
+    """Decode a snapshot (see `nested_config.snapshot`) into a config dict"""
+    from nested_config.snapshot import Snapshot
+
+    with Snapshot(data) as snapshot:
+        return snapshot.root.to_dict()
+
+
+def snapshot_load(path: PathLike) -> ConfigDict:
+    """Load a snapshot file (see `nested_config.snapshot`) as a config dict"""
+    from nested_config.snapshot import Snapshot
+
+    with Snapshot.open(path) as snapshot:
+        return snapshot.root.to_dict()
 
 
 config_dict_loaders: Dict[str, ConfigDictLoader] = {
     ".toml": toml_load,
     ".json": json_load,
+    ".ncsnap": snapshot_load,
 }
 """Mapping of config file extension to config file loader"""
 
-# Add YAML loader, if available
-with contextlib.suppress(ImportError):
-    import yaml
-
-    def yaml_load(path: PathLike) -> ConfigDict:
-        """Load a YAML config file (safely)"""
-        with open(path, "r") as fobj:
-            return yaml.safe_load(fobj)
+config_dict_parsers: Dict[str, ConfigDictParser] = {
+    ".toml": toml_loads,
+    ".json": json_loads,
+    ".ncsnap": snapshot_loads,
+}
+"""Mapping of config file extension to parser of config file contents, used for config
+files that aren't on the filesystem (see `nested_config.sources`)"""
 
+# Add YAML loader, if available
+if importlib.util.find_spec("yaml") is not None:
     config_dict_loaders[".yaml"] = yaml_load
     config_dict_loaders[".yml"] = yaml_load
+    config_dict_parsers[".yaml"] = yaml_loads
+    config_dict_parsers[".yml"] = yaml_loads
+
+
+_builtin_formats: Dict[Callable, str] = {
+    toml_load: "toml",
+    json_load: "json",
+    yaml_load: "yaml",
+    toml_loads: "toml",
+    json_loads: "json",
+    yaml_loads: "yaml",
+}
+"""Config file format of each built-in loader and parser, for naming their backends"""
+
+async_config_dict_loaders: Dict[str, AsyncConfigDictLoader] = {}
+"""Mapping of config file extension to async config file loader, used by
+`expand_config_async` in preference to `config_dict_loaders`"""
 
 
 def _get_loader(config_path: Path, default_suffix: Optional[str] = None):
     """Get the loader for the specified suffix, or a loader from default suffix"""
+    return _get_for_suffix(config_dict_loaders, config_path.suffix, default_suffix)
+
+
+def _get_for_suffix(
+    mapping: Dict[str, T], suffix: str, default_suffix: Optional[str]
+) -> T:
     try:
         try:
-            return config_dict_loaders[config_path.suffix]
+            return mapping[suffix]
         except KeyError:
             if default_suffix:
-                return config_dict_loaders[default_suffix]
+                return mapping[default_suffix]
             raise
     except KeyError:
-        raise NoLoaderError(config_path.suffix, default_suffix) from None
+        raise NoLoaderError(suffix, default_suffix) from None
+
 
+def parse_config(
+    data: Union[bytes, str],
+    suffix: str,
+    default_suffix: Optional[str] = None,
+    *,
+    config_path: Optional[PurePath] = None,
+    observer: Optional[ExpansionObserver] = None,
+) -> ConfigDict:
+    """Parse the contents of a config file with the parser for its suffix from
+    `config_dict_parsers`, e.g. for '.toml', use the TOML parser.
 
-def load_config(config_path: Path, default_suffix: Optional[str] = None) -> ConfigDict:
+    Inputs
+    ------
+    data
+        The contents of the config file. str is encoded as UTF-8.
+    suffix
+        The suffix (extension) of the config file, e.g. '.toml'
+    default_suffix
+        Suffix whose parser to use if there is no parser for `suffix`
+    config_path
+        Where the contents came from, for error messages (and events)
+    observer
+        If provided, called with a PARSE `nested_config.trace.ExpansionEvent`
+
+    Raises
+    ------
+    NoLoaderError
+        No parser could be found for the suffix (or default suffix, if provided)
+    ConfigLoaderError
+        There was an error running the parser
+    """
+    parser = _get_for_suffix(config_dict_parsers, suffix, default_suffix)
+    if isinstance(data, str):
+        data = data.encode()
+    config_path = config_path or PurePath(f"<{suffix} data>")
+    start = time.perf_counter()
+    try:
+        config_dict = parser(data)
+    except Exception as ex:
+        raise ConfigLoaderError(config_path) from ex
+    if observer is not None:
+        _emit(
+            observer,
+            EventKind.PARSE,
+            config_path,
+            start,
+            nbytes=len(data),
+            loader=_loader_name(parser),
+        )
+    return config_dict
+
+
+def _loader_name(loader: Callable) -> str:
+    """Name of a loader or parser for events: the format and backend for built-in ones"""
+    config_format = _builtin_formats.get(loader)
+    if config_format is not None:
+        return f"{config_format}:{get_backend(config_format).name}"
+    return getattr(loader, "__qualname__", repr(loader))
+
+
+def _run_loader(
+    loader: ConfigDictLoader, config_path: Path, observer: Optional[ExpansionObserver]
+) -> ConfigDict:
+    """Run a loader, sending READ and PARSE events to the observer if there is one. Only
+    the built-in loaders can be timed separately for reading and parsing."""
+    if observer is None:
+        return loader(config_path)
+    start = time.perf_counter()
+    config_format = _builtin_formats.get(loader)
+    if config_format is None:
+        config_dict = loader(config_path)
+        _emit(observer, EventKind.PARSE, config_path, start, loader=_loader_name(loader))
+        return config_dict
+    data = _read_bytes(config_path)
+    _emit(observer, EventKind.READ, config_path, start, nbytes=len(data))
+    start = time.perf_counter()
+    backend = get_backend(config_format)
+    config_dict = backend.loads(data)
+    _emit(
+        observer,
+        EventKind.PARSE,
+        config_path,
+        start,
+        nbytes=len(data),
+        loader=f"{config_format}:{backend.name}",
+    )
+    return config_dict
+
+
+class _CacheEntry(NamedTuple):
+    stamp: Tuple[int, int]
+    """(st_mtime_ns, st_size) of the file when it was loaded"""
+    loader: ConfigDictLoader
+    config_dict: ConfigDict
+
+
+class ConfigCache:
+    """A least-recently-used cache of parsed config files.
+
+    Entries are keyed by the resolved path of the config file and are only served while
+    the file's modification time and size match those recorded when it was parsed. Every
+    hit returns a deep copy of the cached config dict so callers may modify it freely.
+
+    A ConfigCache is safe to share between threads.
+    """
+
+    def __init__(self, max_entries: Optional[int] = 128, max_bytes: Optional[int] = None):
+        """Create a ConfigCache
+
+        Inputs
+        ------
+        max_entries
+            Maximum number of parsed files to hold. None for no limit.
+        max_bytes
+            Maximum total size, in bytes of the source files, of the parsed files to hold.
+            None for no limit. Files larger than this are never cached.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Path, _CacheEntry]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the source files of all cached entries"""
+        return self._nbytes
+
+    def load(
+        self,
+        config_path: Path,
+        loader: ConfigDictLoader,
+        observer: Optional[ExpansionObserver] = None,
+    ) -> ConfigDict:
+        """Get the config dict for a file from the cache, or load it with `loader` and
+        cache it if it's not cached or the file has changed since it was cached. If
+        `observer` is provided, it is sent STAT, READ, and PARSE events."""
+        start = time.perf_counter()
+        try:
+            key = config_path.resolve()
+            stat = os.stat(key)
+        except OSError:
+            # Let the loader raise whatever error is appropriate
+            return _run_loader(loader, config_path, observer)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if observer is not None:
+            _emit(observer, EventKind.STAT, config_path, start, nbytes=stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp and entry.loader is loader:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry.config_dict)
+            self.misses += 1
+        config_dict = _run_loader(loader, config_path, observer)
+        if self.max_bytes is None or stat.st_size <= self.max_bytes:
+            self._store(key, _CacheEntry(stamp, loader, copy.deepcopy(config_dict)))
+        return config_dict
+
+    def invalidate(self, config_path: PathLike) -> None:
+        """Drop the cached entry for a config file, if any"""
+        key = Path(config_path).resolve()
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """Drop all cached entries and reset the hit/miss counters"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _store(self, key: Path, entry: _CacheEntry) -> None:
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = entry
+            self._nbytes += entry.stamp[1]
+            while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.stamp[1]
+
+    def _pop(self, key: Path) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._nbytes -= entry.stamp[1]
+
+
+def load_config(
+    config_path: Path,
+    default_suffix: Optional[str] = None,
+    *,
+    cache: Optional[ConfigCache] = None,
+    observer: Optional[ExpansionObserver] = None,
+) -> ConfigDict:
     """Select a loader based on the suffix (extension) of the config file and try to load
     the config using that loader. E.g. for .toml, use the TOML loader.
 
@@ -79,6 +505,14 @@ def load_config(config_path: Path, default_suffix: Optional[str] = None) -> Conf
     ------
     config_path
         Path to the config file
+    default_suffix
+        Suffix whose loader to use if there is no loader for the suffix of `config_path`
+    cache
+        If provided, serve the config from this ConfigCache when the file is unchanged
+        since it was last loaded
+    observer
+        If provided, called with a `nested_config.trace.ExpansionEvent` for each step of
+        loading the config file
 
     Returns
     -------
@@ -94,6 +528,8 @@ def load_config(config_path: Path, default_suffix: Optional[str] = None) -> Conf
     """
     loader = _get_loader(config_path, default_suffix)
     try:
-        return loader(config_path)
+        if cache is not None:
+            return cache.load(config_path, loader, observer)
+        return _run_loader(loader, config_path, observer)
     except Exception as ex:
         raise ConfigLoaderError(config_path) from ex
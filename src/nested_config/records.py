@@ -0,0 +1,125 @@
+"""records.py - Compact record objects with __slots__ for each model's fields, which the
+ConfigExpander can fill instead of dicts to save memory in very large configs"""
+
+import functools
+from typing import Any, Dict, List, Mapping, Tuple
+
+from nested_config.expand import ConfigExpansionError, get_model_annotations
+
+_UNSET = object()
+
+
+class Record:
+    """Base class of the record classes made by `record_class`. Each record class has a
+    slot for every field of its model, so a record takes much less memory than a dict of
+    the same values. Fields that weren't in the config file are unset, so accessing them
+    raises AttributeError. Fields can't have the names of Record's own attributes (e.g.
+    `to_dict`)."""
+
+    __slots__: Tuple[str, ...] = ()
+    _model: type
+    """The model the record class was made from"""
+
+    def __init__(self, values: Mapping[str, Any] = {}):
+        fill_record(self, values)
+
+    # The ConfigExpander fills records like dicts
+    __setitem__ = object.__setattr__
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name, _UNSET) for name in self.__slots__)
+
+    def _fields(self) -> Dict[str, Any]:
+        """The values of the fields that are set, by name"""
+        return {
+            name: value
+            for name, value in zip(self.__slots__, self._values())
+            if value is not _UNSET
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the record, and every record, list, and dict in it, to dicts and lists,
+        i.e. the config dict that `expand_config` would have returned"""
+        return _to_dict(self)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={value!r}" for name, value in self._fields().items())
+        return f"{type(self).__name__}({fields})"
+
+    def __reduce__(self):
+        # So records can be pickled (and copied) although their classes are made at
+        # runtime
+        return new_record, (self._model, self._fields())
+
+
+_RESERVED_NAMES = frozenset(dir(Record))
+"""Names that fields of record classes can't have"""
+
+
+@functools.lru_cache(maxsize=None)
+def record_class(model: type) -> type:
+    """Get the record class for a model: a subclass of Record with the model's name and
+    a slot for each of its fields
+
+    Raises
+    ------
+    nested_config.ConfigExpansionError
+        A field of the model has the name of an attribute of Record
+    """
+    field_names = tuple(get_model_annotations(model))
+    reserved = [name for name in field_names if name in _RESERVED_NAMES]
+    if reserved:
+        raise ConfigExpansionError(
+            f"Can't make records of {model}: the names of its fields {reserved} are used"
+            " by nested_config.records.Record"
+        )
+    return type(
+        model.__name__,
+        (Record,),
+        {
+            "__slots__": field_names,
+            "__module__": __name__,
+            "_model": model,
+        },
+    )
+
+
+def fill_record(record: Record, values: Mapping[str, Any]) -> None:
+    """Set fields of a record from a mapping of field name to value"""
+    for key, value in values.items():
+        object.__setattr__(record, key, value)
+
+
+def new_record(model: type, values: Mapping[str, Any] = {}) -> Record:
+    """Make a record of a model, optionally with some values"""
+    return record_class(model)(values)
+
+
+def _to_dict(record: Record) -> Dict[str, Any]:
+    result: List[Any] = [record]
+    to_visit: List[Tuple[Any, Any]] = [(result, 0)]
+    while to_visit:
+        parent, key = to_visit.pop()
+        item = parent[key]
+        if isinstance(item, Record):
+            item = item._fields()
+        elif isinstance(item, dict):
+            item = dict(item)
+        elif isinstance(item, list):
+            item = list(item)
+        else:
+            continue
+        parent[key] = item
+        to_visit.extend((item, item_key) for item_key in _keys(item))
+    return result[0]
+
+
+def _keys(container: Any) -> Any:
+    return range(len(container)) if isinstance(container, list) else list(container)
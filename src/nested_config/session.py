@@ -0,0 +1,252 @@
+"""session.py - Expansion sessions that remember the tree of config files they expanded
+so that only changed files need to be reloaded, and a background reloader that polls
+those files for changes"""
+
+import logging
+import os
+import threading
+from pathlib import Path, PurePath
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.expand import ConfigExpander, _FileNode
+
+_logger = logging.getLogger(__name__)
+
+_Node = Tuple[Path, type]
+"""A config file expanded according to a model"""
+
+ReloadCallback = Callable[[ConfigDict], None]
+ReloadErrorCallback = Callable[[Exception], None]
+
+
+class ExpansionSession:
+    """Expand a config file and remember every sub-config file that it refers to, and how
+    they were expanded, so that when some of the files change only those files need to be
+    reloaded. The subtrees for unchanged files are reused in the new config dict.
+
+    The config dicts returned by a session share unchanged subtrees with each other and
+    with the session's own records, so they must be treated as read-only.
+
+    An ExpansionSession is safe to use from multiple threads.
+    """
+
+    def __init__(
+        self, config_path: PathLike, model: type, *, default_suffix: Optional[str] = None
+    ):
+        self.config_path = Path(config_path)
+        self.model = model
+        self.config: Optional[ConfigDict] = None
+        """The most recently expanded config dict"""
+        self._expander = _SessionExpander(self, default_suffix)
+        self._lock = threading.RLock()
+        self._raw: Dict[Path, ConfigDict] = {}
+        """Loaded (unexpanded) config dict of each file, by resolved path"""
+        self._stamps: Dict[Path, Tuple[int, int]] = {}
+        """(st_mtime_ns, st_size) of each file when it was loaded, by resolved path"""
+        self._expanded: Dict[_Node, ConfigDict] = {}
+        self._children: Dict[_Node, Set[_Node]] = {}
+        self._parents: Dict[_Node, Set[_Node]] = {}
+        self._nodes_by_file: Dict[Path, Set[_Node]] = {}
+
+    def expand(self) -> ConfigDict:
+        """Expand the root config file, reusing any unchanged expanded subtrees"""
+        with self._lock:
+            self.config = self._expander.expand(self.config_path, self.model)
+            self._prune()
+            return self.config
+
+    def refresh(self, changed_files: Iterable[PathLike]) -> ConfigDict:
+        """Reload the changed files, re-expand them and the config files that refer to
+        them, and return the new config dict. Files that aren't part of the session are
+        ignored."""
+        with self._lock:
+            stale: Set[_Node] = set()
+            for path in changed_files:
+                path = Path(path).resolve()
+                self._raw.pop(path, None)
+                stale.update(self._nodes_by_file.get(path, ()))
+            if not stale and self.config is not None:
+                return self.config
+            # Everything that refers to a changed file must be re-expanded too
+            to_visit = list(stale)
+            while to_visit:
+                for parent in self._parents.get(to_visit.pop(), ()):
+                    if parent not in stale:
+                        stale.add(parent)
+                        to_visit.append(parent)
+            for node in stale:
+                self._expanded.pop(node, None)
+                for child in self._children.pop(node, ()):
+                    self._parents[child].discard(node)
+            return self.expand()
+
+    @property
+    def files(self) -> List[Path]:
+        """The resolved paths of all the config files in the session"""
+        with self._lock:
+            return list(self._nodes_by_file)
+
+    def changed_files(self) -> List[Path]:
+        """Stat all the config files in the session and return those that have been
+        modified (or removed) since they were loaded"""
+        with self._lock:
+            stamps = list(self._stamps.items())
+        return [path for path, stamp in stamps if _get_stamp(path) != stamp]
+
+    def _prune(self):
+        """Forget about files that are no longer referred to from the root config file"""
+        reachable = set()
+        to_visit = [(self.config_path, self.model)]
+        while to_visit:
+            node = to_visit.pop()
+            if node not in reachable:
+                reachable.add(node)
+                to_visit.extend(self._children.get(node, ()))
+        for node in list(self._expanded):
+            if node not in reachable:
+                del self._expanded[node]
+                self._children.pop(node, None)
+                self._parents.pop(node, None)
+        self._nodes_by_file = {}
+        for node in reachable:
+            self._nodes_by_file.setdefault(node[0].resolve(), set()).add(node)
+        for path in set(self._raw) - set(self._nodes_by_file):
+            del self._raw[path]
+            self._stamps.pop(path, None)
+
+
+class _SessionExpander(ConfigExpander):
+    """ConfigExpander that records the tree of config files in an ExpansionSession and
+    reuses the session's expanded subtrees"""
+
+    # Every path to a config file needs its own node in the session's tree
+    _dedupe_files = False
+
+    def __init__(self, session: ExpansionSession, default_suffix: Optional[str]):
+        super().__init__(default_suffix=default_suffix)
+        self.session = session
+
+    def _lookup_expanded(
+        self, path: PurePath, model: type, parent: Optional[_FileNode]
+    ) -> Optional[ConfigDict]:
+        session = self.session
+        node = (Path(path), model)
+        if parent is not None:
+            parent = (Path(parent[0]), parent[1])
+            session._children.setdefault(parent, set()).add(node)
+            session._parents.setdefault(node, set()).add(parent)
+        return session._expanded.get(node)
+
+    def _store_expanded(
+        self,
+        path: PurePath,
+        model: type,
+        parent: Optional[_FileNode],
+        expanded: ConfigDict,
+    ) -> ConfigDict:
+        session = self.session
+        node = (Path(path), model)
+        session._expanded[node] = expanded
+        session._nodes_by_file.setdefault(node[0].resolve(), set()).add(node)
+        return expanded
+
+    def _load(self, config_path: PurePath) -> ConfigDict:
+        session = self.session
+        key = Path(config_path).resolve()
+        if key not in session._raw:
+            # Stat before loading so a change made while loading is caught next time
+            session._stamps[key] = _get_stamp(key)
+            session._raw[key] = super()._load(config_path)
+        return session._raw[key]
+
+
+class ConfigReloader:
+    """Poll the files of an ExpansionSession in a background thread and, when any of them
+    change, refresh the session and pass the new config dict to the registered callbacks.
+
+    Each new config dict is completely expanded before `session.config` is replaced and
+    the callbacks are called. If refreshing fails (e.g. a file is only partially written),
+    the error is passed to `on_error` and the previous config dict remains current.
+    Without `on_error`, `check()` raises the error, and the polling thread logs it to the
+    'nested_config.session' logger.
+    """
+
+    def __init__(
+        self,
+        session: ExpansionSession,
+        *,
+        interval: float = 1.0,
+        on_error: Optional[ReloadErrorCallback] = None,
+    ):
+        self.session = session
+        self.interval = interval
+        self.on_error = on_error
+        self._callbacks: List[ReloadCallback] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_callback(self, callback: ReloadCallback) -> None:
+        """Register a function to call with each new config dict"""
+        self._callbacks.append(callback)
+
+    def check(self) -> bool:
+        """Check for changed files once, refreshing the session and calling the callbacks
+        if there are any. Returns True if a new config dict was published."""
+        changed = self.session.changed_files()
+        if not changed:
+            return False
+        try:
+            config = self.session.refresh(changed)
+        except Exception as ex:
+            if self.on_error is None:
+                raise
+            self.on_error(ex)
+            return False
+        for callback in self._callbacks:
+            callback(config)
+        return True
+
+    def start(self) -> None:
+        """Start polling in a daemon thread. The session is expanded first if it hasn't
+        been already."""
+        if self.session.config is None:
+            self.session.expand()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="nested_config-reloader", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for the polling thread to finish"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                # Without an on_error callback, keep polling with the old config
+                _logger.exception(
+                    "Couldn't reload %s; keeping the previous config",
+                    self.session.config_path,
+                )
+
+
+def _get_stamp(path: Path) -> Tuple[int, int]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,93 @@
+"""single_flight.py - A ConfigExpander to share between threads that loads a config file
+only once when several threads need it at the same time"""
+
+import copy
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import PurePath
+from typing import Any, Dict
+
+from nested_config._types import ConfigDict
+from nested_config.expand import ConfigExpander
+
+
+class SingleFlightConfigExpander(ConfigExpander):
+    """A ConfigExpander to share between threads (e.g. the request handlers of a web
+    server) with single-flight loading: if a thread needs a config file that another
+    thread is already loading, it waits for that load and gets its own copy of the config
+    dict rather than reading and parsing the file again. Errors loading the file are
+    raised in every thread that waited for it.
+
+    Apart from its counters, a ConfigExpander keeps all the state of an expansion local
+    to that expansion, so a SingleFlightConfigExpander can be used by many threads at
+    once. Use it with a ConfigCache to also serve unchanged config files from memory
+    after they're loaded.
+    """
+
+    def __init__(self, **kwargs: Any):
+        """Create the SingleFlightConfigExpander. It takes the same arguments as
+        ConfigExpander."""
+        super().__init__(**kwargs)
+        self.loads = 0
+        """Number of times a config file was loaded"""
+        self.collapsed_loads = 0
+        """Number of times a thread waited for another thread's load of a config file
+        rather than loading it itself"""
+        self.wait_time = 0.0
+        """Total seconds threads spent waiting for other threads' loads"""
+        self._lock = threading.Lock()
+        self._in_flight: Dict[PurePath, _Flight] = {}
+
+    def reset_stats(self) -> None:
+        """Set the counters back to zero"""
+        with self._lock:
+            self.loads = 0
+            self.collapsed_loads = 0
+            self.wait_time = 0.0
+
+    def _load(self, config_path: PurePath) -> ConfigDict:
+        with self._lock:
+            flight = self._in_flight.get(config_path)
+            if flight is None:
+                flight = self._in_flight[config_path] = _Flight()
+                self.loads += 1
+                leader = True
+            else:
+                flight.waiters += 1
+                self.collapsed_loads += 1
+                leader = False
+        if not leader:
+            start = time.perf_counter()
+            try:
+                config_dict = flight.future.result()
+            finally:
+                with self._lock:
+                    self.wait_time += time.perf_counter() - start
+            return copy.deepcopy(config_dict)
+        try:
+            config_dict = super()._load(config_path)
+        except BaseException as ex:
+            self._finish(config_path)
+            flight.future.set_exception(ex)
+            raise
+        if self._finish(config_path):
+            # The waiters copy a copy that this thread's caller can't modify
+            flight.future.set_result(copy.deepcopy(config_dict))
+        return config_dict
+
+    def _finish(self, config_path: PurePath) -> int:
+        """Stop other threads from waiting for the load of a config file, returning the
+        number of threads that are already waiting for it"""
+        with self._lock:
+            return self._in_flight.pop(config_path).waiters
+
+
+class _Flight:
+    """A load of a config file in progress, and the number of threads waiting for it"""
+
+    __slots__ = ("future", "waiters")
+
+    def __init__(self) -> None:
+        self.future: Future = Future()
+        self.waiters = 0
@@ -0,0 +1,417 @@
+"""snapshot.py - Compact, read-only binary snapshots of expanded config dicts that can be
+memory-mapped from a file or attached from shared memory by many processes, and read
+through mapping and sequence views without parsing or copying the whole config"""
+
+import datetime
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import typing
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from nested_config._types import ConfigDict, PathLike
+
+if typing.TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+_MAGIC = b"NCSNAP\x00\x01"
+_HEADER = struct.Struct("<8sI")
+"""Magic bytes and the offset of the root value"""
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+_shared_names: Set[str] = set()
+"""Names of the blocks of shared memory created by share_snapshot in this process"""
+_F64 = struct.Struct("<d")
+_MAX_SIZE = 2**32 - 1
+
+# Each value is a one-byte tag followed by its payload. Strings, bytes, big ints, and
+# dates/times are a u32 length and the bytes. Lists are a u32 count and the u32 offset of
+# each item. Mappings are a u32 count, the (key offset, value offset) of each item in
+# order, and then the index of each item in order of key, for lookups by binary search.
+_NONE = b"N"
+_TRUE = b"T"
+_FALSE = b"F"
+_INT = b"i"
+_BIG_INT = b"I"
+_FLOAT = b"f"
+_STR = b"s"
+_BYTES = b"b"
+_DATETIME = b"D"
+_DATE = b"d"
+_TIME = b"t"
+_LIST = b"l"
+_MAPPING = b"m"
+
+_ISO_TYPES: Dict[bytes, Any] = {
+    _DATETIME: datetime.datetime,
+    _DATE: datetime.date,
+    _TIME: datetime.time,
+}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def dump_snapshot(config: ConfigDict) -> bytes:
+    """Encode an expanded config dict (or any structure of mappings, lists, tuples,
+    strings, numbers, bools, None, bytes, and dates/times) as a snapshot. Objects that
+    appear more than once (e.g. from `expand_config(shared=True)`) and repeated strings
+    are stored once.
+
+    Raises
+    ------
+    TypeError
+        A value can't be stored in a snapshot, or a mapping key isn't a string
+    SnapshotError
+        The snapshot would be larger than 4 GiB
+    """
+    return bytes(_Writer().write(config))
+
+
+def write_snapshot(config: ConfigDict, path: PathLike) -> None:
+    """Write a snapshot of an expanded config dict to a file (atomically, by writing a
+    temporary file and renaming it), for `Snapshot.open`. See `dump_snapshot`."""
+    data = dump_snapshot(config)
+    dir_name = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fobj:
+            fobj.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def share_snapshot(config: ConfigDict, name: Optional[str] = None) -> "SharedMemory":
+    """Write a snapshot of an expanded config dict to a new block of shared memory, for
+    `Snapshot.attach(shm.name)`. The caller owns the block and should `close()` and
+    `unlink()` it when no process needs it any more. See `dump_snapshot`."""
+    from multiprocessing.shared_memory import SharedMemory
+
+    data = dump_snapshot(config)
+    shm = SharedMemory(name=name, create=True, size=len(data))
+    _shared_names.add(shm.name)
+    typing.cast(memoryview, shm.buf)[: len(data)] = data
+    return shm
+
+
+class Snapshot:
+    """A read-only view of a snapshot of an expanded config dict. `root` is a
+    SnapshotMapping, which (like the SnapshotMappings and SnapshotLists in it) decodes
+    values from the snapshot only as they are accessed.
+
+    ```
+    # In the parent process, before starting workers
+    write_snapshot(expand_config("app.toml", AppConfig), "app.ncsnap")
+    # In each worker
+    config = Snapshot.open("app.ncsnap").root
+    ```
+
+    Views can't be used after the Snapshot is closed.
+    """
+
+    def __init__(self, buffer: Any, *, _owner: Any = None):
+        """Read a snapshot from a bytes-like object (e.g. bytes, mmap, or memoryview)
+
+        Raises
+        ------
+        SnapshotError
+            The buffer doesn't hold a snapshot
+        """
+        self._buf = memoryview(buffer).cast("B")
+        self._owner = _owner
+        try:
+            magic, root_offset = _HEADER.unpack_from(self._buf, 0)
+        except struct.error:
+            magic = None
+        if magic != _MAGIC:
+            self._buf.release()
+            raise SnapshotError("Not a nested_config snapshot")
+        self._root_offset = root_offset
+
+    @classmethod
+    def open(cls, path: PathLike) -> "Snapshot":
+        """Memory-map a snapshot file written by `write_snapshot`. The operating system
+        shares the pages between every process that opens the same file."""
+        with open(path, "rb") as fobj:
+            mapped = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, _owner=mapped)
+
+    @classmethod
+    def attach(cls, name: str) -> "Snapshot":
+        """Attach to a snapshot in shared memory created by `share_snapshot`"""
+        from multiprocessing.shared_memory import SharedMemory
+
+        if sys.version_info >= (3, 13):
+            # Don't let this process's resource tracker unlink the creator's block
+            shm = SharedMemory(name=name, track=False)
+        else:
+            shm = SharedMemory(name=name)
+            if shm.name not in _shared_names:
+                # Before Python 3.13 attaching registers the block with the resource
+                # tracker, which unlinks it when this process exits
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+        return cls(shm.buf, _owner=shm)
+
+    @property
+    def root(self) -> Any:
+        """The snapshot's config dict (a SnapshotMapping)"""
+        return self._read(self._root_offset)
+
+    @property
+    def nbytes(self) -> int:
+        return self._buf.nbytes
+
+    def close(self) -> None:
+        """Release the buffer (and unmap the file or detach from shared memory)"""
+        self._buf.release()
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read(self, offset: int) -> Any:
+        buf = self._buf
+        tag = buf[offset : offset + 1].tobytes()
+        offset += 1
+        if tag == _STR:
+            (size,) = _U32.unpack_from(buf, offset)
+            return str(buf[offset + 4 : offset + 4 + size], "utf-8")
+        if tag == _INT:
+            return _I64.unpack_from(buf, offset)[0]
+        if tag == _MAPPING:
+            return SnapshotMapping(self, offset)
+        if tag == _LIST:
+            return SnapshotList(self, offset)
+        if tag == _FLOAT:
+            return _F64.unpack_from(buf, offset)[0]
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _NONE:
+            return None
+        (size,) = _U32.unpack_from(buf, offset)
+        data = buf[offset + 4 : offset + 4 + size].tobytes()
+        if tag == _BYTES:
+            return data
+        if tag == _BIG_INT:
+            return int(data)
+        if tag in _ISO_TYPES:
+            return _ISO_TYPES[tag].fromisoformat(data.decode())
+        raise SnapshotError(f"Unknown value tag {tag!r} in snapshot")
+
+    def _key_bytes(self, offset: int) -> bytes:
+        (size,) = _U32.unpack_from(self._buf, offset + 1)
+        return self._buf[offset + 5 : offset + 5 + size].tobytes()
+
+
+class SnapshotMapping(Mapping):
+    """A read-only mapping in a Snapshot, in the order of the original mapping. Keys are
+    looked up by binary search."""
+
+    __slots__ = ("_snapshot", "_offset", "_len")
+
+    def __init__(self, snapshot: Snapshot, offset: int):
+        self._snapshot = snapshot
+        (self._len,) = _U32.unpack_from(snapshot._buf, offset)
+        self._offset = offset + 4
+        """Offset of the first (key offset, value offset) pair"""
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        snapshot = self._snapshot
+        for index in range(self._len):
+            yield snapshot._read(self._item_offsets(index)[0])
+
+    def __getitem__(self, key: str) -> Any:
+        if not isinstance(key, str):
+            raise KeyError(key)
+        snapshot = self._snapshot
+        key_bytes = key.encode()
+        sorted_offset = self._offset + 8 * self._len
+        low, high = 0, self._len
+        while low < high:
+            middle = (low + high) // 2
+            (index,) = _U32.unpack_from(snapshot._buf, sorted_offset + 4 * middle)
+            key_offset, value_offset = self._item_offsets(index)
+            middle_key = snapshot._key_bytes(key_offset)
+            if middle_key == key_bytes:
+                return snapshot._read(value_offset)
+            if middle_key < key_bytes:
+                low = middle + 1
+            else:
+                high = middle
+        raise KeyError(key)
+
+    def __repr__(self) -> str:
+        return f"SnapshotMapping({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy the mapping, and all the mappings and lists in it, into a dict"""
+        return _to_python(self)
+
+    def _item_offsets(self, index: int) -> Tuple[int, int]:
+        return _ITEM.unpack_from(self._snapshot._buf, self._offset + 8 * index)
+
+
+_ITEM = struct.Struct("<II")
+
+
+class SnapshotList(Sequence):
+    """A read-only list in a Snapshot"""
+
+    __slots__ = ("_snapshot", "_offset", "_len")
+
+    def __init__(self, snapshot: Snapshot, offset: int):
+        self._snapshot = snapshot
+        (self._len,) = _U32.unpack_from(snapshot._buf, offset)
+        self._offset = offset + 4
+
+    def __len__(self) -> int:
+        return self._len
+
+    @typing.overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @typing.overload
+    def __getitem__(self, index: slice) -> List[Any]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SnapshotList index out of range")
+        (offset,) = _U32.unpack_from(self._snapshot._buf, self._offset + 4 * index)
+        return self._snapshot._read(offset)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, tuple, SnapshotList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SnapshotList({self.to_list()!r})"
+
+    def to_list(self) -> List[Any]:
+        """Copy the list, and all the mappings and lists in it, into a list"""
+        return _to_python(self)
+
+
+def _to_python(value: Any) -> Any:
+    result = [value]
+    to_visit: List[Tuple[Any, Any]] = [(result, 0)]
+    while to_visit:
+        parent, key = to_visit.pop()
+        item = parent[key]
+        if isinstance(item, SnapshotMapping):
+            parent[key] = item = dict(item.items())
+            to_visit.extend((item, item_key) for item_key in item)
+        elif isinstance(item, SnapshotList):
+            parent[key] = item = list(item)
+            to_visit.extend((item, index) for index in range(len(item)))
+    return result[0]
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.buf = bytearray(_MAGIC + bytes(4))
+        self._offsets: Dict[Any, int] = {}
+        """Offsets of values already written: strings by value, containers by id"""
+        self._objects: List[Any] = []
+        """Keep containers alive so their ids aren't reused while writing"""
+
+    def write(self, config: ConfigDict) -> bytearray:
+        # Containers are written before the values in them, with their offsets filled
+        # in as each value is written
+        to_write: List[Tuple[Any, int]] = [(config, len(_MAGIC))]
+        while to_write:
+            value, slot = to_write.pop()
+            _U32.pack_into(self.buf, slot, self._write_value(value, to_write))
+        if len(self.buf) > _MAX_SIZE:
+            raise SnapshotError("Snapshots can't be larger than 4 GiB")
+        return self.buf
+
+    def _write_value(self, value: Any, to_write: List[Tuple[Any, int]]) -> int:
+        buf = self.buf
+        key: Any = id(value)
+        if isinstance(value, str):
+            key = (str, value)
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        offset = len(buf)
+        if isinstance(value, str):
+            self._offsets[key] = offset
+            self._write_sized(_STR, value.encode())
+        elif value is None:
+            buf += _NONE
+        elif value is True:
+            buf += _TRUE
+        elif value is False:
+            buf += _FALSE
+        elif isinstance(value, int):
+            if -(2**63) <= value < 2**63:
+                buf += _INT + _I64.pack(value)
+            else:
+                self._write_sized(_BIG_INT, str(value).encode())
+        elif isinstance(value, float):
+            buf += _FLOAT + _F64.pack(value)
+        elif isinstance(value, (bytes, bytearray)):
+            self._write_sized(_BYTES, bytes(value))
+        elif isinstance(value, datetime.datetime):
+            self._write_sized(_DATETIME, value.isoformat().encode())
+        elif isinstance(value, datetime.date):
+            self._write_sized(_DATE, value.isoformat().encode())
+        elif isinstance(value, datetime.time):
+            self._write_sized(_TIME, value.isoformat().encode())
+        elif isinstance(value, (list, tuple)):
+            self._remember(key, value, offset)
+            buf += _LIST + _U32.pack(len(value))
+            start = len(buf)
+            buf += bytes(4 * len(value))
+            to_write.extend((item, start + 4 * i) for i, item in enumerate(value))
+        elif isinstance(value, Mapping):
+            self._remember(key, value, offset)
+            self._write_mapping(value, to_write)
+        else:
+            raise TypeError(f"Can't store {type(value).__name__} in a snapshot")
+        return offset
+
+    def _write_mapping(self, value: Mapping, to_write: List[Tuple[Any, int]]) -> None:
+        buf = self.buf
+        keys = list(value)
+        for key in keys:
+            if not isinstance(key, str):
+                raise TypeError(f"Snapshot mapping keys must be strings, not {key!r}")
+        buf += _MAPPING + _U32.pack(len(keys))
+        start = len(buf)
+        buf += bytes(8 * len(keys))
+        sorted_indexes = sorted(range(len(keys)), key=lambda i: keys[i].encode())
+        buf += b"".join(_U32.pack(i) for i in sorted_indexes)
+        for i, key in enumerate(keys):
+            to_write.append((key, start + 8 * i))
+            to_write.append((value[key], start + 8 * i + 4))
+
+    def _write_sized(self, tag: bytes, data: bytes) -> None:
+        self.buf += tag + _U32.pack(len(data)) + data
+
+    def _remember(self, key: Any, value: Any, offset: int) -> None:
+        self._offsets[key] = offset
+        self._objects.append(value)
@@ -0,0 +1,316 @@
+"""sources.py - Where config files come from: the filesystem, or an in-memory mapping or
+package resources, where relative paths to sub-config files are resolved within the
+source"""
+
+import copy
+import importlib
+import os
+import posixpath
+import stat
+import sys
+import time
+from pathlib import Path, PurePath, PurePosixPath
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple, Union
+
+from nested_config._types import ConfigDict, PathLike
+from nested_config.loaders import (
+    ConfigCache,
+    ConfigLoaderError,
+    load_config,
+    parse_config,
+)
+from nested_config.trace import EventKind, ExpansionObserver, _emit
+
+ConfigData = Union[bytes, str, ConfigDict]
+"""The contents of a config file (or an already-parsed config dict)"""
+
+
+class ConfigSource:
+    """Base class for sources of config files. A ConfigExpander uses its source to turn
+    paths into config dicts."""
+
+    def make_path(self, config_path: PathLike) -> PurePath:
+        """Convert a path provided by the user to this source's path type"""
+        raise NotImplementedError
+
+    def resolve(self, path_str: str, parent_path: PurePath) -> PurePath:
+        """Convert a path string found in the config file at `parent_path` to a path,
+        relative to `parent_path` if it's not absolute, and check that the config file
+        exists.
+
+        Raises
+        ------
+        FileNotFoundError
+            There is no config file at the path
+        """
+        raise NotImplementedError
+
+    def resolver(self) -> "PathResolver":
+        """Make a PathResolver to resolve the path strings in one expansion"""
+        return PathResolver(self)
+
+    def load(
+        self,
+        config_path: PurePath,
+        default_suffix: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        observer: Optional[ExpansionObserver] = None,
+    ) -> ConfigDict:
+        """Load a config file into a config dict, sending an event for each step of
+        loading to `observer` if provided
+
+        Raises
+        ------
+        NoLoaderError
+            No loader could be found for the suffix (or default suffix, if provided)
+        ConfigLoaderError
+            There was an error loading the config file
+        """
+        raise NotImplementedError
+
+
+class FileSystemSource(ConfigSource):
+    """Config files on the filesystem, loaded with `nested_config.config_dict_loaders`.
+    This is the default source."""
+
+    def make_path(self, config_path: PathLike) -> Path:
+        return Path(config_path)
+
+    def resolve(self, path_str: str, parent_path: PurePath) -> Path:
+        return _resolve_path_str(path_str, Path(parent_path))
+
+    def resolver(self) -> "PathResolver":
+        return _FileSystemResolver(self)
+
+    def load(
+        self,
+        config_path: PurePath,
+        default_suffix: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        observer: Optional[ExpansionObserver] = None,
+    ) -> ConfigDict:
+        return load_config(
+            Path(config_path), default_suffix, cache=cache, observer=observer
+        )
+
+
+class VirtualSource(ConfigSource):
+    """Base class for sources with their own tree of POSIX-style paths, rooted at '/'.
+    Config file contents are parsed with `nested_config.loaders.config_dict_parsers`.
+    Subclasses implement _is_file and _read."""
+
+    def make_path(self, config_path: PathLike) -> PurePosixPath:
+        return _normalize(PurePosixPath("/") / str(config_path))
+
+    def resolve(self, path_str: str, parent_path: PurePath) -> PurePosixPath:
+        path = _normalize(PurePosixPath(parent_path).parent / path_str)
+        if not self._is_file(path):
+            raise FileNotFoundError(_not_found_message(path_str, parent_path))
+        return path
+
+    def load(
+        self,
+        config_path: PurePath,
+        default_suffix: Optional[str] = None,
+        cache: Optional[ConfigCache] = None,
+        observer: Optional[ExpansionObserver] = None,
+    ) -> ConfigDict:
+        path = PurePosixPath(config_path)
+        start = time.perf_counter()
+        try:
+            data = self._read(path)
+        except Exception as ex:
+            raise ConfigLoaderError(path) from ex
+        if observer is not None:
+            nbytes = None if isinstance(data, dict) else len(data)
+            _emit(observer, EventKind.READ, path, start, nbytes=nbytes)
+        if isinstance(data, dict):
+            return copy.deepcopy(data)
+        return parse_config(
+            data, path.suffix, default_suffix, config_path=path, observer=observer
+        )
+
+    def _is_file(self, path: PurePosixPath) -> bool:
+        raise NotImplementedError
+
+    def _read(self, path: PurePosixPath) -> ConfigData:
+        raise NotImplementedError
+
+
+class MappingSource(VirtualSource):
+    """Config files held in memory, in a mapping of path to contents. Contents may be
+    bytes, str, or an already-parsed config dict. Paths are POSIX-style and are relative
+    to the root of the source, e.g.
+
+    ```
+    MappingSource({
+        "house.toml": 'name = "my house"\\ndimensions = "dims/house.toml"',
+        "dims/house.toml": {"length": 10, "width": 20},
+    })
+    ```
+    """
+
+    def __init__(self, files: Mapping[str, ConfigData]):
+        self.files = {str(self.make_path(path)): data for path, data in files.items()}
+
+    def _is_file(self, path: PurePosixPath) -> bool:
+        return str(path) in self.files
+
+    def _read(self, path: PurePosixPath) -> ConfigData:
+        return self.files[str(path)]
+
+
+class ResourceSource(VirtualSource):
+    """Config files in a package's resources (see `importlib.resources`), or under any
+    `importlib.resources.abc.Traversable`. Paths are relative to the package (or
+    Traversable)."""
+
+    def __init__(self, root: Any):
+        """root is a package (module or name) or a Traversable
+
+        Raises
+        ------
+        ValueError
+            (Python 3.8 only) The package isn't a directory on the filesystem
+        """
+        if not hasattr(root, "joinpath"):
+            if sys.version_info >= (3, 9):
+                import importlib.resources
+
+                root = importlib.resources.files(root)
+            else:
+                root = _package_directory(root)
+        self.root = root
+
+    def _traversable(self, path: PurePosixPath):
+        traversable = self.root
+        for part in path.parts[1:]:
+            traversable = traversable.joinpath(part)
+        return traversable
+
+    def _is_file(self, path: PurePosixPath) -> bool:
+        return self._traversable(path).is_file()
+
+    def _read(self, path: PurePosixPath) -> ConfigData:
+        return self._traversable(path).read_bytes()
+
+
+def _package_directory(package: Any) -> Path:
+    """The directory of a package (module or name), for Python 3.8, which has no
+    `importlib.resources.files`
+
+    Raises
+    ------
+    ValueError
+        The package isn't a directory on the filesystem (e.g. it's in a zip file)
+    """
+    module = importlib.import_module(package) if isinstance(package, str) else package
+    module_file = getattr(module, "__file__", None)
+    if module_file is None or not os.path.isfile(module_file):
+        raise ValueError(
+            f"Package {module.__name__!r} isn't on the filesystem. With Python 3.8,"
+            " ResourceSource can only read the resources of packages in directories."
+        )
+    return Path(module_file).parent
+
+
+class PathResolver:
+    """Resolves the path strings found during one expansion with a ConfigSource,
+    remembering each resolved path so that the same path string in config files in the
+    same directory is only resolved once. Also identifies config files so that one
+    reached by several paths is only expanded once (per model) in an expansion."""
+
+    def __init__(self, source: ConfigSource):
+        self.source = source
+        self._paths: Dict[Tuple[str, PurePath], PurePath] = {}
+
+    def resolve(self, path_str: str, parent_path: PurePath) -> PurePath:
+        """ConfigSource.resolve, remembered for the directory of `parent_path`
+
+        Raises
+        ------
+        FileNotFoundError
+            There is no config file at the path
+        """
+        key = (path_str, parent_path.parent)
+        path = self._paths.get(key)
+        if path is None:
+            path = self._paths[key] = self._resolve(path_str, parent_path)
+        return path
+
+    def file_id(self, path: PurePath) -> Hashable:
+        """Identify the config file at `path`. Paths with the same id must be the same
+        file, with relative paths in it resolving to the same files. By default, the path
+        itself."""
+        return path
+
+    def _resolve(self, path_str: str, parent_path: PurePath) -> PurePath:
+        return self.source.resolve(path_str, parent_path)
+
+
+class _FileSystemResolver(PathResolver):
+    """A PathResolver that stats each file and directory at most once, and identifies a
+    config file by the device and inode of the file and of its directory, so that paths
+    through symlinks or '..' to the same file share an id"""
+
+    def __init__(self, source: ConfigSource):
+        super().__init__(source)
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+
+    def file_id(self, path: PurePath) -> Hashable:
+        file_stat = self._stat(path)
+        dir_stat = self._stat(path.parent)
+        if file_stat is None or dir_stat is None:
+            return path
+        return (file_stat.st_dev, file_stat.st_ino, dir_stat.st_dev, dir_stat.st_ino)
+
+    def _resolve(self, path_str: str, parent_path: PurePath) -> Path:
+        path = _join_path_str(path_str, Path(parent_path))
+        file_stat = self._stat(path)
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(_not_found_message(path_str, parent_path))
+        return path
+
+    def _stat(self, path: PurePath) -> Optional[os.stat_result]:
+        key = os.fspath(path)
+        try:
+            return self._stats[key]
+        except KeyError:
+            pass
+        try:
+            result: Optional[os.stat_result] = os.stat(key)
+        except (OSError, ValueError):
+            result = None
+        self._stats[key] = result
+        return result
+
+
+def _normalize(path: PurePosixPath) -> PurePosixPath:
+    """Collapse '..' and '.' in a virtual path (there are no symlinks to worry about)"""
+    return PurePosixPath(posixpath.normpath(str(path)))
+
+
+def _not_found_message(path_str: str, parent_path: PurePath) -> str:
+    return (
+        f"Config file '{parent_path}' contains a path to another config file"
+        f" '{path_str}' that could not be found."
+    )
+
+
+def _resolve_path_str(path_str: str, parent_path: Path) -> Path:
+    """Convert a path string to a path, relative to the parent config path if it's not
+    absolute, and check that the config file exists."""
+    path = _join_path_str(path_str, parent_path)
+    if not path.is_file():
+        raise FileNotFoundError(_not_found_message(path_str, parent_path))
+    return path
+
+
+def _join_path_str(path_str: str, parent_path: Path) -> Path:
+    """Convert a path string to a path, relative to the parent config path if it's not
+    absolute"""
+    path = Path(path_str)
+    if not path.is_absolute():
+        # Assume it's relative to the parent config path
+        path = parent_path.parent / path
+    return path
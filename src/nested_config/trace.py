@@ -0,0 +1,211 @@
+"""trace.py - Timing events emitted by each step of expanding config files, and a
+collector that summarizes them and exports them as a Chrome trace"""
+
+import enum
+import json
+import os
+import threading
+import time
+from pathlib import PurePath
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from nested_config._types import PathLike
+
+
+class EventKind(enum.Enum):
+    """The step of expansion that an ExpansionEvent times"""
+
+    RESOLVE = "resolve"
+    """Converting a path string in a config file to a path and checking that it exists"""
+    STAT = "stat"
+    """Checking whether a cached config file has changed (only with a ConfigCache)"""
+    READ = "read"
+    """Reading the contents of a config file"""
+    PARSE = "parse"
+    """Parsing the contents of a config file (for loaders that aren't built in, reading
+    and parsing)"""
+    EXPAND = "expand"
+    """Loading and expanding a config file and all its sub-config files"""
+
+
+class ExpansionEvent(NamedTuple):
+    """One timed step of expanding config files"""
+
+    kind: EventKind
+    path: PurePath
+    """The config file"""
+    start: float
+    """`time.perf_counter()` when the step started"""
+    duration: float
+    """Duration of the step, in seconds"""
+    thread_id: int
+    """`threading.get_ident()` of the thread that ran the step"""
+    nbytes: Optional[int] = None
+    """Size of the config file, for STAT, READ, and PARSE events"""
+    model: Optional[type] = None
+    """The model the config file was expanded with, for EXPAND events"""
+    loader: Optional[str] = None
+    """The name of the loader or parser backend, for PARSE events, e.g. 'toml:tomllib'"""
+
+
+ExpansionObserver = Callable[[ExpansionEvent], None]
+"""A function that is called with each ExpansionEvent (possibly from several threads)"""
+
+
+def _emit(
+    observer: ExpansionObserver,
+    kind: EventKind,
+    path: PurePath,
+    start: float,
+    **fields: Any,
+) -> None:
+    """Send an event for a step that started at `start` and has just finished"""
+    duration = time.perf_counter() - start
+    observer(ExpansionEvent(kind, path, start, duration, threading.get_ident(), **fields))
+
+
+class FileTiming(NamedTuple):
+    """The time spent loading one config file, as summarized by TraceCollector"""
+
+    path: PurePath
+    loader: Optional[str]
+    nbytes: Optional[int]
+    load_time: float
+    """Total seconds spent resolving, stat-ing, reading, and parsing the file"""
+    parse_time: float
+    expand_time: float
+    """Total seconds spent expanding the file, including its sub-config files"""
+
+
+class TraceCollector:
+    """An observer that records every ExpansionEvent, for a table of the slowest config
+    files or export as a Chrome trace (viewable in Perfetto or chrome://tracing).
+
+    ```
+    collector = TraceCollector()
+    config = expand_config("app.toml", AppConfig, observer=collector)
+    print(collector.summary())
+    collector.write_chrome_trace("expand_trace.json")
+    ```
+
+    A TraceCollector is safe to use from multiple threads.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[ExpansionEvent] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: ExpansionEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def clear(self) -> None:
+        """Forget all the recorded events"""
+        with self._lock:
+            self.events.clear()
+
+    def file_timings(self) -> List[FileTiming]:
+        """Time spent on each config file, slowest to load first"""
+        with self._lock:
+            events = list(self.events)
+        timings: Dict[PurePath, Dict[str, Any]] = {}
+        for event in events:
+            timing = timings.setdefault(
+                event.path,
+                {
+                    "loader": None,
+                    "nbytes": None,
+                    "load": 0.0,
+                    "parse": 0.0,
+                    "expand": 0.0,
+                },
+            )
+            if event.kind is EventKind.EXPAND:
+                timing["expand"] += event.duration
+                continue
+            timing["load"] += event.duration
+            if event.nbytes is not None:
+                timing["nbytes"] = event.nbytes
+            if event.kind is EventKind.PARSE:
+                timing["parse"] += event.duration
+                timing["loader"] = event.loader
+        return sorted(
+            (
+                FileTiming(
+                    path,
+                    t["loader"],
+                    t["nbytes"],
+                    t["load"],
+                    t["parse"],
+                    t["expand"],
+                )
+                for path, t in timings.items()
+            ),
+            key=lambda timing: timing.load_time,
+            reverse=True,
+        )
+
+    def summary(self, n: Optional[int] = 10) -> str:
+        """A table of the `n` slowest config files to load (or all of them if n is None)
+        followed by the total time and bytes parsed by each loader"""
+        timings = self.file_timings()
+        lines = [
+            f"{'load ms':>9} {'parse ms':>9} {'expand ms':>10} {'bytes':>9}"
+            f"  {'loader':16} file"
+        ]
+        for timing in timings[:n]:
+            nbytes = "" if timing.nbytes is None else timing.nbytes
+            lines.append(
+                f"{timing.load_time * 1000:9.2f} {timing.parse_time * 1000:9.2f}"
+                f" {timing.expand_time * 1000:10.2f} {nbytes:>9}"
+                f"  {timing.loader or '':16} {timing.path}"
+            )
+        by_loader: Dict[str, List[FileTiming]] = {}
+        for timing in timings:
+            if timing.loader is not None:
+                by_loader.setdefault(timing.loader, []).append(timing)
+        lines.append("")
+        lines.append(f"{'loader':16} {'files':>6} {'bytes':>10} {'parse ms':>9}")
+        for loader, loader_timings in by_loader.items():
+            nbytes_total = sum(timing.nbytes or 0 for timing in loader_timings)
+            parse_time = sum(timing.parse_time for timing in loader_timings)
+            lines.append(
+                f"{loader:16} {len(loader_timings):6d} {nbytes_total:10d}"
+                f" {parse_time * 1000:9.2f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """The recorded events in the Chrome trace event format"""
+        with self._lock:
+            events = list(self.events)
+        origin = min((event.start for event in events), default=0.0)
+        pid = os.getpid()
+        trace_events = []
+        for event in events:
+            args: Dict[str, Any] = {"path": str(event.path)}
+            if event.nbytes is not None:
+                args["bytes"] = event.nbytes
+            if event.model is not None:
+                args["model"] = f"{event.model.__module__}.{event.model.__qualname__}"
+            if event.loader is not None:
+                args["loader"] = event.loader
+            trace_events.append(
+                {
+                    "name": f"{event.kind.value} {event.path.name}",
+                    "cat": event.kind.value,
+                    "ph": "X",
+                    "ts": (event.start - origin) * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": pid,
+                    "tid": event.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: PathLike) -> None:
+        """Write the recorded events to a JSON file that can be opened in Perfetto
+        (https://ui.perfetto.dev) or chrome://tracing"""
+        with open(path, "w") as fobj:
+            json.dump(self.chrome_trace(), fobj)
@@ -0,0 +1,80 @@
+"""Test expanding many root config files in a batch"""
+
+import pickle
+from pathlib import Path
+
+import pytest
+from test_sub_model import (
+    HOUSE_DIMENSIONS,
+    HOUSE_TOML_BAD_DIMPATH_PATH,
+    HOUSE_TOML_PATH,
+    HOUSE_WITH_GARAGE_TOML_PATH,
+    House,
+    write_json,
+)
+
+from nested_config import (
+    ConfigCache,
+    ConfigLoaderError,
+    NoLoaderError,
+    batch,
+    expand_many,
+    iter_expand_many,
+)
+
+PATHS = [HOUSE_TOML_PATH, HOUSE_TOML_BAD_DIMPATH_PATH, HOUSE_WITH_GARAGE_TOML_PATH]
+
+
+def _check_results(results):
+    assert [result.path for result in results] == PATHS
+    assert results[0].error is None
+    assert results[0].config["dimensions"] == HOUSE_DIMENSIONS
+    assert isinstance(results[1].error, FileNotFoundError)
+    assert results[1].config is None
+    # House has no garage field
+    assert results[2].error is not None
+
+
+def test_serial_shares_cache():
+    cache = ConfigCache()
+    results = expand_many([HOUSE_TOML_PATH] * 3, House, cache=cache)
+    assert all(result.config == results[0].config for result in results)
+    assert (cache.hits, cache.misses) == (4, 2)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_errors_are_per_root(workers):
+    _check_results(expand_many(PATHS, House, workers=workers))
+
+
+def test_process_pool():
+    _check_results(expand_many(PATHS, House, workers=2, processes=True))
+
+
+def test_default_cache_is_bounded(tmp_path, monkeypatch):
+    caches = []
+
+    class RecordedCache(ConfigCache):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            caches.append(self)
+
+    monkeypatch.setattr(batch, "ConfigCache", RecordedCache)
+    monkeypatch.setattr(batch, "DEFAULT_CACHE_ENTRIES", 3)
+    roots = [write_json(tmp_path / f"house{i}.json", name=str(i)) for i in range(10)]
+    for result in iter_expand_many(roots, House):
+        assert result.error is None
+    (cache,) = caches
+    assert len(cache) == 3
+
+
+def test_unordered_stream():
+    results = list(iter_expand_many(PATHS, House, workers=3, ordered=False))
+    assert sorted(result.path for result in results) == sorted(PATHS)
+
+
+def test_loader_errors_pickle():
+    error = pickle.loads(pickle.dumps(ConfigLoaderError(Path("a.toml"))))
+    assert str(error) == str(ConfigLoaderError(Path("a.toml")))
+    error = pickle.loads(pickle.dumps(NoLoaderError(".abc", ".toml")))
+    assert str(error) == str(NoLoaderError(".abc", ".toml"))
@@ -0,0 +1,119 @@
+"""Test bundling a tree of config files into a single file"""
+
+import hashlib
+import json
+import math
+import sys
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, TOML_DIR, Neighborhood
+
+from nested_config import TraceCollector, expand_config
+from nested_config.bundle import read_manifest, write_bundle
+from nested_config.cli import main
+from nested_config.expand import ConfigExpander
+from nested_config.trace import EventKind
+
+
+def test_bundle_cli(tmp_path, capsys):
+    bundle_path = tmp_path / "neighborhood.json"
+    snapshot_path = tmp_path / "neighborhood.ncsnap"
+    status = main(
+        [
+            "bundle",
+            str(NEIGHBORHOOD_TOML_PATH),
+            "--model",
+            "test_sub_model:Neighborhood",
+            "-o",
+            str(bundle_path),
+            "--snapshot",
+            str(snapshot_path),
+        ]
+    )
+    assert status == 0
+    assert str(bundle_path) in capsys.readouterr().out
+    for path in (bundle_path, snapshot_path):
+        collector = TraceCollector()
+        assert expand_config(path, Neighborhood, observer=collector) == NEIGHBORHOOD
+        # One read, no sub-config files
+        assert [e.kind for e in collector.events].count(EventKind.PARSE) == 1
+
+
+def test_manifest(tmp_path):
+    bundle_path = tmp_path / "neighborhood.json"
+    result = write_bundle(NEIGHBORHOOD_TOML_PATH, Neighborhood, bundle_path)
+    assert json.loads(bundle_path.read_bytes()) == NEIGHBORHOOD
+    manifest = read_manifest(bundle_path)
+    assert manifest["model"] == "test_sub_model:Neighborhood"
+    assert manifest["root"] == str(NEIGHBORHOOD_TOML_PATH.resolve())
+    sources = {source["path"]: source for source in manifest["sources"]}
+    assert len(sources) == len(result.sources) > 1
+    garage_path = (TOML_DIR / "garage.toml").resolve()
+    assert (
+        sources[str(garage_path)]["sha256"]
+        == hashlib.sha256(garage_path.read_bytes()).hexdigest()
+    )
+
+
+def test_shared_config(tmp_path):
+    bundle_path = tmp_path / "neighborhood.json"
+    write_bundle(
+        NEIGHBORHOOD_TOML_PATH,
+        Neighborhood,
+        bundle_path,
+        expander=ConfigExpander(shared=True),
+    )
+    assert expand_config(bundle_path, Neighborhood) == NEIGHBORHOOD
+
+
+def test_bad_model(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        main(["bundle", "x.toml", "-m", "test_sub_model", "-o", str(tmp_path / "x")])
+    assert "module:QualifiedName" in capsys.readouterr().err
+    status = main(
+        [
+            "bundle",
+            "missing.toml",
+            "-m",
+            "test_sub_model:Neighborhood",
+            "-o",
+            str(tmp_path / "x"),
+        ]
+    )
+    assert status == 1
+    assert "missing.toml" in capsys.readouterr().err
+
+
+class Numbers:
+    huge: int
+    infinite: float
+    not_a_number: float
+
+
+def test_unusual_numbers(tmp_path):
+    config_path = tmp_path / "numbers.yaml"
+    config_path.write_text(f"huge: {2**70}\ninfinite: .inf\nnot_a_number: .nan\n")
+    bundle_path = tmp_path / "numbers.json"
+    write_bundle(config_path, Numbers, bundle_path)
+    config = expand_config(bundle_path, Numbers)
+    assert config["huge"] == 2**70
+    assert config["infinite"] == math.inf
+    assert math.isnan(config["not_a_number"])
+
+
+def test_model_in_current_directory(tmp_path, monkeypatch):
+    (tmp_path / "cwd_models.py").write_text("class Config:\n    name: str\n")
+    (tmp_path / "config.toml").write_text('name = "app"\n')
+    monkeypatch.chdir(tmp_path)
+    # As in the console script, whose sys.path doesn't have the current directory
+    monkeypatch.setattr(
+        sys, "path", [p for p in sys.path if p not in ("", str(tmp_path))]
+    )
+    try:
+        assert (
+            main(["bundle", "config.toml", "-m", "cwd_models:Config", "-o", "b.json"])
+            == 0
+        )
+    finally:
+        sys.modules.pop("cwd_models", None)
+    assert json.loads((tmp_path / "b.json").read_bytes()) == {"name": "app"}
@@ -0,0 +1,83 @@
+"""Test the mtime-validated LRU ConfigCache"""
+
+import os
+from pathlib import Path
+
+from nested_config import ConfigCache, expand_config
+from nested_config.loaders import load_config
+
+TOML_DIR = Path(__file__).parent / "toml_files"
+
+
+class Dimensions:
+    length: int
+    width: int
+    height: int
+
+
+class House:
+    name: str
+    dimensions: Dimensions
+
+
+def _write(path: Path, text: str, mtime_ns: int):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_cache_hits_and_misses():
+    cache = ConfigCache()
+    house = expand_config(TOML_DIR / "house.toml", House, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert expand_config(TOML_DIR / "house.toml", House, cache=cache) == house
+    assert (cache.hits, cache.misses) == (2, 2)
+    assert len(cache) == 2
+
+
+def test_cache_returns_copies():
+    cache = ConfigCache()
+    path = TOML_DIR / "simple_house.toml"
+    load_config(path, cache=cache)["name"] = "changed"
+    assert load_config(path, cache=cache)["name"] == "home"
+
+
+def test_cache_reloads_changed_file(tmp_path: Path):
+    cache = ConfigCache()
+    path = tmp_path / "a.toml"
+    _write(path, "x = 1", 1_000_000_000)
+    assert load_config(path, cache=cache) == {"x": 1}
+    _write(path, "x = 2", 2_000_000_000)
+    assert load_config(path, cache=cache) == {"x": 2}
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(cache) == 1
+
+
+def test_cache_invalidate_and_clear(tmp_path: Path):
+    cache = ConfigCache()
+    path = tmp_path / "a.toml"
+    path.write_text("x = 1")
+    load_config(path, cache=cache)
+    cache.invalidate(str(path))
+    assert len(cache) == 0
+    load_config(path, cache=cache)
+    assert cache.misses == 2
+    cache.clear()
+    assert (len(cache), cache.nbytes, cache.hits, cache.misses) == (0, 0, 0, 0)
+
+
+def test_cache_lru_limits(tmp_path: Path):
+    paths = [tmp_path / f"{i}.toml" for i in range(3)]
+    for i, path in enumerate(paths):
+        path.write_text(f"x = {i}")
+    cache = ConfigCache(max_entries=2)
+    for path in paths:
+        load_config(path, cache=cache)
+    assert len(cache) == 2
+    load_config(paths[0], cache=cache)  # evicted, so a miss
+    assert cache.misses == 4
+    max_bytes = paths[0].stat().st_size * 2
+    cache = ConfigCache(max_entries=None, max_bytes=max_bytes)
+    for path in paths:
+        load_config(path, cache=cache)
+    assert len(cache) == 2
+    assert cache.nbytes <= max_bytes
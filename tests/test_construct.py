@@ -0,0 +1,84 @@
+"""Test loading config files directly into model instances"""
+
+import dataclasses
+from typing import Dict, List, NamedTuple, Optional
+
+import pytest
+from test_sub_model import NEIGHBORHOOD_TOML_PATH, Neighborhood, write_json
+
+import nested_config
+from nested_config import ConfigExpansionError, expand_config
+
+
+@dataclasses.dataclass
+class Leaf:
+    name: str
+    size: int = 1
+
+
+@dataclasses.dataclass
+class Branch:
+    leaf: Leaf
+    note: str
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+class Tree:
+    branches: List[Branch]
+    points: Dict[str, Point]
+    trunk: Optional[Leaf]
+
+
+def test_load(tmp_path):
+    write_json(tmp_path / "leaf.json", name="leaf")
+    write_json(tmp_path / "branch.json", leaf="leaf.json", note="s")
+    root = write_json(
+        tmp_path / "tree.json",
+        branches=["branch.json", {"leaf": {"name": "inline", "size": 3}, "note": "t"}],
+        points={"origin": {"x": 0, "y": 0}},
+        trunk="leaf.json",
+    )
+    tree = nested_config.load(root, Tree)
+    assert type(tree) is Tree
+    assert tree.branches == [Branch(Leaf("leaf"), "s"), Branch(Leaf("inline", 3), "t")]
+    assert tree.points == {"origin": Point(0, 0)}
+    assert tree.trunk == Leaf("leaf")
+    # Each reference to a config file gets its own instance
+    assert tree.trunk is not tree.branches[0].leaf
+
+
+def test_attrs_classes(tmp_path):
+    attrs = pytest.importorskip("attrs")
+
+    @attrs.define
+    class Secret:
+        leaf: Leaf
+        _secret: str
+
+    write_json(tmp_path / "leaf.json", name="leaf")
+    root = write_json(tmp_path / "secret.json", leaf="leaf.json", _secret="s")
+    assert nested_config.load(root, Secret) == Secret(Leaf("leaf"), "s")
+
+
+def test_plain_classes():
+    neighborhood = nested_config.load(NEIGHBORHOOD_TOML_PATH, Neighborhood)
+    assert type(neighborhood) is Neighborhood
+    expected = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood)
+    assert neighborhood.name == expected["name"]
+    house = neighborhood.houses[1]
+    assert house.name == "my house"
+    assert (
+        house.garage.dimensions.height
+        == expected["houses"][1]["garage"]["dimensions"]["height"]
+    )
+
+
+def test_constructor_error(tmp_path):
+    write_json(tmp_path / "leaf.json", size=2)
+    root = write_json(tmp_path / "tree.json", branches=[], points={}, trunk="leaf.json")
+    with pytest.raises(ConfigExpansionError, match="leaf.json"):
+        nested_config.load(root, Tree)
@@ -0,0 +1,81 @@
+"""Test the persistent on-disk cache of expanded config dicts"""
+
+import os
+from pathlib import Path
+
+import pytest
+from test_sub_model import (
+    HOUSE_WITH_GARAGE_TOML_PATH,
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    Dimensions,
+    HouseWithGarage,
+    Neighborhood,
+)
+
+from nested_config import DiskCache, expand_config
+
+
+class Garage:
+    name: str
+    dimensions: Dimensions
+
+
+def _set_mtime(path: Path, mtime_ns: int):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_hit_and_miss(tmp_path: Path):
+    cache = DiskCache(tmp_path / "cache")
+    assert expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, disk_cache=cache) == (
+        NEIGHBORHOOD
+    )
+    assert (cache.hits, cache.misses) == (0, 1)
+    # A new DiskCache, like in a new process
+    cache = DiskCache(tmp_path / "cache")
+    assert expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, disk_cache=cache) == (
+        NEIGHBORHOOD
+    )
+    assert (cache.hits, cache.misses) == (1, 0)
+    # Different model, different entry
+    expand_config(HOUSE_WITH_GARAGE_TOML_PATH, HouseWithGarage, disk_cache=cache)
+    assert cache.misses == 1
+    cache.clear()
+    assert not list((tmp_path / "cache").iterdir())
+
+
+@pytest.mark.parametrize("hash_contents", [False, True])
+def test_changed_subconfig(tmp_path: Path, hash_contents: bool):
+    (tmp_path / "dims.toml").write_text("length = 1\nwidth = 2\nheight = 3")
+    (tmp_path / "garage.toml").write_text('name = "g"\ndimensions = "dims.toml"')
+    cache = DiskCache(tmp_path / "cache", hash_contents=hash_contents)
+    expand_config(tmp_path / "garage.toml", Garage, disk_cache=cache)
+    # Same contents, new mtime
+    _set_mtime(tmp_path / "dims.toml", 1_000_000_000)
+    expand_config(tmp_path / "garage.toml", Garage, disk_cache=cache)
+    assert cache.hits == (1 if hash_contents else 0)
+    (tmp_path / "dims.toml").write_text("length = 10\nwidth = 2\nheight = 3")
+    config = expand_config(tmp_path / "garage.toml", Garage, disk_cache=cache)
+    assert config["dimensions"]["length"] == 10
+    assert cache.misses == (2 if hash_contents else 3)
+
+
+def test_corrupt_entry(tmp_path: Path):
+    cache = DiskCache(tmp_path)
+    expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, disk_cache=cache)
+    for entry in tmp_path.glob("*.ncache"):
+        entry.write_bytes(b"garbage")
+    assert expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, disk_cache=cache) == (
+        NEIGHBORHOOD
+    )
+    assert cache.misses == 2
+
+
+def test_lazy_not_allowed(tmp_path: Path):
+    with pytest.raises(ValueError):
+        expand_config(  # type: ignore[call-overload]
+            NEIGHBORHOOD_TOML_PATH,
+            Neighborhood,
+            lazy=True,
+            disk_cache=DiskCache(tmp_path),
+        )
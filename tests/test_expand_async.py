@@ -0,0 +1,101 @@
+"""Test the asyncio expansion API"""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from test_expansion_engine import Node
+from test_sub_model import (
+    HOUSE_TOML_PATH,
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    House,
+    ItemList,
+    Neighborhood,
+    write_items,
+    write_json,
+)
+
+from nested_config import (
+    ConfigExpansionError,
+    ConfigLoaderError,
+    expand_config,
+    expand_config_async,
+)
+from nested_config.loaders import toml_load
+
+
+def test_neighborhood():
+    config = asyncio.run(expand_config_async(NEIGHBORHOOD_TOML_PATH, Neighborhood))
+    assert config == NEIGHBORHOOD
+
+
+def test_async_loader_and_concurrency_bound(tmp_path: Path):
+    names = write_items(tmp_path, 20)
+    (tmp_path / "root.toml").write_text(
+        "items = [" + ", ".join(f'"{name}"' for name in names) + "]"
+    )
+    loading = 0
+    max_loading = 0
+
+    async def slow_toml_load(path: Path):
+        nonlocal loading, max_loading
+        loading += 1
+        max_loading = max(loading, max_loading)
+        await asyncio.sleep(0.01)
+        loading -= 1
+        return toml_load(path)
+
+    config = asyncio.run(
+        expand_config_async(
+            tmp_path / "root.toml",
+            ItemList,
+            async_loaders={".toml": slow_toml_load},
+            max_concurrency=4,
+        )
+    )
+    assert config == expand_config(tmp_path / "root.toml", ItemList)
+    assert max_loading == 4
+
+
+def test_async_loader_error():
+    async def failing_load(path: Path):
+        raise ValueError(path)
+
+    with pytest.raises(ConfigLoaderError):
+        asyncio.run(
+            expand_config_async(
+                HOUSE_TOML_PATH, House, async_loaders={".toml": failing_load}
+            )
+        )
+
+
+def test_missing_file(tmp_path: Path):
+    (tmp_path / "root.toml").write_text('items = ["missing.toml"]')
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(expand_config_async(tmp_path / "root.toml", ItemList))
+
+
+def test_self_reference(tmp_path: Path):
+    write_json(tmp_path / "a.json", name="a", child="a.json")
+    with pytest.raises(ConfigExpansionError, match="cycle"):
+        asyncio.run(expand_config_async(tmp_path / "a.json", Node))
+
+
+def test_cycle(tmp_path: Path):
+    write_json(tmp_path / "a.json", name="a", children=["b.json", "b.json"])
+    write_json(tmp_path / "b.json", name="b", child="c.json")
+    write_json(tmp_path / "c.json", name="c", children=[{"name": "d", "child": "b.json"}])
+    with pytest.raises(ConfigExpansionError) as exc_info:
+        asyncio.run(expand_config_async(tmp_path / "a.json", Node))
+    chain = [tmp_path / "b.json", tmp_path / "c.json", tmp_path / "b.json"]
+    assert str(exc_info.value).endswith(" -> ".join(str(path) for path in chain))
+
+
+def test_repeated_reference_is_not_a_cycle(tmp_path: Path):
+    write_json(
+        tmp_path / "a.json", name="a", child="b.json", children=["b.json", "b.json"]
+    )
+    write_json(tmp_path / "b.json", name="b")
+    config = asyncio.run(expand_config_async(tmp_path / "a.json", Node))
+    assert config == expand_config(tmp_path / "a.json", Node)
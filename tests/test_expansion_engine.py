@@ -0,0 +1,83 @@
+"""Test the iterative expansion engine: deep trees and reference cycles"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import pytest
+from test_sub_model import write_json
+
+from nested_config import ConfigExpansionError, expand_config, expand_config_data
+
+
+class Node:
+    name: str
+    child: Optional["Node"]
+    children: List["Node"]
+
+
+def test_deep_chain_of_files(tmp_path):
+    depth = 3000
+    for i in range(depth):
+        child = {"child": f"{i + 1}.json"} if i + 1 < depth else {}
+        write_json(tmp_path / f"{i}.json", name=str(i), **child)
+    config = expand_config(tmp_path / "0.json", Node)
+    for i in range(depth):
+        assert config["name"] == str(i)
+        config = config.get("child")
+    assert config is None
+
+
+def test_deep_inline_nesting():
+    depth = 3000
+    config: dict = {"name": "leaf"}
+    for i in range(depth):
+        config = {"name": str(i), "children": [{"name": "x"}, config]}
+    expanded = expand_config_data(config, Node)
+    for i in reversed(range(depth)):
+        assert expanded["name"] == str(i)
+        expanded = expanded["children"][1]
+    assert expanded == {"name": "leaf"}
+
+
+def test_cycle(tmp_path):
+    write_json(tmp_path / "a.json", name="a", child="sub/b.json")
+    (tmp_path / "sub").mkdir()
+    write_json(tmp_path / "sub" / "b.json", name="b", children=["c.json"])
+    write_json(tmp_path / "sub" / "c.json", name="c", child="../a.json")
+    with pytest.raises(ConfigExpansionError) as exc_info:
+        expand_config(tmp_path / "a.json", Node)
+    message = str(exc_info.value)
+    chain = [
+        tmp_path / "a.json",
+        tmp_path / "sub" / "b.json",
+        tmp_path / "sub" / "c.json",
+        tmp_path / "sub" / ".." / "a.json",
+    ]
+    assert message.endswith(" -> ".join(str(path) for path in chain))
+
+
+def test_self_reference(tmp_path):
+    write_json(tmp_path / "a.json", name="a", child="a.json")
+    with pytest.raises(ConfigExpansionError, match="cycle"):
+        expand_config(tmp_path / "a.json", Node)
+
+
+def test_cycle_with_executor(tmp_path):
+    write_json(tmp_path / "a.json", name="a", children=["b.json", "a.json"])
+    write_json(tmp_path / "b.json", name="b")
+    with ThreadPoolExecutor(2) as executor, pytest.raises(ConfigExpansionError):
+        expand_config(tmp_path / "a.json", Node, executor=executor)
+
+
+def test_repeated_reference_is_not_a_cycle(tmp_path):
+    write_json(
+        tmp_path / "a.json", name="a", child="b.json", children=["b.json", "b.json"]
+    )
+    write_json(tmp_path / "b.json", name="b", children=[{"name": "c", "child": "c.json"}])
+    write_json(tmp_path / "c.json", name="c")
+    b = {"name": "b", "children": [{"name": "c", "child": {"name": "c"}}]}
+    assert expand_config(tmp_path / "a.json", Node) == {
+        "name": "a",
+        "child": b,
+        "children": [b, b],
+    }
@@ -0,0 +1,67 @@
+"""Test compiling model annotations into expansion plans"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+from nested_config import ConfigExpansionError, expand_config
+from nested_config.expand import PlanKind, ValuePlan, get_expansion_plan
+
+
+class Dimensions:
+    length: int
+    width: int
+    height: int
+
+
+class Plans:
+    name: str
+    numbers: List[int]
+    dimensions: Optional[Dimensions]
+    dim_list: List[Dimensions]
+    dim_dict: Dict[str, Dimensions]
+    dim_list_dict: Dict[str, List[Dimensions]]
+
+
+class Node:
+    name: str
+    children: List["Node"]
+
+
+def test_plan_kinds():
+    plan = get_expansion_plan(Plans)
+    assert plan["name"].kind is PlanKind.SCALAR
+    assert plan["numbers"].kind is PlanKind.SCALAR
+    assert plan["dimensions"] == ValuePlan(PlanKind.MODEL, model=Dimensions)
+    assert plan["dim_list"] == ValuePlan(
+        PlanKind.LIST, item=ValuePlan(PlanKind.MODEL, model=Dimensions)
+    )
+    assert plan["dim_dict"] == ValuePlan(
+        PlanKind.DICT, item=ValuePlan(PlanKind.MODEL, model=Dimensions)
+    )
+    assert plan["dim_list_dict"].item == plan["dim_list"]
+
+
+def test_plan_is_cached():
+    assert get_expansion_plan(Plans) is get_expansion_plan(Plans)
+
+
+def test_self_referencing_model(tmp_path: Path):
+    (tmp_path / "leaf.toml").write_text('name = "leaf"\nchildren = []')
+    (tmp_path / "root.toml").write_text(
+        'name = "root"\nchildren = ["leaf.toml", {name = "inline", children = []}]'
+    )
+    assert expand_config(tmp_path / "root.toml", Node) == {
+        "name": "root",
+        "children": [
+            {"name": "leaf", "children": []},
+            {"name": "inline", "children": []},
+        ],
+    }
+
+
+def test_unknown_field(tmp_path: Path):
+    (tmp_path / "bad.toml").write_text("length = 1\ncolor = 'red'")
+    with pytest.raises(ConfigExpansionError):
+        expand_config(tmp_path / "bad.toml", Dimensions)
@@ -0,0 +1,103 @@
+"""Test streaming the expanded items of a list field with iter_expand"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, Neighborhood
+
+from nested_config import (
+    ConfigExpansionError,
+    TraceCollector,
+    expand_config,
+    iter_expand,
+)
+from nested_config.trace import EventKind
+
+
+class Item:
+    name: str
+    parts: List["Item"]
+
+
+class Catalog:
+    name: str
+    items: List[Item]
+    tags: List[str]
+
+
+def _write_catalog(tmp_path, n_items):
+    for i in range(n_items):
+        part = {"name": f"part {i}", "parts": []}
+        (tmp_path / f"part{i}.json").write_text(json.dumps(part))
+        item = {"name": f"item {i}", "parts": [f"part{i}.json"]}
+        (tmp_path / f"item{i}.json").write_text(json.dumps(item))
+    catalog = {
+        "name": "catalog",
+        "items": [f"item{i}.json" for i in range(n_items)],
+        "tags": ["a", "b"],
+    }
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps(catalog))
+    return path
+
+
+def test_iter_expand():
+    houses = list(iter_expand(NEIGHBORHOOD_TOML_PATH, Neighborhood, "houses"))
+    assert houses == NEIGHBORHOOD["houses"]
+
+
+def test_items_expanded_one_at_a_time(tmp_path):
+    path = _write_catalog(tmp_path, 5)
+    collector = TraceCollector()
+    items = iter_expand(path, Catalog, "items", observer=collector)
+    first = next(items)
+    assert first == {"name": "item 0", "parts": [{"name": "part 0", "parts": []}]}
+    expanded = [e.path.name for e in collector.events if e.kind is EventKind.EXPAND]
+    assert expanded == ["part0.json", "item0.json"]
+    assert list(items) == expand_config(path, Catalog)["items"][1:]
+
+
+@pytest.mark.parametrize("read_ahead", [0, 1, 3])
+def test_read_ahead(tmp_path, read_ahead):
+    path = _write_catalog(tmp_path, 10)
+    expected = expand_config(path, Catalog)["items"]
+    assert list(iter_expand(path, Catalog, "items", read_ahead=read_ahead)) == expected
+    with ThreadPoolExecutor(2) as executor:
+        items = iter_expand(
+            path, Catalog, "items", read_ahead=read_ahead, executor=executor
+        )
+        assert list(items) == expected
+
+
+def test_chunks(tmp_path):
+    path = _write_catalog(tmp_path, 5)
+    chunks = list(iter_expand(path, Catalog, "items", chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert sum(chunks, []) == expand_config(path, Catalog)["items"]
+
+
+def test_stop_early(tmp_path):
+    path = _write_catalog(tmp_path, 10)
+    items = iter_expand(path, Catalog, "items", read_ahead=4)
+    assert next(items)["name"] == "item 0"
+    items.close()
+
+
+def test_scalar_list(tmp_path):
+    path = _write_catalog(tmp_path, 1)
+    assert list(iter_expand(path, Catalog, "tags")) == ["a", "b"]
+
+
+def test_errors(tmp_path):
+    path = _write_catalog(tmp_path, 3)
+    (tmp_path / "item1.json").unlink()
+    items = iter_expand(path, Catalog, "items")
+    assert next(items)["name"] == "item 0"
+    with pytest.raises(FileNotFoundError):
+        next(items)
+    with pytest.raises(ConfigExpansionError):
+        next(iter_expand(path, Catalog, "nope"))
+    with pytest.raises(ConfigExpansionError, match="not a list"):
+        next(iter_expand(path, Catalog, "name"))
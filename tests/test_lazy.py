@@ -0,0 +1,64 @@
+"""Test lazily expanding config files"""
+
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+from test_sub_model import (
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    Item,
+    Neighborhood,
+    write_items,
+)
+
+from nested_config import expand_config
+from nested_config.lazy import LazyConfigDict, LazyConfigList
+
+
+class Branches:
+    first: Item
+    items: List[Item]
+    by_name: Dict[str, Item]
+
+
+@pytest.fixture
+def branches_path(tmp_path: Path) -> Path:
+    write_items(tmp_path, 3)
+    root_path = tmp_path / "root.toml"
+    root_path.write_text(
+        'first = "item0.toml"\n'
+        'items = ["item1.toml", {index = 10}, "missing.toml"]\n'
+        'by_name = {two = "item2.toml"}\n'
+    )
+    return root_path
+
+
+def test_neighborhood():
+    config = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, lazy=True)
+    assert isinstance(config, LazyConfigDict)
+    assert config == NEIGHBORHOOD
+    assert config.resolve_all() == NEIGHBORHOOD
+    assert type(config.resolve_all()["houses"]) is list
+
+
+def test_loads_on_access(branches_path: Path):
+    config = expand_config(branches_path, Branches, lazy=True)
+    assert sorted(config.unexpanded_keys) == ["by_name", "first", "items"]
+    assert config["first"] == {"index": 0}
+    assert sorted(config.unexpanded_keys) == ["by_name", "items"]
+    items = config["items"]
+    assert isinstance(items, LazyConfigList)
+    assert items[0] == {"index": 1}
+    assert items[1] == {"index": 10}
+    # The bad path is only a problem when accessed
+    with pytest.raises(FileNotFoundError):
+        items[2]
+    with pytest.raises(FileNotFoundError):
+        config.resolve_all()
+    assert config["by_name"]["two"] == {"index": 2}
+
+
+def test_result_is_cached(branches_path: Path):
+    config = expand_config(branches_path, Branches, lazy=True)
+    assert config["first"] is config["first"]
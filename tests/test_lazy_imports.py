@@ -0,0 +1,56 @@
+"""Test that optional and slow-to-import dependencies are only imported when used"""
+
+import subprocess
+import sys
+
+import pytest
+
+import nested_config
+
+
+def _modules_after(code):
+    """The modules imported by running `code` in a fresh interpreter"""
+    output = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return set(output.split())
+
+
+def test_import_is_lazy():
+    modules = _modules_after("import nested_config")
+    for name in ("pydantic", "yaml", "asyncio", "setuptools", "nested_config._pydantic"):
+        assert name not in modules
+
+
+def test_import_after_pydantic_patches_it():
+    pytest.importorskip("pydantic")
+    modules = _modules_after("import pydantic\nimport nested_config")
+    assert "nested_config._pydantic" in modules
+
+
+def test_expand_toml_is_lazy(tmp_path):
+    (tmp_path / "a.toml").write_text('name = "a"')
+    modules = _modules_after(
+        "from nested_config import expand_config\n"
+        "class A:\n"
+        "    name: str\n"
+        f"expand_config({str(tmp_path / 'a.toml')!r}, A)"
+    )
+    assert "pydantic" not in modules
+    assert "yaml" not in modules
+
+
+def test_lazy_attributes():
+    pytest.importorskip("pydantic")
+    modules = _modules_after("import nested_config\nnested_config.BaseModel")
+    assert "pydantic" in modules
+    assert "BaseModel" in dir(nested_config)
+    from nested_config import expand_many, validate_config
+
+    assert expand_many is nested_config.batch.expand_many
+    assert validate_config is nested_config._pydantic.validate_config
+    with pytest.raises(AttributeError):
+        nested_config.no_such_attribute
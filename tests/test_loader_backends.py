@@ -0,0 +1,137 @@
+"""Conformance tests that every parser backend must pass"""
+
+import math
+from pathlib import Path
+
+import pytest
+
+from nested_config import loaders
+
+TESTS_DIR = Path(__file__).parent
+
+EXPECTED = {
+    "name": "conformance ✓",
+    "count": 3,
+    "big": 9007199254740993,
+    "negative": -17,
+    "ratio": 0.25,
+    "infinite": math.inf,
+    "enabled": True,
+    "disabled": False,
+    "tags": ["a", "b"],
+    "table": {"nested": {"x": 1, "y": [1.5, 2.5]}},
+    "tables": [{"name": "first"}, {"name": "second"}],
+}
+"""Every document also has "not_a_number" (NaN, which isn't equal to itself) and, except
+TOML (whose integers are 64-bit), "huge" (WIDE_INT)"""
+
+WIDE_INT = 2**70
+
+DOCUMENTS = {
+    "json": """{
+        "name": "conformance \\u2713", "count": 3, "big": 9007199254740993,
+        "negative": -17, "ratio": 0.25, "infinite": Infinity, "not_a_number": NaN,
+        "huge": 1180591620717411303424, "enabled": true, "disabled": false,
+        "tags": ["a", "b"], "table": {"nested": {"x": 1, "y": [1.5, 2.5]}},
+        "tables": [{"name": "first"}, {"name": "second"}]
+    }""",
+    "toml": """
+name = "conformance ✓"
+count = 3
+big = 9007199254740993
+negative = -17
+ratio = 0.25
+infinite = inf
+not_a_number = nan
+enabled = true
+disabled = false
+tags = ["a", "b"]
+
+[table.nested]
+x = 1
+y = [1.5, 2.5]
+
+[[tables]]
+name = "first"
+
+[[tables]]
+name = "second"
+""",
+    "yaml": """
+name: conformance ✓
+count: 3
+big: 9007199254740993
+negative: -17
+ratio: 0.25
+infinite: .inf
+not_a_number: .nan
+huge: 1180591620717411303424
+enabled: true
+disabled: false
+tags: [a, b]
+table:
+  nested:
+    x: 1
+    y: [1.5, 2.5]
+tables:
+  - name: first
+  - name: second
+""",
+}
+
+FIXTURE_DIRS = {"toml": TESTS_DIR / "toml_files", "yaml": TESTS_DIR / "yaml_files"}
+
+ALL_BACKENDS = [
+    (config_format, backend)
+    for config_format, backends in loaders.parser_backends.items()
+    for backend in backends
+]
+
+
+@pytest.fixture
+def pinned_backend(request):
+    config_format, backend = request.param
+    if not backend.is_available():
+        pytest.skip(f"{backend.name} is not installed")
+    loaders.set_backend(config_format, backend.name)
+    yield config_format, backend
+    loaders.set_backend(config_format, None)
+
+
+def _backend_id(param) -> str:
+    return f"{param[0]}-{param[1].name}"
+
+
+@pytest.mark.parametrize("pinned_backend", ALL_BACKENDS, ids=_backend_id, indirect=True)
+def test_conformance_document(pinned_backend):
+    config_format, backend = pinned_backend
+    assert loaders.get_backend(config_format) is backend
+    config = backend.loads(DOCUMENTS[config_format].encode())
+    assert math.isnan(config.pop("not_a_number"))
+    if config_format != "toml":
+        assert config.pop("huge") == WIDE_INT
+    assert config == EXPECTED
+
+
+@pytest.mark.parametrize("pinned_backend", ALL_BACKENDS, ids=_backend_id, indirect=True)
+def test_fixture_files(pinned_backend):
+    config_format, backend = pinned_backend
+    for path in sorted(FIXTURE_DIRS.get(config_format, TESTS_DIR).glob("**/*.*")):
+        if path.suffix != f".{config_format}":
+            continue
+        reference = loaders.parser_backends[config_format][-1].loads(path.read_bytes())
+        assert backend.loads(path.read_bytes()) == reference
+        assert loaders.load_config(path) == reference
+
+
+def test_set_backend_errors():
+    with pytest.raises(ValueError):
+        loaders.set_backend("toml", "no-such-backend")
+    with pytest.raises(ValueError):
+        loaders.set_backend("ini", None)
+
+
+def test_default_backends_available():
+    assert loaders.available_backends("json")[-1] == "json"
+    assert loaders.available_backends("toml")[-1] == "tomllib"
+    assert loaders.get_backend("json").name == loaders.available_backends("json")[0]
@@ -0,0 +1,67 @@
+"""Test loading sibling sub-config files concurrently with an executor"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+import pytest
+from test_sub_model import (
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    Item,
+    ItemList,
+    Neighborhood,
+    write_items,
+)
+
+from nested_config import ConfigLoaderError, expand_config
+from nested_config.expand import ConfigExpander
+
+
+class ItemDict:
+    items: Dict[str, Item]
+
+
+def test_neighborhood_with_workers():
+    with ConfigExpander(max_workers=4) as expander:
+        assert expander.expand(NEIGHBORHOOD_TOML_PATH, Neighborhood) == NEIGHBORHOOD
+
+
+def test_list_order(tmp_path: Path):
+    names = write_items(tmp_path, 50)
+    (tmp_path / "root.json").write_text(
+        '{"items": [' + ", ".join(f'"{name}"' for name in names) + ', {"index": 50}]}'
+    )
+    with ThreadPoolExecutor(8) as executor:
+        config = expand_config(tmp_path / "root.json", ItemList, executor=executor)
+    assert config == expand_config(tmp_path / "root.json", ItemList)
+    assert [item["index"] for item in config["items"]] == list(range(51))
+
+
+def test_dict_order(tmp_path: Path):
+    names = write_items(tmp_path, 20)
+    (tmp_path / "root.json").write_text(
+        '{"items": {' + ", ".join(f'"{name}": "{name}"' for name in names) + "}}"
+    )
+    with ConfigExpander(max_workers=8) as expander:
+        config = expander.expand(tmp_path / "root.json", ItemDict)
+    assert list(config["items"]) == names
+    assert config == expand_config(tmp_path / "root.json", ItemDict)
+
+
+@pytest.mark.parametrize(
+    "bad_item, error",
+    [("missing.toml", FileNotFoundError), ("bad.toml", ConfigLoaderError)],
+)
+def test_errors_match_serial(tmp_path: Path, bad_item, error):
+    names = write_items(tmp_path, 5)
+    (tmp_path / "bad.toml").write_text("index = ")
+    names.insert(2, bad_item)
+    (tmp_path / "root.json").write_text(
+        '{"items": [' + ", ".join(f'"{name}"' for name in names) + "]}"
+    )
+    with pytest.raises(error) as serial_exc:
+        expand_config(tmp_path / "root.json", ItemList)
+    with ConfigExpander(max_workers=4) as expander, pytest.raises(error) as parallel_exc:
+        expander.expand(tmp_path / "root.json", ItemList)
+    assert str(parallel_exc.value) == str(serial_exc.value)
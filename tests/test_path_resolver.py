@@ -0,0 +1,135 @@
+"""Test per-expansion path resolution and expanding each config file once"""
+
+import os
+from pathlib import PurePosixPath
+from typing import Dict, List
+
+import pytest
+from test_sub_model import write_json
+
+from nested_config import (
+    ConfigExpansionError,
+    MappingSource,
+    TraceCollector,
+    expand_config,
+)
+from nested_config.sources import FileSystemSource, PathResolver
+from nested_config.trace import EventKind
+
+
+class Leaf:
+    name: str
+
+
+class Branch:
+    name: str
+    leaf: Leaf
+
+
+class Tree:
+    branches: List[Branch]
+    by_name: Dict[str, Branch]
+
+
+def _parsed(collector):
+    return [event.path for event in collector.events if event.kind is EventKind.PARSE]
+
+
+def test_aliased_paths_expanded_once(tmp_path):
+    write_json(tmp_path / "shared" / "leaf.json", name="leaf")
+    write_json(tmp_path / "shared" / "branch.json", name="branch", leaf="leaf.json")
+    os.symlink(tmp_path / "shared", tmp_path / "link")
+    root = write_json(
+        tmp_path / "sub" / "tree.json",
+        branches=["../shared/branch.json", "../sub/../shared/branch.json"],
+        by_name={"linked": "../link/branch.json"},
+    )
+    collector = TraceCollector()
+    config = expand_config(root, Tree, observer=collector)
+    expected = {"name": "branch", "leaf": {"name": "leaf"}}
+    assert config == {"branches": [expected, expected], "by_name": {"linked": expected}}
+    assert sorted(path.name for path in _parsed(collector)) == [
+        "branch.json",
+        "leaf.json",
+        "tree.json",
+    ]
+    # Each reference gets its own copy
+    config["branches"][0]["leaf"]["name"] = "changed"
+    assert config["branches"][1]["leaf"]["name"] == "leaf"
+    assert config["by_name"]["linked"]["leaf"]["name"] == "leaf"
+
+
+def test_symlinked_file_in_other_directory(tmp_path):
+    """A symlink to a config file in another directory resolves relative paths from the
+    symlink's directory, so it isn't the same config file"""
+    write_json(tmp_path / "a" / "leaf.json", name="leaf a")
+    write_json(tmp_path / "b" / "leaf.json", name="leaf b")
+    write_json(tmp_path / "a" / "branch.json", name="branch", leaf="leaf.json")
+    os.symlink(tmp_path / "a" / "branch.json", tmp_path / "b" / "branch.json")
+    root = write_json(tmp_path / "tree.json", branches=["a/branch.json", "b/branch.json"])
+    config = expand_config(root, Tree)
+    assert [branch["leaf"]["name"] for branch in config["branches"]] == [
+        "leaf a",
+        "leaf b",
+    ]
+
+
+def test_same_file_different_models(tmp_path):
+    class Named:
+        name: str
+
+    class Root:
+        leaf: Leaf
+        named: Named
+
+    write_json(tmp_path / "leaf.json", name="leaf")
+    root = write_json(tmp_path / "root.json", leaf="leaf.json", named="./leaf.json")
+    collector = TraceCollector()
+    config = expand_config(root, Root, observer=collector)
+    assert config == {"leaf": {"name": "leaf"}, "named": {"name": "leaf"}}
+    assert len(_parsed(collector)) == 3
+
+
+class Loop:
+    child: "Loop"
+
+
+def test_cycle_through_symlink(tmp_path):
+    write_json(tmp_path / "real" / "a.json", child="../link/a.json")
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    with pytest.raises(ConfigExpansionError, match="cycle"):
+        expand_config(tmp_path / "real" / "a.json", Loop)
+
+
+def test_resolver_remembers_paths(tmp_path):
+    leaf_path = write_json(tmp_path / "leaf.json", name="leaf")
+    resolver = FileSystemSource().resolver()
+    path = resolver.resolve("leaf.json", tmp_path / "a.json")
+    assert path == leaf_path
+    leaf_path.unlink()
+    # Remembered for every config file in the same directory
+    assert resolver.resolve("leaf.json", tmp_path / "b.json") is path
+    with pytest.raises(FileNotFoundError):
+        resolver.resolve("leaf.json", tmp_path / "sub" / "c.json")
+    with pytest.raises(FileNotFoundError):
+        FileSystemSource().resolver().resolve("leaf.json", tmp_path / "a.json")
+
+
+def test_virtual_source_resolver():
+    source = MappingSource(
+        {
+            "tree.json": {"branches": ["branch.json", "x/../branch.json"], "by_name": {}},
+            "branch.json": {"name": "branch", "leaf": "leaf.json"},
+            "leaf.json": {"name": "leaf"},
+        }
+    )
+    resolver = source.resolver()
+    assert type(resolver) is PathResolver
+    path = resolver.resolve("x/../branch.json", source.make_path("tree.json"))
+    assert resolver.file_id(path) == PurePosixPath("/branch.json")
+    collector = TraceCollector()
+    config = expand_config("tree.json", Tree, source=source, observer=collector)
+    assert config["branches"][0] == config["branches"][1]
+    assert config["branches"][0] is not config["branches"][1]
+    assert len(_parsed(collector)) == 0
+    assert [e.kind for e in collector.events].count(EventKind.READ) == 3
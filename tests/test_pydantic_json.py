@@ -0,0 +1,114 @@
+"""Test validating JSON config files of leaf Pydantic models straight from their bytes"""
+
+import datetime
+import json
+from typing import List, Optional
+
+import pydantic
+import pytest
+from test_sub_model import write_json
+
+import nested_config
+from nested_config import ConfigExpansionError, ConfigLoaderError, loaders
+from nested_config._pydantic import PYDANTIC_1, _can_validate_json
+
+pytestmark = [
+    pytest.mark.skipif(PYDANTIC_1, reason="Pydantic 2 only"),
+    pytest.mark.filterwarnings("ignore::DeprecationWarning"),
+]
+
+
+class Dimensions(pydantic.BaseModel, extra="forbid"):
+    length: int
+    width: int
+    measured: Optional[datetime.date] = None
+
+
+class House(pydantic.BaseModel):
+    name: str
+    dimensions: Dimensions
+
+
+class Street(pydantic.BaseModel):
+    houses: List[House]
+
+
+class LaxDimensions(pydantic.BaseModel):
+    length: int
+    width: int
+
+
+class AliasedDimensions(pydantic.BaseModel, extra="forbid"):
+    length: int = pydantic.Field(alias="len")
+    width: int
+
+
+class LaxHouse(pydantic.BaseModel):
+    name: str
+    dimensions: LaxDimensions
+
+
+@pytest.fixture
+def json_loads_calls(monkeypatch):
+    calls = []
+
+    def json_loads(data):
+        calls.append(data)
+        return json.loads(data)
+
+    monkeypatch.setattr(loaders, "json_loads", json_loads)
+    return calls
+
+
+def test_json_validated_models():
+    assert _can_validate_json(Dimensions)
+    assert not _can_validate_json(House)
+    assert not _can_validate_json(Street)
+    # Pydantic would accept keys that expansion rejects
+    assert not _can_validate_json(LaxDimensions)
+    assert not _can_validate_json(AliasedDimensions)
+
+
+def test_leaf_files_not_parsed(tmp_path, json_loads_calls):
+    write_json(tmp_path / "dims.json", length=10, width=20, measured="2024-04-19")
+    write_json(tmp_path / "house.json", name="house", dimensions="dims.json")
+    street_path = write_json(
+        tmp_path / "street.json", houses=["house.json", "house.json"]
+    )
+    street = nested_config.validate_config(street_path, Street)
+    assert street.houses[1].dimensions == Dimensions(
+        length=10, width=20, measured=datetime.date(2024, 4, 19)
+    )
+    # Only the config files that refer to other config files are parsed to dicts
+    assert len(json_loads_calls) == 2
+    reused = nested_config.validate_config(street_path, Street, reuse_submodels=True)
+    assert reused == street
+    assert reused.houses[0].dimensions is reused.houses[1].dimensions
+
+
+def test_root_leaf_file(tmp_path, json_loads_calls):
+    dims_path = write_json(tmp_path / "dims.json", length=10, width=20)
+    assert nested_config.validate_config(dims_path, Dimensions) == Dimensions(
+        length=10, width=20
+    )
+    assert not json_loads_calls
+
+
+def test_errors_unchanged(tmp_path):
+    write_json(tmp_path / "house.json", name="house", dimensions="dims.json")
+    write_json(tmp_path / "dims.json", length="long", width=20)
+    with pytest.raises(pydantic.ValidationError) as exc_info:
+        nested_config.validate_config(tmp_path / "house.json", House)
+    # The location of the error is within the parent model
+    assert exc_info.value.errors()[0]["loc"] == ("dimensions", "length")
+    (tmp_path / "dims.json").write_text("{not json")
+    with pytest.raises(ConfigLoaderError):
+        nested_config.validate_config(tmp_path / "house.json", House)
+
+
+@pytest.mark.parametrize("house_model", [House, LaxHouse])
+def test_extra_field_rejected(tmp_path, house_model):
+    write_json(tmp_path / "house.json", name="house", dimensions="dims.json")
+    write_json(tmp_path / "dims.json", length=10, width=20, bogus=4)
+    with pytest.raises(ConfigExpansionError, match="bogus"):
+        nested_config.validate_config(tmp_path / "house.json", house_model)
@@ -7,7 +7,8 @@ from pathlib import PurePath, PurePosixPath, PureWindowsPath
 
 import pydantic
 
-# import Pydantic 1/2 compat fns. Also importing nested_config auto-patches pydantic
+# import Pydantic 1/2 compat fns. Also importing nested_config._pydantic auto-patches
+# pydantic
 from nested_config._pydantic import dump_json, model_validate
 
 PURE_POSIX_PATH = "/some/pure/path"
@@ -0,0 +1,80 @@
+"""Test reusing validated pydantic sub-models for repeated sub-config files"""
+
+from typing import List, Optional
+
+import pydantic
+import pytest
+
+import nested_config
+from nested_config._pydantic import PYDANTIC_1
+
+
+class Dimensions(pydantic.BaseModel):
+    length: int
+    width: int
+
+
+class Garage(pydantic.BaseModel):
+    name: str
+    dimensions: Dimensions
+
+
+class House(pydantic.BaseModel):
+    name: str
+    garage: Optional[Garage] = None
+
+
+class Street(pydantic.BaseModel):
+    houses: List[House]
+
+
+@pytest.fixture
+def street_path(tmp_path):
+    (tmp_path / "dims.toml").write_text("length = 10\nwidth = 20\n")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "garage.toml").write_text(
+        'name = "shared"\ndimensions = "../dims.toml"\n'
+    )
+    houses = [f'{{name = "house{i}", garage = "sub/garage.toml"}}' for i in range(5)]
+    houses.append('{name = "own", garage = {name = "own", dimensions = "dims.toml"}}')
+    street_path = tmp_path / "street.toml"
+    street_path.write_text(f"houses = [{', '.join(houses)}]\n")
+    return street_path
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_reuse_submodels(street_path):
+    street = nested_config.validate_config(street_path, Street, reuse_submodels=True)
+    assert street == nested_config.validate_config(street_path, Street)
+    if PYDANTIC_1:
+        # Pydantic 1 copies the reused instances into their parents
+        return
+    garages = [house.garage for house in street.houses]
+    assert all(garage is garages[0] for garage in garages[:5])
+    assert garages[5] is not garages[0]
+    # dims.toml is referenced by the shared garage and the last house's own garage
+    assert garages[5].dimensions is garages[0].dimensions
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_reuse_submodels_without_reuse(street_path):
+    street = nested_config.validate_config(street_path, Street)
+    assert street.houses[0].garage is not street.houses[1].garage
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_reuse_submodels_through_symlink(tmp_path):
+    # a/garage.toml is a symlink to b/garage.toml, but its dims.toml is a/dims.toml
+    for name, length in [("a", 1), ("b", 2)]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "dims.toml").write_text(f"length = {length}\nwidth = 20\n")
+    (tmp_path / "b" / "garage.toml").write_text('name = "g"\ndimensions = "dims.toml"\n')
+    (tmp_path / "a" / "garage.toml").symlink_to(tmp_path / "b" / "garage.toml")
+    street_path = tmp_path / "street.toml"
+    street_path.write_text(
+        'houses = [{name = "a", garage = "a/garage.toml"},'
+        ' {name = "b", garage = "b/garage.toml"}]\n'
+    )
+    street = nested_config.validate_config(street_path, Street, reuse_submodels=True)
+    assert street == nested_config.validate_config(street_path, Street)
+    assert [house.garage.dimensions.length for house in street.houses] == [1, 2]
@@ -0,0 +1,98 @@
+"""Test expanding into slotted records rather than dicts"""
+
+import copy
+import pickle
+from typing import Dict, List, Optional
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, Neighborhood
+
+from nested_config import (
+    ConfigExpansionError,
+    expand_config,
+    expand_config_data,
+    iter_expand,
+)
+from nested_config.records import Record, record_class
+
+
+class Leaf:
+    name: str
+    size: Optional[int]
+
+
+class Tree:
+    leaves: List[Leaf]
+    by_name: Dict[str, Leaf]
+    trunk: Leaf
+
+
+def test_neighborhood():
+    neighborhood = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, records=True)
+    assert type(neighborhood) is record_class(Neighborhood)
+    assert isinstance(neighborhood, Record)
+    assert neighborhood.name == "Beverly Hills"
+    assert neighborhood.houses[1].garage.dimensions.width == 15
+    assert not hasattr(neighborhood, "__dict__")
+    assert neighborhood.to_dict() == NEIGHBORHOOD
+
+
+def test_config_data():
+    tree = expand_config_data(
+        {
+            "leaves": [{"name": "a", "size": 1}, {"name": "b"}],
+            "by_name": {"c": {"name": "c"}},
+            "trunk": {"name": "trunk"},
+        },
+        Tree,
+        records=True,
+    )
+    assert [leaf.name for leaf in tree.leaves] == ["a", "b"]
+    assert tree.by_name["c"].name == "c"
+    # Fields that weren't in the config file are unset
+    with pytest.raises(AttributeError):
+        tree.leaves[1].size
+    assert tree.to_dict()["leaves"] == [{"name": "a", "size": 1}, {"name": "b"}]
+    assert repr(tree.trunk) == "Leaf(name='trunk')"
+    assert tree.trunk == record_class(Leaf)({"name": "trunk"})
+    assert tree.trunk != tree.by_name["c"]
+
+
+def test_pickle_and_copy():
+    neighborhood = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, records=True)
+    for copied in (pickle.loads(pickle.dumps(neighborhood)), copy.deepcopy(neighborhood)):
+        assert copied == neighborhood
+        assert type(copied.houses[0]) is type(neighborhood.houses[0])  # noqa: E721
+        assert copied.houses[0] is not neighborhood.houses[0]
+
+
+def test_iter_expand():
+    items = list(
+        iter_expand(NEIGHBORHOOD_TOML_PATH, Neighborhood, "houses", records=True)
+    )
+    assert [house.to_dict() for house in items] == NEIGHBORHOOD["houses"]
+
+
+def test_not_with_shared_or_lazy():
+    with pytest.raises(ValueError):
+        expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, records=True, shared=True)
+    with pytest.raises(ValueError):
+        expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, records=True, lazy=True)  # type: ignore
+
+
+class Change:
+    update: str
+    values: List[int]
+
+
+class Exportable:
+    to_dict: bool
+
+
+def test_field_names(tmp_path):
+    (tmp_path / "change.toml").write_text('update = "now"\nvalues = [1, 2]\n')
+    change = expand_config(tmp_path / "change.toml", Change, records=True)
+    assert change.update == "now"
+    assert change.to_dict() == {"update": "now", "values": [1, 2]}
+    with pytest.raises(ConfigExpansionError, match="to_dict"):
+        expand_config_data({"to_dict": True}, Exportable, records=True)
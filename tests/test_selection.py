@@ -0,0 +1,182 @@
+"""Test expanding only the values selected by include/exclude field-path patterns"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from test_sub_model import (
+    HOUSE_WITH_GARAGE_TOML_PATH,
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    HouseWithGarage,
+    Neighborhood,
+)
+
+from nested_config import ConfigExpansionError, TraceCollector, expand_config
+from nested_config.expand import ConfigExpander
+from nested_config.trace import EventKind
+
+
+def _loaded_names(collector):
+    return sorted(e.path.name for e in collector.events if e.kind is EventKind.PARSE)
+
+
+def test_include():
+    collector = TraceCollector()
+    config = expand_config(
+        NEIGHBORHOOD_TOML_PATH,
+        Neighborhood,
+        include=["houses.*.dimensions"],
+        observer=collector,
+    )
+    moms_house, my_house = config["houses"]
+    assert moms_house == {
+        "name": "Mom's house",
+        "dimensions": NEIGHBORHOOD["houses"][0]["dimensions"],
+        "garage": "garage.toml",
+    }
+    # Inline values are left as they are in the config file
+    assert my_house["garage"]["dimensions"] == "subdir/garage_dimensions.toml"
+    assert my_house["dimensions"] == NEIGHBORHOOD["houses"][1]["dimensions"]
+    assert _loaded_names(collector) == ["house_dimensions.toml", "neighborhood.toml"]
+
+
+def test_include_through_file():
+    config = expand_config(
+        HOUSE_WITH_GARAGE_TOML_PATH, HouseWithGarage, include=["garage.name"]
+    )
+    assert config["dimensions"] == "subdir/house_dimensions.toml"
+    assert config["garage"] == {
+        "name": "way out back",
+        "dimensions": "subdir/garage_dimensions.toml",
+    }
+
+
+def test_include_index():
+    config = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, include=["houses.1"])
+    assert config["houses"][0]["dimensions"] == "subdir/house_dimensions.toml"
+    assert config["houses"][1] == NEIGHBORHOOD["houses"][1]
+
+
+def test_exclude():
+    config = expand_config(
+        NEIGHBORHOOD_TOML_PATH, Neighborhood, exclude=["houses.*.garage.dimensions"]
+    )
+    moms_house, my_house = config["houses"]
+    assert moms_house["dimensions"] == NEIGHBORHOOD["houses"][0]["dimensions"]
+    assert moms_house["garage"]["name"] == "way out back"
+    assert moms_house["garage"]["dimensions"] == "subdir/garage_dimensions.toml"
+    assert my_house["garage"]["dimensions"] == "subdir/garage_dimensions.toml"
+
+
+def test_exclude_overrides_include():
+    config = expand_config(
+        NEIGHBORHOOD_TOML_PATH,
+        Neighborhood,
+        include=["houses"],
+        exclude=["houses.0.garage"],
+    )
+    assert config["houses"][0]["garage"] == "garage.toml"
+    assert config["houses"][0]["dimensions"] == NEIGHBORHOOD["houses"][0]["dimensions"]
+    assert config["houses"][1] == NEIGHBORHOOD["houses"][1]
+
+
+def test_drop_unselected():
+    config = expand_config(
+        NEIGHBORHOOD_TOML_PATH,
+        Neighborhood,
+        include=["houses.*.garage.dimensions", "houses.1.name"],
+        drop_unselected=True,
+    )
+    garage_dimensions = NEIGHBORHOOD["houses"][0]["garage"]["dimensions"]
+    assert config == {
+        "houses": [
+            {"garage": {"dimensions": garage_dimensions}},
+            {"name": "my house", "garage": {"dimensions": garage_dimensions}},
+        ]
+    }
+
+
+def test_drop_list_items():
+    config = expand_config(
+        NEIGHBORHOOD_TOML_PATH,
+        Neighborhood,
+        include=["houses.1.garage"],
+        drop_unselected=True,
+    )
+    assert config == {"houses": [{"garage": NEIGHBORHOOD["houses"][1]["garage"]}]}
+
+
+def test_with_executor():
+    with ThreadPoolExecutor(4) as executor:
+        config = expand_config(
+            NEIGHBORHOOD_TOML_PATH,
+            Neighborhood,
+            include=["houses.*.dimensions"],
+            executor=executor,
+        )
+    assert config["houses"][0]["garage"] == "garage.toml"
+    assert config["houses"][0]["dimensions"] == NEIGHBORHOOD["houses"][0]["dimensions"]
+
+
+def test_same_file_with_different_selections(tmp_path):
+    class Inner:
+        a: HouseWithGarage
+        b: HouseWithGarage
+
+    (tmp_path / "inner.toml").write_text(
+        f'a = "{HOUSE_WITH_GARAGE_TOML_PATH}"\nb = "{HOUSE_WITH_GARAGE_TOML_PATH}"'
+    )
+    config = expand_config(tmp_path / "inner.toml", Inner, exclude=["a.garage"])
+    assert config["a"]["garage"] == "garage.toml"
+    assert config["b"]["garage"]["name"] == "way out back"
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "nope",
+        "houses.*.nope",
+        "name.x",
+        "houses.*.garage.dimensions.x.y",
+        # Missing the list index
+        "houses.dimensions",
+    ],
+)
+def test_bad_pattern(pattern):
+    with pytest.raises(ConfigExpansionError, match="doesn't match"):
+        expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, include=[pattern])
+
+
+def test_compiled_once():
+    expander = ConfigExpander()
+    expected = expander.expand(
+        NEIGHBORHOOD_TOML_PATH, Neighborhood, include=["houses.*.dimensions"]
+    )
+    assert (
+        expander.expand(
+            NEIGHBORHOOD_TOML_PATH, Neighborhood, include=("houses.*.dimensions",)
+        )
+        == expected
+    )
+    from nested_config.expand import _compile_selection
+
+    assert _compile_selection.cache_info().hits >= 1
+
+
+def test_children_remembered_per_pattern_name():
+    from nested_config.expand import _compile_selection
+
+    selection = _compile_selection(
+        Neighborhood, ("houses.*.dimensions", "houses.1"), (), False
+    )
+    houses = selection.child("houses")
+    children = [houses.child(i) for i in range(1000)]
+    assert children[1] is not children[0]
+    assert all(child is children[0] for child in children[2:])
+    # Not one for every list index
+    assert len(houses._children) == 2
+
+
+def test_not_with_lazy():
+    with pytest.raises(ValueError):
+        expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, lazy=True, include=["name"])
@@ -0,0 +1,123 @@
+"""Test incremental re-expansion with ExpansionSession and ConfigReloader"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+from test_sub_model import (
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    Item,
+    Neighborhood,
+    write_items,
+)
+
+from nested_config import ConfigReloader, ExpansionSession, expand_config
+
+
+class Group:
+    name: str
+    items: List[Item]
+
+
+class Root:
+    groups: List[Group]
+
+
+def _write(path: Path, text: str):
+    """Write a file and make sure its mtime changes"""
+    mtime_ns = path.stat().st_mtime_ns + 1_000_000_000 if path.exists() else None
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def root_path(tmp_path: Path) -> Path:
+    write_items(tmp_path, 4)
+    _write(tmp_path / "group_a.toml", 'name = "a"\nitems = ["item0.toml", "item1.toml"]')
+    _write(tmp_path / "group_b.toml", 'name = "b"\nitems = ["item2.toml", "item3.toml"]')
+    _write(tmp_path / "root.toml", 'groups = ["group_a.toml", "group_b.toml"]')
+    return tmp_path / "root.toml"
+
+
+def test_neighborhood():
+    session = ExpansionSession(NEIGHBORHOOD_TOML_PATH, Neighborhood)
+    assert session.expand() == NEIGHBORHOOD
+    assert len(session.files) == 4
+
+
+def test_refresh_reuses_unchanged_subtrees(root_path: Path):
+    session = ExpansionSession(root_path, Root)
+    old = session.expand()
+    assert len(session.files) == 7
+    _write(root_path.parent / "item3.toml", "index = 30")
+    assert session.changed_files() == [(root_path.parent / "item3.toml").resolve()]
+    new = session.refresh(session.changed_files())
+    assert new == expand_config(root_path, Root)
+    assert new["groups"][1]["items"][1] == {"index": 30}
+    assert new["groups"][0] is old["groups"][0]
+    assert new["groups"][1] is not old["groups"][1]
+    assert session.changed_files() == []
+
+
+def test_refresh_drops_unreferenced_files(root_path: Path):
+    session = ExpansionSession(root_path, Root)
+    session.expand()
+    _write(root_path, 'groups = ["group_a.toml"]')
+    assert session.refresh([root_path]) == expand_config(root_path, Root)
+    assert len(session.files) == 4
+
+
+def test_reloader(root_path: Path):
+    session = ExpansionSession(root_path, Root)
+    reloader = ConfigReloader(session, interval=0.01)
+    published = []
+    reloaded = threading.Event()
+
+    def callback(config):
+        published.append(config)
+        reloaded.set()
+
+    reloader.add_callback(callback)
+    with reloader:
+        _write(root_path.parent / "item0.toml", "index = 100")
+        assert reloaded.wait(5)
+    assert published[-1]["groups"][0]["items"][0] == {"index": 100}
+    assert session.config is published[-1]
+
+
+def test_reloader_error_keeps_old_config(root_path: Path):
+    session = ExpansionSession(root_path, Root)
+    old = session.expand()
+    errors: List[Exception] = []
+    reloader = ConfigReloader(session, on_error=errors.append)
+    _write(root_path.parent / "item0.toml", "index = ")
+    assert not reloader.check()
+    assert len(errors) == 1
+    assert session.config is old
+    # The bad file isn't retried until it changes again
+    assert not reloader.check()
+    assert len(errors) == 1
+    _write(root_path.parent / "item0.toml", "index = 5")
+    assert reloader.check()
+    assert session.config["groups"][0]["items"][0] == {"index": 5}
+
+
+def test_reloader_logs_errors(root_path: Path, caplog):
+    session = ExpansionSession(root_path, Root)
+    old = session.expand()
+    with ConfigReloader(session, interval=0.01):
+        with caplog.at_level(logging.ERROR, logger="nested_config.session"):
+            _write(root_path.parent / "item0.toml", "index = ")
+            for _ in range(500):
+                if caplog.records:
+                    break
+                time.sleep(0.01)
+    assert "Couldn't reload" in caplog.records[0].getMessage()
+    assert caplog.records[0].exc_info is not None
+    assert session.config is old
@@ -0,0 +1,86 @@
+"""Test sharing one read-only expanded config dict per config file"""
+
+import json
+from types import MappingProxyType
+from typing import Dict, List
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, Neighborhood
+
+from nested_config import (
+    TraceCollector,
+    expand_config,
+    expand_config_data,
+    iter_expand,
+)
+from nested_config.trace import EventKind
+
+
+class Leaf:
+    name: str
+    tags: List[str]
+
+
+class Fleet:
+    leaves: List[Leaf]
+    by_name: Dict[str, Leaf]
+    extra: Dict[str, List[int]]
+
+
+def _thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+def _write_fleet(tmp_path):
+    (tmp_path / "leaf.json").write_text(json.dumps({"name": "leaf", "tags": ["a"]}))
+    fleet = {
+        "leaves": ["leaf.json", "./leaf.json", {"name": "inline", "tags": []}],
+        "by_name": {"x": "leaf.json"},
+        "extra": {"numbers": [1, 2]},
+    }
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps(fleet))
+    return path
+
+
+def test_shared(tmp_path):
+    path = _write_fleet(tmp_path)
+    collector = TraceCollector()
+    config = expand_config(path, Fleet, shared=True, observer=collector)
+    assert _thaw(config) == expand_config(path, Fleet)
+    leaves = config["leaves"]
+    assert isinstance(config, MappingProxyType)
+    assert isinstance(leaves, tuple)
+    assert isinstance(leaves[0]["tags"], tuple)
+    assert config["extra"]["numbers"] == (1, 2)
+    # One object for every reference to leaf.json
+    assert leaves[0] is leaves[1] is config["by_name"]["x"]
+    expanded = [e.path.name for e in collector.events if e.kind is EventKind.EXPAND]
+    assert expanded == ["leaf.json", "fleet.json"]
+    with pytest.raises(TypeError):
+        leaves[0]["name"] = "changed"  # type: ignore
+
+
+def test_shared_neighborhood():
+    config = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, shared=True)
+    assert _thaw(config) == NEIGHBORHOOD
+
+
+def test_shared_data_and_iter(tmp_path):
+    path = _write_fleet(tmp_path)
+    data = json.loads(path.read_text())
+    config = expand_config_data(data, Fleet, config_path=path, shared=True)
+    assert isinstance(config, MappingProxyType)
+    assert _thaw(config) == expand_config(path, Fleet)
+    leaves = list(iter_expand(path, Fleet, "leaves", shared=True))
+    assert all(isinstance(leaf, MappingProxyType) for leaf in leaves)
+    assert [_thaw(leaf) for leaf in leaves] == expand_config(path, Fleet)["leaves"]
+
+
+def test_not_with_lazy():
+    with pytest.raises(ValueError):
+        expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, lazy=True, shared=True)
@@ -0,0 +1,90 @@
+"""Test sharing a single-flight ConfigExpander between threads"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, Neighborhood
+
+from nested_config import ConfigLoaderError, SingleFlightConfigExpander, loaders
+
+THREADS = 8
+
+
+class Leaf:
+    name: str
+    tags: List[str]
+
+
+class Tree:
+    leaves: List[Leaf]
+
+
+@pytest.fixture
+def slow_loader(monkeypatch):
+    """A loader for '.slow' files that blocks until every other thread is waiting for
+    it, and counts its calls"""
+    state = {"expander": None, "calls": 0, "error": False}
+
+    def load(path):
+        state["calls"] += 1
+        deadline = time.monotonic() + 10
+        while state["expander"].collapsed_loads < THREADS - 1:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        if state["error"]:
+            raise ValueError("bad file")
+        return json.loads(path.read_text())
+
+    monkeypatch.setitem(loaders.config_dict_loaders, ".slow", load)
+    return state
+
+
+def test_concurrent_loads_collapsed(tmp_path, slow_loader):
+    (tmp_path / "leaf.slow").write_text(json.dumps({"name": "leaf", "tags": ["a"]}))
+    for i in range(THREADS):
+        (tmp_path / f"tree{i}.json").write_text(json.dumps({"leaves": ["leaf.slow"]}))
+    expander = SingleFlightConfigExpander()
+    slow_loader["expander"] = expander
+    with ThreadPoolExecutor(THREADS) as pool:
+        trees = list(
+            pool.map(
+                lambda i: expander.expand(tmp_path / f"tree{i}.json", Tree),
+                range(THREADS),
+            )
+        )
+    assert slow_loader["calls"] == 1
+    assert expander.loads == THREADS + 1
+    assert expander.collapsed_loads == THREADS - 1
+    assert expander.wait_time > 0
+    assert all(tree == {"leaves": [{"name": "leaf", "tags": ["a"]}]} for tree in trees)
+    # Every thread gets its own copy
+    tags = [tree["leaves"][0]["tags"] for tree in trees]
+    assert len({id(tag_list) for tag_list in tags}) == THREADS
+    expander.reset_stats()
+    assert (expander.loads, expander.collapsed_loads, expander.wait_time) == (0, 0, 0)
+
+
+def test_error_raised_in_every_thread(tmp_path, slow_loader):
+    (tmp_path / "leaf.slow").write_text("{}")
+    expander = SingleFlightConfigExpander()
+    slow_loader.update(expander=expander, error=True)
+    with ThreadPoolExecutor(THREADS) as pool:
+        futures = [
+            pool.submit(expander.expand, tmp_path / "leaf.slow", Leaf)
+            for _ in range(THREADS)
+        ]
+    for future in futures:
+        with pytest.raises(ConfigLoaderError):
+            future.result()
+    assert slow_loader["calls"] == 1
+
+
+def test_expand():
+    with SingleFlightConfigExpander(max_workers=4) as expander:
+        assert expander.expand(NEIGHBORHOOD_TOML_PATH, Neighborhood) == NEIGHBORHOOD
+        # Files are loaded again once no other thread is loading them
+        assert expander.expand(NEIGHBORHOOD_TOML_PATH, Neighborhood) == NEIGHBORHOOD
+    assert expander.collapsed_loads == 0
@@ -0,0 +1,122 @@
+"""Test binary snapshots of expanded config dicts"""
+
+import datetime
+import multiprocessing
+import subprocess
+import sys
+
+import pytest
+from test_sub_model import NEIGHBORHOOD, NEIGHBORHOOD_TOML_PATH, Neighborhood
+
+from nested_config import Snapshot, expand_config, write_snapshot
+from nested_config.snapshot import (
+    SnapshotError,
+    SnapshotList,
+    SnapshotMapping,
+    dump_snapshot,
+    share_snapshot,
+)
+
+CONFIG = {
+    "name": "app",
+    "count": 3,
+    "big": 2**80,
+    "negative": -7,
+    "ratio": 0.25,
+    "enabled": True,
+    "disabled": False,
+    "nothing": None,
+    "blob": b"\x00\x01",
+    "when": datetime.datetime(2024, 4, 19, 12, 30),
+    "day": datetime.date(2024, 4, 19),
+    "time": datetime.time(12, 30),
+    "unicode": "ünïcødé",
+    "items": [1, "two", [3.0], {"four": 4}],
+    "nested": {"z": 1, "a": {"b": []}, "m": {}},
+}
+
+
+def test_round_trip():
+    snapshot = Snapshot(dump_snapshot(CONFIG))
+    root = snapshot.root
+    assert isinstance(root, SnapshotMapping)
+    assert isinstance(root["items"], SnapshotList)
+    assert root == CONFIG
+    assert root.to_dict() == CONFIG
+    assert type(root.to_dict()["items"]) is list
+    assert list(root) == list(CONFIG)
+    assert list(root["nested"]) == ["z", "a", "m"]
+    assert root["items"][-1]["four"] == 4
+    assert root["items"][1:3] == ["two", [3.0]]
+    assert "missing" not in root
+    assert root.get("missing") is None
+    with pytest.raises(KeyError):
+        root["missing"]
+    with pytest.raises(IndexError):
+        root["items"][4]
+
+
+def test_shared_objects_stored_once():
+    leaf = {"name": "leaf", "tags": ["a", "b"] * 100}
+    shared = {"leaves": [leaf] * 50}
+    copied = {"leaves": [dict(leaf) for _ in range(50)]}
+    assert len(dump_snapshot(shared)) < len(dump_snapshot(copied)) / 2
+    assert Snapshot(dump_snapshot(shared)).root == copied
+
+
+def test_file(tmp_path):
+    config = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood, shared=True)
+    path = tmp_path / "neighborhood.ncsnap"
+    write_snapshot(config, path)
+    with Snapshot.open(path) as snapshot:
+        assert snapshot.root == NEIGHBORHOOD
+        assert snapshot.root["houses"][1]["garage"]["name"] == "my garage"
+
+
+_ATTACH_AND_EXIT = """
+import sys
+from multiprocessing import resource_tracker
+
+import nested_config
+
+nested_config.Snapshot.attach(sys.argv[1]).close()
+# Let the resource tracker clean up as it does when the process exits
+resource_tracker._resource_tracker._stop()
+"""
+
+
+def _read_name(shm_name, queue):
+    with Snapshot.attach(shm_name) as snapshot:
+        queue.put(snapshot.root["houses"][0]["name"])
+
+
+def test_shared_memory():
+    config = expand_config(NEIGHBORHOOD_TOML_PATH, Neighborhood)
+    shm = share_snapshot(config)
+    try:
+        with Snapshot.attach(shm.name) as snapshot:
+            assert snapshot.root == NEIGHBORHOOD
+        queue = multiprocessing.get_context("spawn").Queue()
+        process = multiprocessing.get_context("spawn").Process(
+            target=_read_name, args=(shm.name, queue)
+        )
+        process.start()
+        assert queue.get(timeout=30) == "Mom's house"
+        process.join()
+        # A process that isn't a child (so has its own resource tracker) attaches and
+        # exits without unlinking the block
+        subprocess.run([sys.executable, "-c", _ATTACH_AND_EXIT, shm.name], check=True)
+        with Snapshot.attach(shm.name) as snapshot:
+            assert snapshot.root == NEIGHBORHOOD
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_errors():
+    with pytest.raises(SnapshotError):
+        Snapshot(b"not a snapshot")
+    with pytest.raises(TypeError):
+        dump_snapshot({"x": object()})
+    with pytest.raises(TypeError):
+        dump_snapshot({"x": {1: "one"}})
@@ -0,0 +1,115 @@
+"""Test expanding config files from in-memory and package-resource sources"""
+
+import importlib
+import shutil
+import sys
+import types
+from pathlib import PurePosixPath
+
+import pytest
+from test_sub_model import (
+    HOUSE_DIMENSIONS,
+    NEIGHBORHOOD,
+    TOML_DIR,
+    House,
+    Neighborhood,
+)
+
+from nested_config import (
+    ConfigLoaderError,
+    MappingSource,
+    NoLoaderError,
+    ResourceSource,
+    expand_config,
+    expand_config_data,
+)
+from nested_config.sources import _package_directory
+
+HOUSE_FILES = {
+    "houses/house.toml": 'name = "my house"\ndimensions = "../dims/house.json"',
+    "dims/house.json": b'{"length": 40, "width": 20, "height": 10}',
+}
+
+
+def test_mapping_source_relative_paths():
+    house = expand_config("houses/house.toml", House, source=MappingSource(HOUSE_FILES))
+    assert house == {"name": "my house", "dimensions": HOUSE_DIMENSIONS}
+
+
+def test_mapping_source_config_dicts_are_copied():
+    dims = dict(HOUSE_DIMENSIONS)
+    source = MappingSource(
+        {"/house.yaml": "name: x\ndimensions: dims.toml", "dims.toml": dims}
+    )
+    house = expand_config("house.yaml", House, source=source)
+    house["dimensions"]["length"] = 0
+    assert dims == HOUSE_DIMENSIONS
+
+
+def test_mapping_source_missing_file():
+    source = MappingSource({"house.toml": 'name = "x"\ndimensions = "nowhere.toml"'})
+    with pytest.raises(FileNotFoundError):
+        expand_config("house.toml", House, source=source)
+    with pytest.raises(ConfigLoaderError) as exc_info:
+        expand_config("nowhere.toml", House, source=source)
+    assert exc_info.value.config_path == PurePosixPath("/nowhere.toml")
+
+
+def test_mapping_source_lazy():
+    house = expand_config(
+        "houses/house.toml", House, source=MappingSource(HOUSE_FILES), lazy=True
+    )
+    assert house["dimensions"] == HOUSE_DIMENSIONS
+
+
+def test_resource_source():
+    source = ResourceSource(TOML_DIR)
+    assert expand_config("neighborhood.toml", Neighborhood, source=source) == NEIGHBORHOOD
+
+
+@pytest.fixture
+def config_package(tmp_path, monkeypatch):
+    package_dir = tmp_path / "config_package"
+    shutil.copytree(TOML_DIR, package_dir)
+    (package_dir / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "config_package"
+    sys.modules.pop("config_package", None)
+
+
+def test_resource_source_package(config_package):
+    package = importlib.import_module(config_package)
+    for root in (config_package, package):
+        source = ResourceSource(root)
+        config = expand_config("neighborhood.toml", Neighborhood, source=source)
+        assert config == NEIGHBORHOOD
+    # Python 3.8's fallback for importlib.resources.files
+    assert _package_directory(config_package) == _package_directory(package)
+    source = ResourceSource(_package_directory(config_package))
+    assert expand_config("neighborhood.toml", Neighborhood, source=source) == NEIGHBORHOOD
+    with pytest.raises(ValueError, match="filesystem"):
+        _package_directory(types.ModuleType("not_on_disk"))
+
+
+def test_expand_config_data_str():
+    data = 'name = "my house"\ndimensions = "subdir/house_dimensions.toml"'
+    house = expand_config_data(
+        data, House, suffix=".toml", config_path=TOML_DIR / "house.toml"
+    )
+    assert house == {"name": "my house", "dimensions": HOUSE_DIMENSIONS}
+
+
+def test_expand_config_data_dict_with_source():
+    data = {"name": "my house", "dimensions": "dims/house.json"}
+    house = expand_config_data(data, House, source=MappingSource(HOUSE_FILES))
+    assert house["dimensions"] == HOUSE_DIMENSIONS
+
+
+def test_expand_config_data_needs_suffix():
+    with pytest.raises(NoLoaderError):
+        expand_config_data(b"name = 'x'", House)
+
+
+def test_expand_config_data_default_suffix():
+    data = b'name = "x"'
+    assert expand_config_data(data, House, default_suffix=".toml") == {"name": "x"}
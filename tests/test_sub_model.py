@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -23,6 +24,22 @@ def _test_paths(toml_path: Path) -> List[Path]:
     return [toml_path, YAML_DIR / f"{toml_path.stem}.yaml"]
 
 
+def write_json(path: Path, **config) -> Path:
+    """Write a JSON config file, making its directory if needed"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(config))
+    return path
+
+
+def write_items(directory: Path, n: int) -> List[str]:
+    """Write n Item config files, item{i}.toml, and return their names"""
+    names = []
+    for i in range(n):
+        (directory / f"item{i}.toml").write_text(f"index = {i}")
+        names.append(f"item{i}.toml")
+    return names
+
+
 class Dimensions:
     length: int
     width: int
@@ -58,6 +75,14 @@ class HouseWithGarage(House):
     garage: Optional[Garage]
 
 
+class Item:
+    index: int
+
+
+class ItemList:
+    items: List[Item]
+
+
 class Neighborhood:
     name: str
     houses: List[HouseWithGarage]
@@ -0,0 +1,114 @@
+"""Test expansion events and the TraceCollector"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from test_sub_model import (
+    HOUSE_TOML_PATH,
+    NEIGHBORHOOD,
+    NEIGHBORHOOD_TOML_PATH,
+    House,
+    Neighborhood,
+)
+
+from nested_config import (
+    ConfigCache,
+    MappingSource,
+    TraceCollector,
+    expand_config,
+    loaders,
+)
+from nested_config.trace import EventKind
+
+
+def _kinds(collector, path):
+    return [event.kind for event in collector.events if event.path == path]
+
+
+def test_events_for_each_step():
+    collector = TraceCollector()
+    assert expand_config(HOUSE_TOML_PATH, House, observer=collector)["name"]
+    dims_path = HOUSE_TOML_PATH.parent / "subdir" / "house_dimensions.toml"
+    assert _kinds(collector, HOUSE_TOML_PATH) == [
+        EventKind.READ,
+        EventKind.PARSE,
+        EventKind.EXPAND,
+    ]
+    assert _kinds(collector, dims_path) == [
+        EventKind.RESOLVE,
+        EventKind.READ,
+        EventKind.PARSE,
+        EventKind.EXPAND,
+    ]
+    parse = next(e for e in collector.events if e.kind is EventKind.PARSE)
+    assert parse.loader == f"toml:{loaders.get_backend('toml').name}"
+    assert parse.nbytes == HOUSE_TOML_PATH.stat().st_size
+    root_expand = collector.events[-1]
+    assert root_expand.model is House
+    # The root expansion includes everything else
+    assert all(
+        root_expand.start <= event.start
+        and event.start + event.duration <= root_expand.start + root_expand.duration
+        for event in collector.events
+    )
+
+
+def test_events_with_cache():
+    cache = ConfigCache()
+    collector = TraceCollector()
+    expand_config(HOUSE_TOML_PATH, House, cache=cache)
+    expand_config(HOUSE_TOML_PATH, House, cache=cache, observer=collector)
+    # All cache hits, so no reading or parsing
+    assert [e.kind for e in collector.events if e.path == HOUSE_TOML_PATH] == [
+        EventKind.STAT,
+        EventKind.EXPAND,
+    ]
+
+
+def test_events_custom_loader(monkeypatch):
+    def my_toml_load(path):
+        return loaders.toml_load(path)
+
+    monkeypatch.setitem(loaders.config_dict_loaders, ".toml", my_toml_load)
+    collector = TraceCollector()
+    expand_config(HOUSE_TOML_PATH, House, observer=collector)
+    assert _kinds(collector, HOUSE_TOML_PATH) == [EventKind.PARSE, EventKind.EXPAND]
+    assert collector.events[0].loader.endswith("my_toml_load")
+
+
+def test_events_mapping_source():
+    source = MappingSource(
+        {"house.toml": 'name = "x"\ndimensions = "dims.json"', "dims.json": b"{}"}
+    )
+    collector = TraceCollector()
+    expand_config("house.toml", House, source=source, observer=collector)
+    parses = [e for e in collector.events if e.kind is EventKind.PARSE]
+    assert [str(e.path) for e in parses] == ["/house.toml", "/dims.json"]
+    assert parses[1].nbytes == 2
+
+
+def test_summary_and_chrome_trace(tmp_path):
+    collector = TraceCollector()
+    with ThreadPoolExecutor(4) as executor:
+        config = expand_config(
+            NEIGHBORHOOD_TOML_PATH, Neighborhood, executor=executor, observer=collector
+        )
+    assert config == NEIGHBORHOOD
+    timings = collector.file_timings()
+    assert len(timings) == len({event.path for event in collector.events})
+    assert timings == sorted(timings, key=lambda t: t.load_time, reverse=True)
+    summary = collector.summary(n=3)
+    assert len(summary.splitlines()) == 1 + 3 + 2 + 1  # one loader, toml
+    trace_path = tmp_path / "trace.json"
+    collector.write_chrome_trace(trace_path)
+    trace = json.loads(trace_path.read_text())
+    assert len(trace["traceEvents"]) == len(collector.events)
+    assert min(event["ts"] for event in trace["traceEvents"]) == 0
+    assert {event["cat"] for event in trace["traceEvents"]} == {
+        "resolve",
+        "read",
+        "parse",
+        "expand",
+    }
+    collector.clear()
+    assert not collector.events